@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 """
 Скрипт для массового добавления продуктов в базу данных
+Повторный запуск не создает дубликатов: продукты сверяются по названию
+(database/catalog_import.py)
 """
 
 import sys
@@ -10,7 +12,7 @@ import io
 # Установим UTF-8 кодировку для stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-from database import add_product
+from database.catalog_import import import_catalog
 
 # Список всех продуктов для добавления
 products = [
@@ -337,20 +339,11 @@ def main():
     print("Добавление продуктов в базу данных...")
     print("=" * 60)
 
-    success_count = 0
-    error_count = 0
-
-    for i, product in enumerate(products, 1):
-        try:
-            product_id = add_product(**product)
-            print(f"✅ [{i}/{len(products)}] {product['name']} (ID: {product_id})")
-            success_count += 1
-        except Exception as e:
-            print(f"❌ [{i}/{len(products)}] {product['name']} - Ошибка: {e}")
-            error_count += 1
+    diff = import_catalog(products)
+    print(diff.report())
 
     print("=" * 60)
-    print(f"Завершено! Успешно: {success_count}, Ошибок: {error_count}")
+    print(f"Завершено! Добавлено: {len(diff.inserts)}, обновлено: {len(diff.updates)}, без изменений: {diff.unchanged}")
     print("=" * 60)
 
 if __name__ == "__main__":
@@ -2,10 +2,20 @@
 API Configuration
 """
 
+import time
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
+from database.instrumentation import query_scope
+from monitoring.log import bind_correlation_id
+from monitoring.metrics import Histogram
+
+REQUEST_SECONDS = Histogram(
+    'homefood_http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route', 'status')
+)
+
 
 class CachedStaticFiles(StaticFiles):
     """Custom StaticFiles with cache headers"""
@@ -20,6 +30,51 @@ class CachedStaticFiles(StaticFiles):
         return response
 
 
+class RequestMetricsMiddleware:
+    """
+    Records request latency per route template (/api/orders/{order_id}, not every ID),
+    counts the request's queries (N+1 / query budget warnings) and tags its logs
+    with a correlation id (X-Request-ID from the client or a new one, echoed back)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        request_id = next((value.decode('latin-1') for name, value in scope['headers']
+                           if name == b'x-request-id'), None)
+        request_id = bind_correlation_id(request_id[:64] if request_id else None)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                message['headers'] = list(message.get('headers', [])) + [(b'x-request-id', request_id.encode('latin-1'))]
+            await send(message)
+
+        with query_scope(f"{scope['method']} {scope['path']}") as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # The router stores the matched route in the scope; static files are mounted
+                route = scope.get('route')
+                if route is not None:
+                    path = route.path
+                elif scope['path'].startswith('/static/'):
+                    path = '/static'
+                else:
+                    path = 'unmatched'
+                queries.label = f"{scope['method']} {path}"
+                REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope['method'], route=path, status=status)
+
+
 def configure_app(app: FastAPI):
     """Configure FastAPI app with middleware and static files"""
 
@@ -35,4 +90,7 @@ def configure_app(app: FastAPI):
         allow_headers=["*"],
     )
 
+    # Request latency for /metrics
+    app.add_middleware(RequestMetricsMiddleware)
+
     return app
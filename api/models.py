@@ -17,6 +17,26 @@ class Product(BaseModel):
     ingredients: Optional[List[str]] = []
 
 
+class CatalogChanges(BaseModel):
+    """Catalog delta since a client's version"""
+    version: int
+    reset: bool
+    products: List[Product]
+    deleted: List[str] = []
+
+
+class IngredientFacet(BaseModel):
+    """How many matching dishes contain an ingredient"""
+    name: str
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """Ingredient facets of a product filter"""
+    total: int
+    ingredients: List[IngredientFacet]
+
+
 class OrderItem(BaseModel):
     """Order item model"""
     product_id: str
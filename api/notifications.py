@@ -2,132 +2,118 @@
 Telegram Notifications for Orders
 """
 
+import asyncio
+import logging
 import os
-from datetime import datetime
+import time
+from functools import wraps
 from dotenv import load_dotenv
 
+from bot.config import TELEGRAM_API_URL
+from bot.rendering import render_order, split_message
+from monitoring.metrics import Counter, Gauge, Histogram
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-async def send_telegram_notifications(order: dict):
-    """Отправка уведомлений в Telegram о новом заказе"""
-    try:
-        BOT_TOKEN = os.getenv("BOT_TOKEN")
-        ADMIN_IDS_STR = os.getenv("ADMIN_IDS", "")
-        ADMIN_IDS = [int(id.strip()) for id in ADMIN_IDS_STR.split(",") if id.strip()]
+# Уведомления отправляются фоновыми задачами - сколько из них еще не завершилось
+_in_flight = 0
 
-        if not BOT_TOKEN:
-            print("⚠️ BOT_TOKEN не установлен, уведомления не отправлены")
-            return
 
-        from telegram import Bot
-        bot = Bot(token=BOT_TOKEN)
-
-        # Форматируем заказ для отображения
-        status_emoji = {
-            'pending': '🕐',
-            'confirmed': '✅',
-            'cooking': '👨‍🍳',
-            'ready': '🎉',
-            'delivered': '📦',
-            'cancelled': '❌'
-        }
-
-        emoji = status_emoji.get(order.get('status', 'pending'), '🕐')
-
-        items_text = ""
-        if order.get('items_data'):
-            for item_str in order['items_data'].split(','):
-                parts = item_str.split(':')
-                if len(parts) >= 4:
-                    product_name = parts[1]
-                    quantity = parts[2]
-                    price = parts[3]
-
-                    items_text += f"  • {product_name} x{quantity} = {price} AED\n"
-
-        # Handle both datetime objects and ISO strings
-        created_at = order['created_at']
-        if isinstance(created_at, str):
-            created = datetime.fromisoformat(created_at).strftime('%d.%m.%Y %H:%M')
-        else:
-            created = created_at.strftime('%d.%m.%Y %H:%M')
+def notifications_in_flight() -> int:
+    """Число отправляемых сейчас уведомлений (очередь на отправку)"""
+    return _in_flight
 
-        customer_telegram = order.get('customer_telegram', 'Не указан')
-        telegram_display = f"@{customer_telegram}" if customer_telegram and customer_telegram != 'Не указан' else customer_telegram
 
-        # Сообщение для админов
-        admin_message = f"""
-🔔 <b>НОВЫЙ ЗАКАЗ!</b>
+def _track_in_flight(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        global _in_flight
+        _in_flight += 1
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _in_flight -= 1
+    return wrapper
 
-📋 <b>Заказ #{order['id']}</b>
-{emoji} <b>Статус:</b> Ожидает обработки
 
-👤 <b>Имя:</b> {order.get('customer_name', 'Не указано')}
-📱 <b>Telegram:</b> {telegram_display}
-📍 <b>Адрес:</b> {order.get('customer_address', 'Не указан')}
-📞 <b>Телефон:</b> {order.get('customer_phone', 'Не указан')}
+Gauge('homefood_notifications_in_flight', 'Notifications still being sent', function=notifications_in_flight)
+SEND_SECONDS = Histogram('homefood_notification_send_seconds', 'Time to deliver a notification to one chat', ('kind',))
+SEND_FAILURES = Counter('homefood_notification_failures_total', 'Notifications that failed to send', ('kind',))
 
-🛒 <b>Состав заказа:</b>
-{items_text}
-💰 <b>Итого:</b> {order['total_amount']} AED
+# 429 от Telegram: одна повторная попытка, если просят подождать не дольше этого (секунды)
+MAX_RETRY_AFTER = 5
 
-🕐 <b>Создан:</b> {created}
 
-<b>Пожалуйста, обработайте заказ через /start</b>
-"""
+async def _send(bot, kind: str, chat_id: int, chunks: list):
+    """Отправить сообщение (все части) в один чат, с замером времени"""
+    started = time.perf_counter()
+    try:
+        for chunk in chunks:
+            await _send_chunk(bot, chat_id, chunk)
+    except Exception:
+        SEND_FAILURES.inc(kind=kind)
+        raise
+    finally:
+        SEND_SECONDS.observe(time.perf_counter() - started, kind=kind)
 
-        # Сообщение для пользователя
-        user_message = f"""
-✅ <b>Ваш заказ создан!</b>
 
-📋 <b>Заказ #{order['id']}</b>
-{emoji} <b>Статус:</b> Ожидает подтверждения
+async def _send_chunk(bot, chat_id: int, text: str):
+    from telegram.error import RetryAfter
+    try:
+        await bot.send_message(chat_id=chat_id, text=text, parse_mode='HTML')
+    except RetryAfter as e:
+        if e.retry_after > MAX_RETRY_AFTER:
+            raise
+        await asyncio.sleep(e.retry_after)
+        await bot.send_message(chat_id=chat_id, text=text, parse_mode='HTML')
 
-🛒 <b>Состав заказа:</b>
-{items_text}
-💰 <b>Итого:</b> {order['total_amount']} AED
 
-📍 <b>Адрес доставки:</b> {order.get('customer_address', 'Не указан')}
+@_track_in_flight
+async def send_telegram_notifications(order: dict):
+    """Отправка уведомлений в Telegram о новом заказе"""
+    try:
+        BOT_TOKEN = os.getenv("BOT_TOKEN")
+        ADMIN_IDS_STR = os.getenv("ADMIN_IDS", "")
+        ADMIN_IDS = [int(id.strip()) for id in ADMIN_IDS_STR.split(",") if id.strip()]
 
-<b>Мы свяжемся с вами в ближайшее время!</b>
-Вы можете отслеживать статус заказа через /start → "Мои заказы"
-"""
+        if not BOT_TOKEN:
+            logger.warning("BOT_TOKEN не установлен, уведомления не отправлены")
+            return
+
+        from telegram import Bot
+        bot = Bot(token=BOT_TOKEN, base_url=TELEGRAM_API_URL)
+
+        # Рендерим один раз на заказ - тексты одинаковы для всех админов
+        admin_chunks = split_message(render_order('admin_new', order))
+        user_chunks = split_message(render_order('user_new', order))
 
         # Отправляем админам
         for admin_id in ADMIN_IDS:
             try:
-                await bot.send_message(
-                    chat_id=admin_id,
-                    text=admin_message,
-                    parse_mode='HTML'
-                )
-                print(f"✅ Уведомление отправлено админу {admin_id}")
+                await _send(bot, 'admin_new', admin_id, admin_chunks)
+                logger.info("Уведомление отправлено админу", extra={'chat_id': admin_id})
             except Exception as e:
-                print(f"❌ Ошибка отправки админу {admin_id}: {e}")
+                logger.error("Ошибка отправки админу %s: %s", admin_id, e)
 
         # Отправляем пользователю
         user_telegram_id = order.get('user_telegram_id')
         if user_telegram_id:
             try:
-                await bot.send_message(
-                    chat_id=user_telegram_id,
-                    text=user_message,
-                    parse_mode='HTML'
-                )
-                print(f"✅ Уведомление отправлено пользователю {user_telegram_id}")
+                await _send(bot, 'user_new', user_telegram_id, user_chunks)
+                logger.info("Уведомление отправлено пользователю", extra={'chat_id': user_telegram_id})
             except Exception as e:
-                print(f"❌ Ошибка отправки пользователю {user_telegram_id}: {e}")
-                print(f"   Возможно, пользователь не написал боту /start")
+                # Возможно, пользователь не написал боту /start
+                logger.error("Ошибка отправки пользователю %s: %s", user_telegram_id, e)
         else:
-            print("⚠️ user_telegram_id не указан, уведомление пользователю не отправлено")
+            logger.warning("user_telegram_id не указан, уведомление пользователю не отправлено")
 
-    except Exception as e:
-        print(f"❌ Ошибка отправки уведомлений: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Ошибка отправки уведомлений")
 
 
+@_track_in_flight
 async def send_status_update_notification(order: dict):
     """Отправка уведомления пользователю об изменении статуса заказа"""
     try:
@@ -135,70 +121,22 @@ async def send_status_update_notification(order: dict):
         user_telegram_id = order.get('user_telegram_id')
 
         if not BOT_TOKEN:
-            print("⚠️ BOT_TOKEN не установлен, уведомление не отправлено")
+            logger.warning("BOT_TOKEN не установлен, уведомление не отправлено")
             return
 
         if not user_telegram_id:
-            print("⚠️ user_telegram_id не указан, уведомление не отправлено")
+            logger.warning("user_telegram_id не указан, уведомление не отправлено")
             return
 
         from telegram import Bot
-        bot = Bot(token=BOT_TOKEN)
-
-        # Статусы на русском
-        status_names = {
-            'pending': '🕐 Ожидает обработки',
-            'confirmed': '✅ Подтвержден',
-            'cooking': '👨‍🍳 Готовится',
-            'ready': '🎉 Готов к получению',
-            'delivered': '📦 Доставлен',
-            'cancelled': '❌ Отменен'
-        }
+        bot = Bot(token=BOT_TOKEN, base_url=TELEGRAM_API_URL)
 
         status = order.get('status', 'pending')
-        status_text = status_names.get(status, status)
-
-        items_text = ""
-        if order.get('items_data'):
-            for item_str in order['items_data'].split(','):
-                parts = item_str.split(':')
-                if len(parts) >= 4:
-                    product_name = parts[1]
-                    quantity = parts[2]
-                    items_text += f"  • {product_name} x{quantity}\n"
-
-        message = f"""
-📢 <b>Обновление статуса заказа</b>
-
-📋 <b>Заказ #{order['id']}</b>
-{status_text}
-
-🛒 <b>Состав:</b>
-{items_text}
-💰 <b>Итого:</b> {order['total_amount']} AED
-
-📍 <b>Адрес:</b> {order.get('customer_address', 'Не указан')}
-"""
 
-        # Дополнительная информация в зависимости от статуса
-        if status == 'confirmed':
-            message += "\n<b>Ваш заказ принят в работу!</b> Ожидайте начала приготовления."
-        elif status == 'cooking':
-            message += "\n<b>Ваш заказ готовится!</b> Скоро всё будет готово 👨‍🍳"
-        elif status == 'ready':
-            message += "\n<b>Ваш заказ готов!</b> Ожидайте доставку 🎉"
-        elif status == 'delivered':
-            message += "\n<b>Приятного аппетита!</b> Спасибо за заказ! 😊"
-        elif status == 'cancelled':
-            message += "\n<b>Заказ отменен.</b> Если у вас есть вопросы, свяжитесь с поддержкой."
-
-        await bot.send_message(
-            chat_id=user_telegram_id,
-            text=message,
-            parse_mode='HTML'
-        )
-        print(f"✅ Уведомление о статусе '{status}' отправлено пользователю {user_telegram_id}")
+        await _send(bot, 'status_update', user_telegram_id, split_message(render_order('status_update', order)))
+        logger.info("Уведомление о статусе отправлено пользователю",
+                    extra={'chat_id': user_telegram_id, 'status': status})
 
     except Exception as e:
-        print(f"❌ Ошибка отправки уведомления о статусе: {e}")
-        print(f"   Возможно, пользователь не написал боту /start")
+        # Возможно, пользователь не написал боту /start
+        logger.error("Ошибка отправки уведомления о статусе: %s", e)
@@ -4,5 +4,7 @@ API route modules
 from .products import router as products_router
 from .orders import router as orders_router
 from .frontend import router as frontend_router
+from .health import router as health_router
+from .metrics import router as metrics_router
 
-__all__ = ['products_router', 'orders_router', 'frontend_router']
+__all__ = ['products_router', 'orders_router', 'frontend_router', 'health_router', 'metrics_router']
@@ -96,6 +96,39 @@ async def get_app():
         background: rgba(255,255,255,0.9);
     }
 
+    .search-results {
+        background: rgba(255,255,255,0.95);
+        border-radius: 15px;
+        margin: -8px 0 20px;
+        overflow: hidden;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+        text-align: left;
+    }
+
+    .search-result {
+        display: flex;
+        justify-content: space-between;
+        gap: 12px;
+        padding: 12px 16px;
+        color: #333;
+        border-bottom: 1px solid #eee;
+        cursor: pointer;
+    }
+
+    .search-result:last-child {
+        border-bottom: none;
+    }
+
+    .search-result-price {
+        font-weight: 600;
+        white-space: nowrap;
+    }
+
+    .search-empty {
+        padding: 12px 16px;
+        color: #888;
+    }
+
     .icons-grid {
         display: grid;
         grid-template-columns: repeat(2, 1fr);
@@ -178,7 +211,22 @@ async def get_app():
                     type="text"
                     class="search-input"
                     placeholder="🔍 Найти блюдо..."
+                    @input="onSearch"
                 >
+                <div v-if="searchQuery.trim()" class="search-results">
+                    <div
+                        v-for="p in searchResults"
+                        :key="p.id"
+                        class="search-result"
+                        @click="openProduct(p)"
+                    >
+                        <span>{{ p.name }}</span>
+                        <span class="search-result-price">{{ p.price }} AED</span>
+                    </div>
+                    <div v-if="searchDone && searchResults.length === 0" class="search-empty">
+                        Ничего не найдено
+                    </div>
+                </div>
             </div>
 
             <div class="icons-grid">
@@ -209,6 +257,8 @@ async def get_app():
         createApp({
             setup() {
                 const searchQuery = ref('');
+                const searchResults = ref([]);
+                const searchDone = ref(false);
                 const categories = ref([
                     { name: "burger", label: "Бургеры", icon: "/static/stickers_animations/burger.json" },
                     { name: "pizza", label: "Пицца", icon: "/static/stickers_animations/pizza.json" },
@@ -224,7 +274,37 @@ async def get_app():
                     window.location.href = `/app/${cat.name}?q=${encodeURIComponent(searchQuery.value)}`;
                 };
 
-                return { searchQuery, categories, goToCategory };
+                // Поиск по мере ввода: запрос уходит, когда пользователь замер на 150 мс;
+                // ответ на устаревший запрос отбрасывается
+                let searchTimer = null;
+                let searchSeq = 0;
+                const onSearch = () => {
+                    clearTimeout(searchTimer);
+                    searchDone.value = false;
+                    const q = searchQuery.value.trim();
+                    if (!q) {
+                        searchResults.value = [];
+                        return;
+                    }
+                    searchTimer = setTimeout(async () => {
+                        const seq = ++searchSeq;
+                        try {
+                            const res = await fetch(`/api/products/search?q=${encodeURIComponent(q)}&limit=10`);
+                            const data = res.ok ? await res.json() : [];
+                            if (seq !== searchSeq) return;
+                            searchResults.value = data;
+                            searchDone.value = true;
+                        } catch (error) {
+                            console.error('Ошибка поиска:', error);
+                        }
+                    }, 150);
+                };
+
+                const openProduct = (product) => {
+                    window.location.href = `/app/${product.category}?q=${encodeURIComponent(product.name)}`;
+                };
+
+                return { searchQuery, searchResults, searchDone, categories, goToCategory, onSearch, openProduct };
             }
         }).mount('#app');
         </script>
@@ -351,6 +431,32 @@ async def get_app_category(category: str):
                 padding: 0 16px 100px 16px;
             }}
 
+            .ingredient-filter {{
+                display: flex;
+                flex-wrap: wrap;
+                gap: 8px;
+                padding: 0 16px 16px 16px;
+                align-items: center;
+                color: white;
+                font-size: 14px;
+            }}
+
+            .ingredient-chip {{
+                background: rgba(255,255,255,0.85);
+                color: #333;
+                border: none;
+                border-radius: 14px;
+                padding: 6px 12px;
+                font-size: 13px;
+                cursor: pointer;
+            }}
+
+            .ingredient-chip.excluded {{
+                background: #ff6b6b;
+                color: white;
+                text-decoration: line-through;
+            }}
+
             .product-card {{
                 background: rgba(255,255,255,0.95);
                 backdrop-filter: blur(10px);
@@ -709,8 +815,24 @@ async def get_app_category(category: str):
                 <h2>{{{{ categoryName }}}}</h2>
             </div>
 
+            <div v-if="facets.length > 1" class="ingredient-filter">
+                <span>Без:</span>
+                <button
+                    v-for="f in facets"
+                    :key="f.name"
+                    class="ingredient-chip"
+                    :class="{{ excluded: excluded.includes(f.name) }}"
+                    @click="toggleExclude(f.name)"
+                >
+                    {{{{ f.name }}}}
+                </button>
+            </div>
+
             <div class="products-container">
-                <div v-if="products.length === 0" style="text-align: center; padding: 40px; color: rgba(255,255,255,0.8);">
+                <div v-if="products.length === 0 && excluded.length > 0" style="text-align: center; padding: 40px; color: rgba(255,255,255,0.8);">
+                    <h3>Нет блюд без выбранных ингредиентов</h3>
+                </div>
+                <div v-if="products.length === 0 && excluded.length === 0" style="text-align: center; padding: 40px; color: rgba(255,255,255,0.8);">
                     <h3>🍽️ Пока нет блюд в этой категории</h3>
                     <p>Скоро здесь появятся вкусные предложения!</p>
                     <button class="back-btn" @click="goBack" style="margin-top: 20px;">← Вернуться к категориям</button>
@@ -923,12 +1045,22 @@ async def get_app_category(category: str):
                     orderError.value = null;
                 }};
 
+                // Один ключ на попытку оформления: повторная отправка (двойной тап,
+                // ретрай после обрыва сети) не создаст второй заказ
+                let orderIdempotencyKey = null;
+                const newIdempotencyKey = () => {{
+                    if (window.crypto?.randomUUID) return window.crypto.randomUUID();
+                    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+                }};
+
                 const backToCart = () => {{
+                    orderIdempotencyKey = null;
                     showCheckoutForm.value = false;
                     showCart.value = true;
                 }};
 
                 const cancelCheckout = () => {{
+                    orderIdempotencyKey = null;
                     showCheckoutForm.value = false;
                     customerInfo.value = {{ address: '' }};
                     orderSuccess.value = null;
@@ -940,6 +1072,7 @@ async def get_app_category(category: str):
 
                     isSubmitting.value = true;
                     orderError.value = null;
+                    if (!orderIdempotencyKey) orderIdempotencyKey = newIdempotencyKey();
 
                     try {{
                         // Получаем данные пользователя из Telegram WebApp
@@ -968,7 +1101,8 @@ async def get_app_category(category: str):
                         const response = await fetch('/api/orders', {{
                             method: 'POST',
                             headers: {{
-                                'Content-Type': 'application/json'
+                                'Content-Type': 'application/json',
+                                'Idempotency-Key': orderIdempotencyKey
                             }},
                             body: JSON.stringify(orderData)
                         }});
@@ -978,6 +1112,7 @@ async def get_app_category(category: str):
                         }}
 
                         const savedOrder = await response.json();
+                        orderIdempotencyKey = null;
 
                         // Показываем успешное сообщение
                         orderSuccess.value = savedOrder.id;
@@ -1027,17 +1162,95 @@ async def get_app_category(category: str):
                     window.location.href = '/app';
                 }};
 
-                const load = async () => {{
+                // Локальная копия меню: при повторном открытии с сервера приходят
+                // только изменения после сохраненной версии (/api/products/changes)
+                const CATALOG_KEY = 'homefood_catalog';
+
+                const readCatalog = () => {{
+                    try {{
+                        const saved = JSON.parse(localStorage.getItem(CATALOG_KEY));
+                        if (saved && typeof saved.version === 'number' && saved.products) return saved;
+                    }} catch (e) {{}}
+                    return {{ version: 0, products: {{}} }};
+                }};
+
+                const syncCatalog = async (catalog) => {{
+                    const res = await fetch(`/api/products/changes?since=${{catalog.version}}`);
+                    if (!res.ok) throw new Error('HTTP ' + res.status);
+                    const delta = await res.json();
+                    if (delta.reset) catalog.products = {{}};
+                    delta.products.forEach(p => {{ catalog.products[p.id] = p; }});
+                    delta.deleted.forEach(id => {{ delete catalog.products[id]; }});
+                    catalog.version = delta.version;
                     try {{
-                        const res = await fetch('/api/products?category={category}');
+                        localStorage.setItem(CATALOG_KEY, JSON.stringify(catalog));
+                    }} catch (e) {{
+                        console.warn('Меню не сохранено локально:', e);
+                    }}
+                    return catalog;
+                }};
+
+                const showCategory = (catalog) => {{
+                    const category = '{category}'.toLowerCase();
+                    products.value = Object.values(catalog.products)
+                        .filter(p => (p.category || '').toLowerCase() === category)
+                        .sort((a, b) => a.name.localeCompare(b.name));
+                }};
+
+                // Исключение ингредиентов (аллергены): фильтр считает сервер по битовым
+                // множествам каталога; фасеты - самые частые ингредиенты категории
+                const facets = ref([]);
+                const excluded = ref([]);
+                let localCatalog = null;
+
+                const loadFacets = async () => {{
+                    try {{
+                        const res = await fetch('/api/products/facets?category={category}');
+                        if (res.ok) facets.value = (await res.json()).ingredients.slice(0, 12);
+                    }} catch (error) {{
+                        console.error('Ошибка загрузки ингредиентов:', error);
+                    }}
+                }};
+
+                const toggleExclude = async (name) => {{
+                    excluded.value = excluded.value.includes(name)
+                        ? excluded.value.filter(item => item !== name)
+                        : [...excluded.value, name];
+                    if (excluded.value.length === 0 && localCatalog) {{
+                        showCategory(localCatalog);
+                        return;
+                    }}
+                    const requested = excluded.value.join(',');
+                    try {{
+                        const res = await fetch(`/api/products?category={category}&exclude=${{encodeURIComponent(requested)}}`);
                         const data = await res.json();
-                        products.value = data;
+                        // Ответ на устаревший набор исключений не показываем
+                        if (requested === excluded.value.join(',')) products.value = data;
+                    }} catch (error) {{
+                        console.error('Ошибка фильтра:', error);
+                    }}
+                }};
 
-                        if (data.length === 0) {{
-                            console.log('No products found for category: {category}');
-                        }}
+                const load = async () => {{
+                    loadFacets();
+                    const catalog = readCatalog();
+                    // Сохраненное меню показывается сразу, дельта применяется поверх
+                    if (catalog.version > 0) showCategory(catalog);
+                    try {{
+                        localCatalog = await syncCatalog(catalog);
+                        if (excluded.value.length === 0) showCategory(localCatalog);
                     }} catch (error) {{
-                        console.error('Ошибка загрузки:', error);
+                        console.error('Ошибка синхронизации меню:', error);
+                        try {{
+                            const res = await fetch('/api/products?category={category}');
+                            products.value = await res.json();
+                        }} catch (error) {{
+                            console.error('Ошибка загрузки:', error);
+                        }}
+                    }}
+
+                    if (products.value.length === 0) {{
+                        console.log('No products found for category: {category}');
                     }}
                 }};
 
@@ -1045,6 +1258,9 @@ async def get_app_category(category: str):
 
                 return {{
                     products,
+                    facets,
+                    excluded,
+                    toggleExclude,
                     quantities,
                     cart,
                     showCart,
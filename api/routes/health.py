@@ -0,0 +1,102 @@
+"""
+Health check routes
+/healthz - liveness: the process is up and serving, no I/O
+/readyz  - readiness: database, update queue, notifications, catalog; 503 when degraded
+
+The readiness result is cached for a few seconds, so frequent probes from the
+platform and uptime monitors cost one dictionary lookup.
+"""
+import asyncio
+import time
+from typing import Callable
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from api.notifications import notifications_in_flight
+from database import db
+from database.catalog import catalog_age
+
+router = APIRouter()
+
+# How long a readiness result is reused
+READINESS_TTL = 5.0
+
+# A database that does not answer SELECT 1 within this is treated as down
+DB_CHECK_TIMEOUT = 2.0
+
+# More notifications than this still being sent means Telegram is not keeping up
+MAX_NOTIFICATIONS_IN_FLIGHT = 200
+
+_NO_STORE = {'Cache-Control': 'no-store'}
+
+# name -> callable returning a dict; {'ok': False} marks the instance as degraded
+_checks = {}
+
+_cached = None  # (expires_at, status_code, body)
+_lock = asyncio.Lock()
+
+
+def register_check(name: str, check: Callable[[], dict]):
+    """Add a component to /readyz (e.g. the bot update queue, registered by start.py)"""
+    _checks[name] = check
+
+
+def _check_database() -> dict:
+    started = time.perf_counter()
+    db.execute_query("SELECT 1", fetch='one')
+    return {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+
+async def _readiness() -> tuple:
+    components = {}
+
+    try:
+        components['database'] = await asyncio.wait_for(
+            asyncio.to_thread(_check_database), timeout=DB_CHECK_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        components['database'] = {'ok': False, 'error': 'timeout'}
+    except Exception as e:
+        components['database'] = {'ok': False, 'error': type(e).__name__}
+    components['database']['connections'] = db.connection_stats()
+
+    in_flight = notifications_in_flight()
+    components['notifications'] = {
+        'ok': in_flight <= MAX_NOTIFICATIONS_IN_FLIGHT,
+        'in_flight': in_flight,
+    }
+
+    age = catalog_age()
+    # Not loaded yet is fine - the snapshot is built on the first request
+    components['catalog'] = {'ok': True, 'age_s': None if age is None else round(age)}
+
+    for name, check in _checks.items():
+        try:
+            components[name] = check()
+        except Exception as e:
+            components[name] = {'ok': False, 'error': type(e).__name__}
+
+    ready = all(component.get('ok', True) for component in components.values())
+    body = {'status': 'ok' if ready else 'degraded', 'checked_at': round(time.time()), **components}
+    return (200 if ready else 503), body
+
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness: answers as long as the event loop does"""
+    return JSONResponse({'status': 'ok'}, headers=_NO_STORE)
+
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness of the instance and its dependencies (cached for READINESS_TTL)"""
+    global _cached
+    if _cached is None or _cached[0] < time.monotonic():
+        # Concurrent probes wait for one check instead of each hitting the database
+        async with _lock:
+            if _cached is None or _cached[0] < time.monotonic():
+                status_code, body = await _readiness()
+                _cached = (time.monotonic() + READINESS_TTL, status_code, body)
+    _, status_code, body = _cached
+    return JSONResponse(body, status_code=status_code, headers=_NO_STORE)
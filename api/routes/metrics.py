@@ -0,0 +1,15 @@
+"""
+Metrics route
+/metrics - all process metrics in the Prometheus text format
+"""
+from fastapi import APIRouter, Response
+
+from monitoring.metrics import CONTENT_TYPE, render
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render(), media_type=CONTENT_TYPE)
@@ -1,19 +1,24 @@
 """
 Orders API routes
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header, Response
 from datetime import datetime
+import hashlib
 import uuid
 import asyncio
+from typing import Optional
 
 from api.models import Order
 from api.notifications import send_telegram_notifications, send_status_update_notification
-from database import db
-
-try:
-    from psycopg2.extras import RealDictCursor
-except ImportError:
-    RealDictCursor = None
+from database import db, get_order_by_id
+from database.events import publish, ORDER_CREATED, ORDER_DELETED
+from database.idempotency import (
+    reserve_key, complete_key, release_key, IdempotencyMismatch, IdempotencyInProgress,
+)
+from database.orders import (
+    ORDER_STATUSES, transition_order_status, allowed_transitions, get_status_history,
+    OrderNotFound, InvalidTransition, VersionConflict,
+)
 
 router = APIRouter()
 
@@ -23,7 +28,8 @@ get_db = db.get_connection
 
 def get_cursor(conn):
     """Get cursor with dict support for both SQLite and PostgreSQL"""
-    if db.use_postgres and RealDictCursor:
+    if db.use_postgres:
+        from psycopg2.extras import RealDictCursor
         return conn.cursor(cursor_factory=RealDictCursor)
     else:
         conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
@@ -46,21 +52,60 @@ def get_agg_func():
 
 
 @router.post("/api/orders", response_model=Order)
-async def create_order(order: Order):
+async def create_order(order: Order, response: Response,
+                       idempotency_key: Optional[str] = Header(None, max_length=100)):
+    """
+    Создать новый заказ
+    С заголовком Idempotency-Key повтор того же запроса (двойной тап, ретрай из плохой сети)
+    возвращает исходный ответ, не трогая продукты и уведомления
+    """
+    if not idempotency_key:
+        return await _create_order(order)
+
+    request_hash = hashlib.sha256(order.model_dump_json().encode()).hexdigest()
+    try:
+        stored = reserve_key(idempotency_key, request_hash)
+    except IdempotencyMismatch:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different order")
+    except IdempotencyInProgress:
+        raise HTTPException(status_code=409, detail="Order with this Idempotency-Key is being processed")
+
+    if stored is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return Order.model_validate_json(stored)
+
+    try:
+        created = await _create_order(order)
+    except Exception:
+        release_key(idempotency_key)
+        raise
+
+    complete_key(idempotency_key, created.model_dump_json())
+    return created
+
+
+async def _create_order(order: Order) -> Order:
     """Создать новый заказ в БД"""
     order_id = str(uuid.uuid4())[:8]  # Короткий ID
     created_at = datetime.now()
 
-    # Вычисляем общую сумму
-    total = 0
     with get_db() as conn:
         cursor = get_cursor(conn)
 
-        for item in order.items:
-            cursor.execute(fix_query('SELECT * FROM products WHERE id = ?'), (item.product_id,))
-            row = cursor.fetchone()
-            if row:
-                total += float(row['price']) * item.quantity
+        # Все продукты заказа одним запросом, а не SELECT на каждую позицию;
+        # удаленные из меню (active = false) заказать нельзя
+        product_ids = list(dict.fromkeys(item.product_id for item in order.items))
+        products = {}
+        if product_ids:
+            cursor.execute(
+                fix_query(f"SELECT id, name, price FROM products WHERE active AND id IN ({', '.join('?' * len(product_ids))})"),
+                tuple(product_ids)
+            )
+            products = {str(row['id']): dict(row) for row in cursor.fetchall()}
+
+        # Вычисляем общую сумму
+        items = [(item, products[item.product_id]) for item in order.items if item.product_id in products]
+        total = sum(float(product['price']) * item.quantity for item, product in items)
 
         # Сохраняем заказ
         cursor.execute(fix_query('''
@@ -79,23 +124,15 @@ async def create_order(order: Order):
             created_at.isoformat()
         ))
 
-        # Сохраняем элементы заказа с информацией о продукте и поваре
-        for item in order.items:
-            cursor.execute(fix_query('SELECT * FROM products WHERE id = ?'), (item.product_id,))
-            row = cursor.fetchone()
-            if row:
-                # Конвертируем Row в dict для безопасного доступа
-                row_dict = dict(row)
-                cursor.execute(fix_query('''
-                    INSERT INTO order_items (order_id, product_id, product_name, quantity, price)
-                    VALUES (?, ?, ?, ?, ?)
-                '''), (
-                    order_id,
-                    item.product_id,
-                    row_dict['name'],
-                    item.quantity,
-                    row_dict['price']
-                ))
+        # Сохраняем элементы заказа одним executemany
+        if items:
+            cursor.executemany(fix_query('''
+                INSERT INTO order_items (order_id, product_id, product_name, quantity, price)
+                VALUES (?, ?, ?, ?, ?)
+            '''), [
+                (order_id, item.product_id, product['name'], item.quantity, product['price'])
+                for item, product in items
+            ])
 
         conn.commit()
 
@@ -128,6 +165,8 @@ async def create_order(order: Order):
         cursor.execute(concat_query, (order_id,))
         full_order = dict(cursor.fetchone())
 
+    publish(ORDER_CREATED, order_id=order_id, user_id=order.user_telegram_id)
+
     order.id = order_id
     order.total_amount = total
     order.created_at = created_at.isoformat()
@@ -209,57 +248,55 @@ async def get_order(order_id: str):
 
 
 @router.put("/api/orders/{order_id}/status")
-async def update_order_status(order_id: str, status: str):
-    """Обновить статус заказа"""
-    valid_statuses = ['pending', 'confirmed', 'cooking', 'ready', 'delivered', 'cancelled']
-
-    if status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
-
-    with get_db() as conn:
-        cursor = get_cursor(conn)
-        cursor.execute(fix_query('UPDATE orders SET status = ? WHERE id = ?'), (status, order_id))
-
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Order not found")
-
-        conn.commit()
-
-        # Получаем данные заказа для уведомления
-        # Use STRING_AGG for PostgreSQL or GROUP_CONCAT for SQLite
-        if db.use_postgres:
-            concat_query = '''
-                SELECT o.*,
-                       STRING_AGG(
-                           oi.product_id || ':' || oi.product_name || ':' ||
-                           oi.quantity || ':' || oi.price || ':', ','
-                       ) as items_data
-                FROM orders o
-                LEFT JOIN order_items oi ON o.id = oi.order_id
-                WHERE o.id = %s
-                GROUP BY o.id
-            '''
-        else:
-            concat_query = '''
-                SELECT o.*,
-                       GROUP_CONCAT(
-                           oi.product_id || ':' || oi.product_name || ':' ||
-                           oi.quantity || ':' || oi.price || ':'
-                       ) as items_data
-                FROM orders o
-                LEFT JOIN order_items oi ON o.id = oi.order_id
-                WHERE o.id = ?
-                GROUP BY o.id
-            '''
-        cursor.execute(concat_query, (order_id,))
-        order = cursor.fetchone()
-
-    if order:
-        order_dict = dict(order)
-        # 🔥 Отправляем уведомление о смене статуса
-        asyncio.create_task(send_status_update_notification(order_dict))
-
-    return {"message": "Order status updated", "order_id": order_id, "status": status}
+async def update_order_status(order_id: str, status: str, version: Optional[int] = None):
+    """
+    Обновить статус заказа
+    version - версия заказа, которую видел клиент; если заказ успели изменить, вернется 409
+    """
+    if status not in ORDER_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {list(ORDER_STATUSES)}")
+
+    # Один UPDATE ... RETURNING; история статусов пишется триггером
+    try:
+        order = transition_order_status(order_id, status, expected_version=version)
+    except OrderNotFound:
+        raise HTTPException(status_code=404, detail="Order not found")
+    except VersionConflict as e:
+        # Уведомление уже отправил тот, кто успел первым
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Order already updated",
+                "status": e.order.get('status'),
+                "version": e.order.get('version'),
+            }
+        )
+    except InvalidTransition as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Cannot change status from {e.current} to {status}. "
+                   f"Allowed: {list(allowed_transitions(e.current))}"
+        )
+
+    # 🔥 Отправляем уведомление о смене статуса
+    asyncio.create_task(send_status_update_notification(order))
+
+    return {
+        "message": "Order status updated",
+        "order_id": order_id,
+        "status": status,
+        "version": order.get('version'),
+    }
+
+
+@router.get("/api/orders/{order_id}/history")
+async def get_order_history(order_id: str):
+    """История смены статусов заказа (для анализа времени в каждом статусе)"""
+    history = get_status_history(order_id)
+    if not history and not get_order_by_id(order_id):
+        # Заказы до миграции 0004 существуют, но истории у них нет
+        raise HTTPException(status_code=404, detail="Order not found")
+    return history
 
 
 @router.delete("/api/orders/{order_id}")
@@ -278,5 +315,6 @@ async def delete_order(order_id: str):
             raise HTTPException(status_code=404, detail="Order not found")
 
         conn.commit()
+        publish(ORDER_DELETED, order_id=order_id)
 
     return {"message": "Order deleted", "order_id": order_id}
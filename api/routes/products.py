@@ -1,65 +1,141 @@
 """
 Products API routes
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Response
 from typing import List, Optional
 import json
-from psycopg2.extras import RealDictCursor
+import logging
 
-from api.models import Product
+from api.models import CatalogChanges, Product, ProductFacets
 from database import db
+from database.catalog import get_catalog, get_catalog_changes
+from database.search import search_products
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # Compatibility wrapper for existing code
 get_db = db.get_connection
 
+# Search results filtered by ingredients are picked from this many best matches
+SEARCH_FILTER_POOL = 200
+
+# Encoded /api/products bodies per filter, valid for one catalog snapshot
+RESPONSE_CACHE_SIZE = 256
+_responses = {}
+_responses_catalog = None
+
+
+def _product(row) -> dict:
+    """Product row as returned by the API (ingredients parsed from JSON, NULL text fields as '')"""
+    product = dict(row)
+    product['id'] = str(product['id'])
+    product['price'] = float(product['price'])
+    for field in ('description', 'image', 'category'):
+        product[field] = product.get(field) or ''
+
+    # Обработка ingredients
+    if product.get('ingredients'):
+        try:
+            product['ingredients'] = json.loads(product['ingredients'])
+        except Exception as e:
+            logger.warning("Failed to parse ingredients of product %s: %s", product.get('id'), e)
+            product['ingredients'] = []
+    else:
+        product['ingredients'] = []
+
+    return product
+
+
+def _names(value: Optional[str]) -> list:
+    """Comma-separated ingredient names of include= / exclude="""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def _catalog_product(catalog, product: dict) -> dict:
+    """Snapshot product in the Product shape (ingredients parsed once at catalog load)"""
+    return {
+        'id': str(product['id']),
+        'name': product['name'],
+        'description': product.get('description') or '',
+        'price': float(product['price']),
+        'image': product.get('image') or '',
+        'category': product.get('category') or '',
+        'ingredients': catalog.ingredients[product['id']],
+    }
+
 
 @router.get("/api/products", response_model=List[Product])
-async def get_products(category: Optional[str] = None):
-    print(f"🔍 API request: category={category}")
-    print(f"🔗 Database: {'PostgreSQL' if db.use_postgres else 'SQLite'}")
-
-    with get_db() as conn:
-        # ВАЖНО: Для PostgreSQL используем RealDictCursor
-        if db.use_postgres:
-            from psycopg2.extras import RealDictCursor
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-        else:
-            cursor = conn.cursor()
-
-        if category:
-            if db.use_postgres:
-                query = "SELECT * FROM products WHERE LOWER(category) = LOWER(%s)"
-            else:
-                query = "SELECT * FROM products WHERE LOWER(category) = LOWER(?)"
-
-            cursor.execute(query, (category,))
-            print(f"📝 Query executed with category={category}")
-        else:
-            cursor.execute("SELECT * FROM products")
-            print(f"📝 Query: SELECT all products")
-
-        rows = cursor.fetchall()
-        print(f"📊 Found {len(rows)} products")
-
-        products = []
-        for row in rows:
-            product = dict(row)
-
-            print(f"  📦 Product: {product.get('id')} - {product.get('name')}")
-
-            # Обработка ingredients
-            if product.get('ingredients'):
-                try:
-                    product['ingredients'] = json.loads(product['ingredients'])
-                except Exception as e:
-                    print(f"  ⚠️ Failed to parse ingredients: {e}")
-                    product['ingredients'] = []
-            else:
-                product['ingredients'] = []
-
-            products.append(product)
-
-    print(f"✅ Returning {len(products)} products")
-    return products
+async def get_products(category: Optional[str] = None, include: Optional[str] = None,
+                       exclude: Optional[str] = None):
+    """
+    Menu from the in-memory catalog snapshot
+    include=a,b - only dishes with every listed ingredient; exclude=a,b - none of them (allergens)
+    """
+    global _responses_catalog
+    catalog = get_catalog()
+    if _responses_catalog is not catalog:
+        _responses.clear()
+        _responses_catalog = catalog
+
+    # The snapshot does not change between requests - the encoded body is reused as is
+    key = (category, include, exclude)
+    body = _responses.get(key)
+    if body is None:
+        selected = catalog.select(category, _names(include), _names(exclude))
+        products = [_catalog_product(catalog, product) for product in catalog.products_in(selected)]
+        body = json.dumps(products, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        if len(_responses) >= RESPONSE_CACHE_SIZE:
+            _responses.pop(next(iter(_responses)))
+        _responses[key] = body
+        logger.debug("Returning %d products", len(products), extra={'category': category})
+    return Response(content=body, media_type='application/json')
+
+
+@router.get("/api/products/facets", response_model=ProductFacets)
+async def get_product_facets(category: Optional[str] = None, include: Optional[str] = None,
+                             exclude: Optional[str] = None):
+    """Ingredient counts among the dishes matching the same filters as /api/products"""
+    catalog = get_catalog()
+    selected = catalog.select(category, _names(include), _names(exclude))
+    return {
+        'total': selected.bit_count(),
+        'ingredients': [{'name': name, 'count': count} for name, count in catalog.facets(selected)],
+    }
+
+
+@router.get("/api/products/changes", response_model=CatalogChanges)
+async def get_product_changes(since: int = 0):
+    """
+    Products changed and deleted after catalog version `since`
+    The Mini App keeps a local copy of the menu and only fetches this delta;
+    reset=true (first load, or a version the server no longer knows) means
+    `products` is the whole catalog and the local copy must be replaced.
+    """
+    changes = get_catalog_changes(since)
+    changes['products'] = [_product(row) for row in changes['products']]
+    logger.debug("Catalog changes since %d: %d changed, %d deleted", since,
+                  len(changes['products']), len(changes['deleted']), extra={'version': changes['version']})
+    return changes
+
+
+@router.get("/api/products/search", response_model=List[Product])
+async def search(q: str = Query('', max_length=100), limit: int = Query(20, ge=1, le=50),
+                 include: Optional[str] = None, exclude: Optional[str] = None):
+    """
+    Menu search by name, description and ingredients
+    Served from the in-memory index (database/search.py), typos and prefixes included;
+    include= / exclude= filter the results like /api/products
+    """
+    catalog = get_catalog()
+    if not include and not exclude:
+        rows = search_products(q, limit)
+    else:
+        include_mask = catalog.ingredient_mask(_names(include))
+        if include_mask is None:
+            return []
+        exclude_mask = catalog.ingredient_mask(_names(exclude), strict=False)
+        rows = [row for row in search_products(q, SEARCH_FILTER_POOL)
+                if catalog.matches(row['id'], include_mask, exclude_mask)][:limit]
+    return [_catalog_product(catalog, row) if row['id'] in catalog.ingredients else _product(row) for row in rows]
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Synthetic benchmark dataset
+Products, orders, order items, status histories and activity logs at a given
+scale (10k - 10M orders), written with bulk inserts. Deterministic for a given
+seed, so runs on different commits see the same data.
+
+The data is shaped like production rather than spread uniformly:
+- product popularity is Zipf-like: a few dishes take most of the orders
+- customers are skewed the same way (regulars and one-off buyers)
+- orders follow lunch / dinner peaks, busier weekends and a growth trend
+- orders still in progress are the newest ones; older orders are delivered or cancelled
+- every order has its full status history (pending -> ... -> final status) with realistic gaps,
+  and the activity log has the matching app opens, orders and admin status changes
+
+Used by benchmarks/hot_paths.py and benchmarks/webhook_load.py, and from the
+command line to fill a scratch database for index and query-plan testing:
+
+    python benchmarks/dataset.py --orders 1000000 --database-url postgresql://localhost/homefood_scale
+    python benchmarks/dataset.py --orders 100000 --sqlite /tmp/homefood_scale.db
+
+While loading, the order status triggers are switched off (the history is written
+directly), so never point it at a database that takes real orders.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.constants import CATEGORIES
+from database.orders import ORDER_STATUSES
+
+# Share of orders per status: most history is delivered, a few orders are in progress
+STATUS_WEIGHTS = {
+    'pending': 5, 'confirmed': 3, 'cooking': 4, 'ready': 2, 'delivered': 80, 'cancelled': 6,
+}
+FINAL_STATUSES = ('delivered', 'cancelled')
+
+# The user whose "My orders" the bot benchmarks open (also the most active customer)
+BENCH_USER_ID = 1000
+
+# Popularity of the n-th product / customer is proportional to 1 / n ** exponent
+PRODUCT_POPULARITY_EXPONENT = 1.1
+CUSTOMER_ACTIVITY_EXPONENT = 0.8
+
+# Orders per hour of the day (local time): lunch and dinner peaks, quiet nights
+HOUR_WEIGHTS = (1.0, 0.5, 0.3, 0.2, 0.2, 0.3, 0.8, 2, 3, 4, 6, 10, 14, 12, 7, 5, 5, 7, 11, 14, 12, 8, 4, 2)
+# Monday .. Sunday
+WEEKDAY_WEIGHTS = (0.9, 0.9, 0.95, 1.0, 1.2, 1.35, 1.25)
+# Orders on the last day of the period vs the first
+GROWTH = 2.0
+
+# The happy path; a cancelled order leaves it after one of the first four steps
+_FLOW = ('pending', 'confirmed', 'cooking', 'ready', 'delivered')
+# Minutes spent in the previous status before moving to this one (min, max)
+STATUS_MINUTES = {
+    'confirmed': (1, 15), 'cooking': (5, 30), 'ready': (15, 60), 'delivered': (10, 45), 'cancelled': (1, 60),
+}
+
+# Quantity of one order line: mostly single portions
+QUANTITY_WEIGHTS = {1: 60, 2: 25, 3: 10, 4: 5}
+
+# App opens (menu browsing) per order, on average
+APP_OPENS_PER_ORDER = 2.0
+
+ADDRESSES = (
+    'Al Reem Island', 'Khalifa City', 'Al Raha Beach', 'Yas Island', 'Saadiyat Island',
+    'Al Khalidiyah', 'Al Mushrif', 'Mohammed Bin Zayed City', 'Al Nahyan', 'Corniche',
+)
+
+_CHUNK = 1000
+# Orders generated and written per transaction
+_BATCH = 10_000
+
+
+def _chunks(rows: list):
+    for start in range(0, len(rows), _CHUNK):
+        yield rows[start:start + _CHUNK]
+
+
+def _zipf_cum_weights(count: int, exponent: float) -> list:
+    """Cumulative weights for rng.choices: index 0 is the most popular"""
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def _orders_per_day(orders: int, start: datetime.datetime, days: int) -> list:
+    """Split orders over days by weekday and growth; the counts add up to orders exactly"""
+    weights = [
+        WEEKDAY_WEIGHTS[(start + datetime.timedelta(days=day)).weekday()]
+        * (1 + (GROWTH - 1) * day / max(days - 1, 1))
+        for day in range(days)
+    ]
+    total = sum(weights)
+    bounds = [round(cumulative / total * orders) for cumulative in itertools.accumulate(weights)]
+    return [bound - previous for previous, bound in zip([0] + bounds, bounds)]
+
+
+def _timestamp(value: datetime.datetime) -> str:
+    # The format CURRENT_TIMESTAMP gives new orders
+    return value.isoformat(sep=' ', timespec='seconds')
+
+
+def _status_path(final: str, rng: random.Random) -> tuple:
+    if final == 'cancelled':
+        return _FLOW[:rng.randint(1, 4)] + ('cancelled',)
+    return _FLOW[:_FLOW.index(final) + 1]
+
+
+def _insert(cursor, db, table: str, columns: tuple, rows: list):
+    """Multi-row INSERTs (execute_values) on PostgreSQL, executemany on SQLite"""
+    if not rows:
+        return
+    if db.use_postgres:
+        from psycopg2.extras import execute_values
+        execute_values(cursor, f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s", rows, page_size=_CHUNK)
+    else:
+        placeholders = ', '.join(['?'] * len(columns))
+        for chunk in _chunks(rows):
+            cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", chunk)
+
+
+@contextmanager
+def _status_triggers_disabled(conn, db):
+    """The history is written directly - the orders triggers would add a second one"""
+    cursor = conn.cursor()
+    if db.use_postgres:
+        cursor.execute("ALTER TABLE orders DISABLE TRIGGER USER")
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.rollback()
+            cursor.execute("ALTER TABLE orders ENABLE TRIGGER USER")
+            conn.commit()
+    else:
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'orders'")
+        triggers = [tuple(row) for row in cursor.fetchall()]
+        for name, _ in triggers:
+            cursor.execute(f"DROP TRIGGER {name}")
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.rollback()
+            for _, sql in triggers:
+                cursor.execute(sql)
+            conn.commit()
+
+
+def _next_order_number(cursor, db) -> int:
+    """Number after the last seeded order id, so a second run adds orders instead of clashing"""
+    pattern = "id ~ '^b[0-9]{7}$'" if db.use_postgres else "id GLOB 'b[0-9][0-9][0-9][0-9][0-9][0-9][0-9]'"
+    cursor.execute(f"SELECT MAX(id) FROM orders WHERE {pattern}")
+    last = cursor.fetchone()[0]
+    return int(last[1:]) + 1 if last else 0
+
+
+def _product_rows(products: int, rng: random.Random) -> list:
+    categories = [key for key, _ in CATEGORIES]
+    return [
+        (
+            f"bench-{i}",
+            f"Блюдо {i}",
+            f"Описание блюда {i}",
+            round(rng.uniform(10, 120), 2),
+            f"https://example.com/{i}.jpg",
+            categories[i % len(categories)],
+            json.dumps([f"ингредиент {n}" for n in range(rng.randint(2, 6))], ensure_ascii=False),
+        )
+        for i in range(products)
+    ]
+
+
+def seed(db, products: int = 50, orders: int = 1000, items_per_order: int = 3,
+         users: int = 200, seed: int = 42, days: int = 90, history: bool = True,
+         activity: bool = True, start: datetime.datetime = datetime.datetime(2026, 1, 1),
+         progress: bool = False) -> dict:
+    """
+    Insert the dataset into an initialized database; returns row counts
+    Order ids are "b0000000", "b0000001", ... in creation order, continuing after
+    the orders already in the database
+    """
+    rng = random.Random(seed)
+    placeholder = db.get_placeholder()
+
+    product_rows = _product_rows(products, rng)
+    # Which dishes are popular does not follow their ids
+    by_popularity = product_rows[:]
+    rng.shuffle(by_popularity)
+    product_weights = _zipf_cum_weights(len(by_popularity), PRODUCT_POPULARITY_EXPONENT)
+    customer_weights = _zipf_cum_weights(users, CUSTOMER_ACTIVITY_EXPONENT)
+    quantities, quantity_weights = list(QUANTITY_WEIGHTS), list(QUANTITY_WEIGHTS.values())
+    hours = range(24)
+
+    # Orders still in progress are the newest ones
+    open_statuses = [status for status in ORDER_STATUSES if status not in FINAL_STATUSES]
+    open_share = sum(STATUS_WEIGHTS[status] for status in open_statuses) / sum(STATUS_WEIGHTS.values())
+    first_open = orders - round(orders * open_share)
+    open_weights = [STATUS_WEIGHTS[status] for status in open_statuses]
+    final_weights = [STATUS_WEIGHTS[status] for status in FINAL_STATUSES]
+
+    counts = {'products': len(product_rows), 'orders': 0, 'order_items': 0,
+              'order_status_history': 0, 'activity_moderation': 0}
+    order_rows, item_rows, history_rows, activity_rows = [], [], [], []
+    started = time.perf_counter()
+
+    def flush(cursor, conn):
+        if not order_rows:
+            return
+        _insert(cursor, db, 'orders', ('id', 'customer_name', 'customer_phone', 'customer_address',
+                                       'customer_telegram', 'user_telegram_id', 'total_amount', 'status',
+                                       'created_at', 'version'), order_rows)
+        _insert(cursor, db, 'order_items', ('order_id', 'product_id', 'product_name', 'quantity', 'price'),
+                item_rows)
+        _insert(cursor, db, 'order_status_history', ('order_id', 'from_status', 'to_status', 'changed_at'),
+                history_rows)
+        _insert(cursor, db, 'activity_moderation', ('user_id', 'username', 'first_name', 'last_name',
+                                                    'action_type', 'details', 'timestamp'), activity_rows)
+        conn.commit()
+        counts['orders'] += len(order_rows)
+        counts['order_items'] += len(item_rows)
+        counts['order_status_history'] += len(history_rows)
+        counts['activity_moderation'] += len(activity_rows)
+        for rows in (order_rows, item_rows, history_rows, activity_rows):
+            rows.clear()
+        if progress:
+            elapsed = time.perf_counter() - started
+            print(f"  {counts['orders']:>10} orders  {counts['orders'] / elapsed:>8.0f}/s", file=sys.stderr)
+
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        # Bulk load: durability of each batch does not matter
+        cursor.execute("SET synchronous_commit = off" if db.use_postgres else "PRAGMA synchronous = OFF")
+        cursor.executemany(
+            f"INSERT INTO products (id, name, description, price, image, category, ingredients) "
+            f"VALUES ({', '.join([placeholder] * 7)}) ON CONFLICT (id) DO NOTHING",
+            product_rows
+        )
+        conn.commit()
+
+        with _status_triggers_disabled(conn, db) if history else nullcontext():
+            order_number = _next_order_number(cursor, db)
+            first_open += order_number
+            for day, day_orders in enumerate(_orders_per_day(orders, start, days)):
+                midnight = start + datetime.timedelta(days=day)
+                times = sorted(
+                    midnight + datetime.timedelta(hours=hour, seconds=rng.randrange(3600))
+                    for hour in rng.choices(hours, HOUR_WEIGHTS, k=day_orders)
+                )
+                for created_at in times:
+                    order_id = f"b{order_number:07d}"
+                    if order_number >= first_open:
+                        status = rng.choices(open_statuses, open_weights)[0]
+                    else:
+                        status = rng.choices(FINAL_STATUSES, final_weights)[0]
+                    order_number += 1
+
+                    user_id = BENCH_USER_ID + rng.choices(range(users), cum_weights=customer_weights)[0]
+                    lines = [
+                        (rng.choices(by_popularity, cum_weights=product_weights)[0],
+                         rng.choices(quantities, quantity_weights)[0])
+                        for _ in range(max(1, int(rng.expovariate(1 / items_per_order))))
+                    ]
+                    total = round(sum(product[3] * quantity for product, quantity in lines), 2)
+                    path = _status_path(status, rng) if history else (status,)
+
+                    order_rows.append((
+                        order_id, f"Клиент {user_id}", f"+971500{user_id:06d}", rng.choice(ADDRESSES), None,
+                        user_id, total, status, _timestamp(created_at), len(path),
+                    ))
+                    item_rows.extend(
+                        (order_id, product[0], product[1], quantity, product[3]) for product, quantity in lines
+                    )
+
+                    if history:
+                        changed_at = created_at
+                        previous = None
+                        for step in path:
+                            if previous is not None:
+                                changed_at += datetime.timedelta(minutes=rng.uniform(*STATUS_MINUTES[step]))
+                            history_rows.append((order_id, previous, step, _timestamp(changed_at)))
+                            if activity and previous is not None:
+                                activity_rows.append((
+                                    str(rng.randint(1, 3)), 'admin', 'Admin', None, 'order_status',
+                                    # JSON by hand: json.dumps is a tenth of the run at scale
+                                    f'{{"order_id": "{order_id}", "from": "{previous}", "to": "{step}"}}',
+                                    _timestamp(changed_at),
+                                ))
+                            previous = step
+
+                    if activity:
+                        for _ in range(int(rng.expovariate(1 / APP_OPENS_PER_ORDER))):
+                            opened_at = created_at - datetime.timedelta(minutes=rng.uniform(1, 24 * 60))
+                            activity_rows.append((str(user_id), None, f"Клиент {user_id}", None, 'app_opened',
+                                                  None, _timestamp(opened_at)))
+                        activity_rows.append((
+                            str(user_id), None, f"Клиент {user_id}", None, 'order_created',
+                            f'{{"order_id": "{order_id}", "total": {total}}}', _timestamp(created_at),
+                        ))
+
+                    if len(order_rows) >= _BATCH:
+                        flush(cursor, conn)
+            flush(cursor, conn)
+
+        # Fresh statistics, so query plans match the data
+        cursor.execute("ANALYZE")
+        conn.commit()
+
+    return counts
+
+
+def clear(db):
+    """Remove all orders and activity (scratch databases are reused between runs)"""
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        for table in ('order_status_history', 'order_items', 'orders', 'idempotency_keys', 'activity_moderation'):
+            cursor.execute(f"DELETE FROM {table}")
+        cursor.execute("DELETE FROM products WHERE id LIKE 'bench-%'")
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=10_000)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--users', type=int, help='customers (default: orders / 20)')
+    parser.add_argument('--items-per-order', type=int, default=3)
+    parser.add_argument('--days', type=int, default=365, help='period the orders are spread over')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-history', action='store_true', help='only the initial status row per order')
+    parser.add_argument('--no-activity', action='store_true', help='skip the activity log')
+    parser.add_argument('--database-url', help='scratch PostgreSQL database')
+    parser.add_argument('--sqlite', default='homefood_scale.db', help='SQLite file (without --database-url)')
+    parser.add_argument('--keep', action='store_true', help='add to existing orders instead of clearing them')
+    args = parser.parse_args()
+
+    # Configuration is read at import time
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ.pop('DATABASE_URL', None)
+    from database import db
+
+    if not db.use_postgres:
+        db.db_path = args.sqlite
+    db.initialize()
+    if not args.keep:
+        clear(db)
+
+    started = time.perf_counter()
+    counts = seed(db, args.products, args.orders, args.items_per_order, args.users or max(200, args.orders // 20),
+                  args.seed, days=args.days, history=not args.no_history, activity=not args.no_activity,
+                  progress=True)
+    target = 'PostgreSQL' if db.use_postgres else args.sqlite
+    print(f"{json.dumps(counts)} -> {target} in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Hot-path benchmarks
+
+Seeds a synthetic database and measures, in-process (no network, no uvicorn):
+- GET /api/products (plain and with ingredient filters), /api/products/facets, /api/products/search
+- GET /api/orders, POST /api/orders
+- POST /webhook/{token} (parse + enqueue, the queue is drained by a no-op consumer)
+- button_callback routes (CallbackRouter.dispatch with stand-in Telegram objects)
+- with --telegram-stub: order notification fan-out to --admins chats through the local
+  Bot API stand-in (benchmarks/telegram_stub.py); POST /api/orders then notifies too.
+  Each benchmark waits for its notifications before the next one starts (drain_seconds);
+  failed sends (homefood_notification_failures_total) are counted as errors
+
+Results are written as JSON (one file per commit by default) and can be compared
+with an earlier run.
+
+Usage:
+    python benchmarks/hot_paths.py                            # SQLite, default scale
+    python benchmarks/hot_paths.py --orders 100000 --requests 2000 --concurrency 16
+    python benchmarks/hot_paths.py --database-url postgresql://localhost/homefood_bench
+    python benchmarks/hot_paths.py --telegram-stub --stub-latency-ms 40 --admins 5
+    python benchmarks/hot_paths.py --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_TOKEN = '123456:bench'
+ADMIN_ID = 1
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def _percentile(samples: list, share: float) -> float:
+    index = min(len(samples) - 1, int(round(share * (len(samples) - 1))))
+    return samples[index]
+
+
+async def wait_notifications(poll: float = 0.005) -> float:
+    """Wait for background notification tasks to finish; returns seconds waited"""
+    from api.notifications import notifications_in_flight
+    started = time.perf_counter()
+    while notifications_in_flight():
+        await asyncio.sleep(poll)
+    return time.perf_counter() - started
+
+
+def notification_failures() -> float:
+    """Failed notification sends so far (homefood_notification_failures_total, all kinds)"""
+    from api.notifications import SEND_FAILURES
+    return sum(value for _, _, value in SEND_FAILURES.samples())
+
+
+async def measure(name: str, call, requests: int, concurrency: int) -> dict:
+    """
+    Run call() requests times from concurrency workers; call returns True on success
+    Notifications started by the calls (POST /api/orders) are waited for before returning:
+    the wait is reported as drain_seconds, failed sends are counted as errors
+    """
+    # Warm-up (caches, prepared statements, lazy imports) is not recorded
+    for _ in range(min(20, requests)):
+        await call()
+    await wait_notifications()
+    failures_before = notification_failures()
+
+    durations = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                ok = await call()
+            except Exception:
+                ok = False
+            durations.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_started
+    # Left running, notification tasks would be measured as part of the next scenario
+    drain = await wait_notifications()
+    failed_sends = int(notification_failures() - failures_before)
+
+    durations.sort()
+    return {
+        'name': name,
+        'requests': len(durations),
+        'concurrency': concurrency,
+        'errors': errors + failed_sends,
+        'notification_failures': failed_sends,
+        'seconds': round(wall, 3),
+        'drain_seconds': round(drain, 3),
+        'rps': round(len(durations) / wall, 1),
+        'p50_ms': round(_percentile(durations, 0.50) * 1000, 3),
+        'p95_ms': round(_percentile(durations, 0.95) * 1000, 3),
+        'p99_ms': round(_percentile(durations, 0.99) * 1000, 3),
+    }
+
+
+# ===== STAND-INS FOR TELEGRAM OBJECTS =====
+
+class _User:
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+class _Message:
+    chat_id = ADMIN_ID
+
+    async def reply_text(self, *args, **kwargs):
+        return None
+
+
+class _Query:
+    """The part of CallbackQuery the handlers use; Bot API calls are no-ops"""
+
+    def __init__(self, data: str, user_id: int):
+        self.data = data
+        self.from_user = _User(user_id)
+        self.message = _Message()
+
+    async def answer(self, *args, **kwargs):
+        return True
+
+    async def edit_message_text(self, *args, **kwargs):
+        return None
+
+
+class _Update:
+    def __init__(self, query: _Query):
+        self.callback_query = query
+        self.effective_user = query.from_user
+
+
+# ===== SCENARIOS =====
+
+async def run_benchmarks(args) -> list:
+    import httpx
+
+    import start
+    from benchmarks.dataset import BENCH_USER_ID
+    from bot.callback_data import ORDER_DETAIL
+    from bot.handlers.callbacks import router
+
+    # The webhook needs an Application; it is never initialized, so nothing goes to Telegram
+    import importlib.util
+    spec = importlib.util.spec_from_file_location('bot_app', os.path.join(ROOT, 'bot.py'))
+    bot_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bot_module)
+    start.bot_application = bot_module.create_application()
+    queue = start.bot_application.update_queue
+
+    async def drain():
+        while True:
+            await queue.get()
+
+    drainer = asyncio.create_task(drain())
+
+    if not args.telegram_stub:
+        # Order notifications would call the real Bot API - without a token they are skipped
+        os.environ.pop('BOT_TOKEN', None)
+    # Every press is measured, not collapsed into the first one
+    router.debounce = 0
+
+    transport = httpx.ASGITransport(app=start.fastapi_app)
+    client = httpx.AsyncClient(transport=transport, base_url='http://bench')
+
+    async def get(path):
+        return (await client.get(path)).status_code == 200
+
+    order_body = {
+        'customer_name': 'Bench', 'customer_phone': '+971500000000', 'customer_address': 'Abu Dhabi',
+        'user_telegram_id': BENCH_USER_ID,
+        'items': [{'product_id': f'bench-{i}', 'quantity': 1 + i % 3} for i in range(3)],
+    }
+
+    # Prefixes, typos and multi-word queries; the index caches answers, so queries rotate
+    search_queries = itertools.cycle(['блюдо', 'блюдо 12', 'блдо', 'описание 7', 'ингредиент 3', 'ингридиент'])
+
+    async def search():
+        return (await client.get('/api/products/search', params={'q': next(search_queries)})).status_code == 200
+
+    async def post_order():
+        return (await client.post('/api/orders', json=order_body)).status_code == 200
+
+    update_ids = iter(range(1, 10 ** 9))
+
+    async def post_webhook():
+        update_id = next(update_ids)
+        update = {
+            'update_id': update_id,
+            'callback_query': {
+                'id': str(update_id), 'chat_instance': '1', 'data': 'orders_all',
+                'from': {'id': ADMIN_ID, 'is_bot': False, 'first_name': 'Admin'},
+                'message': {'message_id': 1, 'date': 0, 'chat': {'id': ADMIN_ID, 'type': 'private'}},
+            },
+        }
+        response = await client.post(f'/webhook/{BENCH_TOKEN}', json=update)
+        return response.status_code == 200 and response.json().get('ok')
+
+    def press(data: str, user_id: int = ADMIN_ID):
+        async def call():
+            await router.dispatch(_Update(_Query(data, user_id)), None)
+            return True
+        return call
+
+    async def notify_new_order():
+        await send_telegram_notifications(sample_order)
+        return True
+
+    async def notify_status():
+        await send_status_update_notification(sample_order)
+        return True
+
+    from api.notifications import send_telegram_notifications, send_status_update_notification
+    from database import db
+    sample_order = db.execute_query(
+        f"SELECT o.*, {db.get_items_aggregate()} as items_data FROM orders o "
+        f"LEFT JOIN order_items oi ON o.id = oi.order_id WHERE o.id = {db.get_placeholder()} GROUP BY o.id",
+        ('b0000001',), fetch='one'
+    )
+
+    scenarios = [
+        ('GET /api/products', lambda: get('/api/products')),
+        ('GET /api/products?exclude=', lambda: get('/api/products?category=soup&exclude=ингредиент 1,ингредиент 4')),
+        ('GET /api/products/facets', lambda: get('/api/products/facets?exclude=ингредиент 2')),
+        ('GET /api/products/search', search),
+        ('GET /api/orders', lambda: get('/api/orders')),
+        ('POST /api/orders', post_order),
+        ('POST /webhook/{token}', post_webhook),
+        ('callback orders_all', press('orders_all')),
+        ('callback orders_pending', press('orders_pending')),
+        ('callback order_detail', press(ORDER_DETAIL.encode('b0000001'))),
+        ('callback my_orders', press('my_orders', BENCH_USER_ID)),
+        ('callback stats', press('stats')),
+        ('callback list_products', press('list_products')),
+    ]
+    if args.telegram_stub:
+        scenarios += [
+            (f'notify new order ({args.admins} admins)', notify_new_order),
+            ('notify status update', notify_status),
+        ]
+
+    results = []
+    try:
+        for name, call in scenarios:
+            if args.only and not any(part in name for part in args.only):
+                continue
+            # Listing every order is O(orders) per request - fewer requests at large scale
+            requests = args.requests if name != 'GET /api/orders' else max(10, args.requests // 10)
+            result = await measure(name, call, requests, args.concurrency)
+            results.append(result)
+            print(f"{name:<28}{result['rps']:>10.1f} rps  p50 {result['p50_ms']:>8.2f} ms  "
+                  f"p95 {result['p95_ms']:>8.2f} ms  errors {result['errors']}"
+                  + (f"  notifications drained in {result['drain_seconds']:.2f} s" if result['drain_seconds'] else ''),
+                  file=sys.stderr)
+    finally:
+        drainer.cancel()
+        await client.aclose()
+    return results
+
+
+def compare(results: list, baseline_path: str):
+    """Print rps / p95 change per benchmark against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    print(f"\n{'benchmark':<28}{'rps':>12}{'p95':>12}   vs {baseline_path}")
+    for result in results:
+        before = baseline.get(result['name'])
+        if not before:
+            continue
+        rps = (result['rps'] / before['rps'] - 1) * 100 if before['rps'] else 0
+        p95 = (result['p95_ms'] / before['p95_ms'] - 1) * 100 if before['p95_ms'] else 0
+        print(f"{result['name']:<28}{rps:>+11.1f}%{p95:>+11.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--items-per-order', type=int, default=3)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=500, help='requests per benchmark')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--only', nargs='*', help='run benchmarks whose name contains any of these')
+    parser.add_argument('--database-url', help='scratch PostgreSQL database (its orders are deleted)')
+    parser.add_argument('--telegram-stub', action='store_true', help='send notifications to a local Bot API stand-in')
+    parser.add_argument('--stub-latency-ms', type=float, default=30.0, help='Bot API stand-in latency per call')
+    parser.add_argument('--admins', type=int, default=3, help='admin chats notified of each order')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='homefood-bench-')
+    os.symlink(os.path.join(ROOT, 'static'), os.path.join(workdir, 'static'))
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+
+    # Configuration is read at import time, so it is set before importing the app
+    os.environ['BOT_TOKEN'] = BENCH_TOKEN
+    os.environ['ADMIN_IDS'] = ','.join(str(ADMIN_ID + i) for i in range(max(1, args.admins)))
+    os.environ.setdefault('LOG_LEVEL', 'ERROR')
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ.pop('DATABASE_URL', None)
+
+    stub = None
+    if args.telegram_stub:
+        from benchmarks.telegram_stub import StubConfig, run_in_thread
+        stub, os.environ['TELEGRAM_API_URL'] = run_in_thread(StubConfig(latency_ms=args.stub_latency_ms, seed=1))
+
+    from benchmarks import dataset
+    from database import db
+    from monitoring.log import setup_logging
+
+    setup_logging()
+    db.initialize()
+    if db.use_postgres:
+        dataset.clear(db)
+    seeded_at = time.perf_counter()
+    counts = dataset.seed(db, args.products, args.orders, args.items_per_order, args.users)
+    print(f"Seeded {counts} in {time.perf_counter() - seeded_at:.1f} s", file=sys.stderr)
+
+    results = asyncio.run(run_benchmarks(args))
+
+    report = {
+        'commit': _git_commit(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'database': 'postgresql' if db.use_postgres else 'sqlite',
+        'scale': counts,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'results': results,
+    }
+    if stub:
+        report['telegram_stub'] = stub.stats()
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Results: {output}", file=sys.stderr)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
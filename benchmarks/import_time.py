@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check
+
+Imports each module in a fresh interpreter with `python -X importtime`, takes the
+best of several runs and compares the cumulative time with its budget. Also checks
+that importing does not pull in heavy optional dependencies or touch the database.
+
+Usage:
+    python benchmarks/import_time.py            # table, exit code 1 if over budget
+    python benchmarks/import_time.py --runs 5 --json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> cumulative import budget, ms
+BUDGETS = {
+    'database': 40,
+    'bot.config': 60,
+    'bot.rendering': 150,
+    'api.routes': 1000,
+    'main': 1200,
+    'bot.handlers': 1200,
+}
+
+# module -> modules it must not import (only needed conditionally)
+FORBIDDEN = {
+    'database': ('psycopg2', 'telegram'),
+    'bot.config': ('psycopg2', 'telegram'),
+    'api.routes': ('psycopg2', 'telegram'),
+    'main': ('psycopg2', 'telegram'),
+}
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def measure(module: str, workdir: str) -> dict:
+    """Import module once; returns cumulative ms and the set of imported modules"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop('DATABASE_URL', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.add(name)
+        if name == module:
+            cumulative = int(match.group(2)) / 1000
+    return {'ms': cumulative, 'imported': imported}
+
+
+def run(runs: int) -> list:
+    results = []
+    for module, budget in BUDGETS.items():
+        # Fresh directory (plus static/ for main): importing must not create the SQLite file
+        with tempfile.TemporaryDirectory() as workdir:
+            os.symlink(os.path.join(ROOT, 'static'), os.path.join(workdir, 'static'))
+            samples = [measure(module, workdir) for _ in range(runs)]
+            touched_db = os.path.exists(os.path.join(workdir, 'homefood.db'))
+
+        best = min(sample['ms'] for sample in samples)
+        leaked = sorted(
+            name for name in FORBIDDEN.get(module, ())
+            if any(name in sample['imported'] for sample in samples)
+        )
+        results.append({
+            'module': module,
+            'ms': round(best, 1),
+            'budget_ms': budget,
+            'forbidden_imports': leaked,
+            'touched_db': touched_db,
+            'ok': best <= budget and not leaked and not touched_db,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='imports per module (best is reported)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.runs)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'module':<16}{'ms':>10}{'budget':>10}  status")
+        for r in results:
+            problems = []
+            if r['ms'] > r['budget_ms']:
+                problems.append('over budget')
+            if r['forbidden_imports']:
+                problems.append('imports ' + ', '.join(r['forbidden_imports']))
+            if r['touched_db']:
+                problems.append('opened the database')
+            status = '✅' if r['ok'] else '❌ ' + '; '.join(problems)
+            print(f"{r['module']:<16}{r['ms']:>10.1f}{r['budget_ms']:>10}  {status}")
+
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
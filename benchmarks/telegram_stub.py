@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Local Telegram Bot API stand-in
+
+Answers the Bot API methods the bot and the notifier use (getMe, sendMessage,
+editMessageText, answerCallbackQuery, setWebhook, deleteWebhook, ...) with
+configurable latency, 429 "retry after" responses and injected errors, so
+notifications and update handling can be load-tested with no network.
+
+Point the app at it with TELEGRAM_API_URL:
+    python benchmarks/telegram_stub.py --port 8081 --latency-ms 40 --rate-limit 0.02
+    TELEGRAM_API_URL=http://127.0.0.1:8081/bot python start.py
+
+Control endpoints: GET /_stub/stats, GET /_stub/messages, POST /_stub/config, POST /_stub/reset
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from collections import Counter, deque
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'HomeFood Stub', 'username': 'homefood_stub_bot'}
+
+
+class StubConfig:
+    """Behaviour of the stand-in; can be changed at runtime via POST /_stub/config"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, rate_limit: float = 0.0,
+                 retry_after: int = 1, error_rate: float = 0.0, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # Share of calls answered with 429 / with a 400 error
+        self.rate_limit = rate_limit
+        # Telegram never asks for less than a second (python-telegram-bot ignores retry_after=0)
+        self.retry_after = max(1, retry_after)
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+    def update(self, values: dict):
+        for key in ('latency_ms', 'jitter_ms', 'rate_limit', 'retry_after', 'error_rate'):
+            if key in values:
+                setattr(self, key, type(getattr(self, key))(values[key]))
+        self.retry_after = max(1, self.retry_after)
+
+    def as_dict(self) -> dict:
+        return {key: getattr(self, key) for key in ('latency_ms', 'jitter_ms', 'rate_limit', 'retry_after', 'error_rate')}
+
+
+class TelegramStub:
+    """The stand-in server state and its FastAPI app"""
+
+    def __init__(self, config: StubConfig = None):
+        self.config = config or StubConfig()
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self.errors = Counter()
+        self.messages = deque(maxlen=1000)
+        self._message_ids = iter(range(1, 10 ** 12))
+        self.app = self._build_app()
+
+    def reset(self):
+        self.calls.clear()
+        self.rate_limited.clear()
+        self.errors.clear()
+        self.messages.clear()
+
+    def stats(self) -> dict:
+        return {
+            'calls': dict(self.calls),
+            'rate_limited': dict(self.rate_limited),
+            'errors': dict(self.errors),
+            'config': self.config.as_dict(),
+        }
+
+    # ===== BOT API METHODS =====
+
+    def _message(self, params: dict) -> dict:
+        chat_id = int(params.get('chat_id') or 0)
+        message = {
+            'message_id': int(params.get('message_id') or next(self._message_ids)),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            'text': params.get('text', ''),
+        }
+        self.messages.append({'chat_id': chat_id, 'text': message['text'], 'at': time.time()})
+        return message
+
+    def _result(self, method: str, params: dict):
+        if method == 'getMe':
+            return BOT_USER
+        if method in ('sendMessage', 'sendPhoto'):
+            return self._message(params)
+        if method in ('editMessageText', 'editMessageReplyMarkup', 'editMessageCaption'):
+            return True if params.get('inline_message_id') else self._message(params)
+        if method == 'getWebhookInfo':
+            return {'url': '', 'has_custom_certificate': False, 'pending_update_count': 0}
+        if method == 'getUpdates':
+            return []
+        # answerCallbackQuery, setWebhook, deleteWebhook, setMyCommands, deleteMessage, ...
+        return True
+
+    async def handle(self, method: str, request: Request) -> JSONResponse:
+        self.calls[method] += 1
+        params = await _params(request)
+
+        config = self.config
+        delay = config.latency_ms + config.random.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        roll = config.random.random()
+        if roll < config.rate_limit:
+            self.rate_limited[method] += 1
+            return JSONResponse({
+                'ok': False, 'error_code': 429,
+                'description': f'Too Many Requests: retry after {config.retry_after}',
+                'parameters': {'retry_after': config.retry_after},
+            }, status_code=429)
+        if roll < config.rate_limit + config.error_rate:
+            self.errors[method] += 1
+            return JSONResponse({
+                'ok': False, 'error_code': 400, 'description': 'Bad Request: injected error',
+            }, status_code=400)
+
+        return JSONResponse({'ok': True, 'result': self._result(method, params)})
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title='Telegram Bot API stub')
+
+        @app.api_route('/bot{token}/{method}', methods=['GET', 'POST'])
+        async def bot_method(token: str, method: str, request: Request):
+            return await self.handle(method, request)
+
+        @app.get('/_stub/stats')
+        async def stub_stats():
+            return self.stats()
+
+        @app.get('/_stub/messages')
+        async def stub_messages(limit: int = 100):
+            return list(self.messages)[-limit:]
+
+        @app.post('/_stub/config')
+        async def stub_config(request: Request):
+            self.config.update(await request.json())
+            return self.config.as_dict()
+
+        @app.post('/_stub/reset')
+        async def stub_reset():
+            self.reset()
+            return {'ok': True}
+
+        return app
+
+
+async def _params(request: Request) -> dict:
+    """Bot API parameters: query string, form (what python-telegram-bot sends) or JSON"""
+    params = dict(request.query_params)
+    content_type = request.headers.get('content-type', '')
+    if 'application/json' in content_type:
+        params.update(await request.json())
+    elif request.method == 'POST':
+        params.update({key: value for key, value in (await request.form()).items() if isinstance(value, str)})
+    return params
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_in_thread(config: StubConfig = None, port: int = None) -> tuple:
+    """
+    Start the stand-in on a background thread (for benchmarks)
+    Returns (stub, base_url) - base_url is the value for TELEGRAM_API_URL
+    """
+    import uvicorn
+
+    stub = TelegramStub(config)
+    port = port or _free_port()
+    server = uvicorn.Server(uvicorn.Config(stub.app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return stub, f'http://127.0.0.1:{port}/bot'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='added to every call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='random +/- on top of latency')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='share of calls answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after of 429 answers, seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of calls answered with 400')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    stub = TelegramStub(StubConfig(args.latency_ms, args.jitter_ms, args.rate_limit,
+                                   args.retry_after, args.error_rate, args.seed))
+    print(f"Bot API stub: TELEGRAM_API_URL=http://{args.host}:{args.port}/bot")
+    print(f"Config: {json.dumps(stub.config.as_dict())}")
+    uvicorn.run(stub.app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+Webhook load generator
+
+Sends Telegram updates to POST /webhook/{token} at a fixed rate (or at the
+recorded pace) and reports, per rate step:
+- webhook acknowledgement latency (what Telegram waits for)
+- enqueue -> handler completion latency per handler, from the server's
+  homefood_update_duration_seconds histogram (scraped from /metrics before and after)
+- the deepest the update queue got and how long it took to drain
+
+The rate at which the queue stops draining is the breaking point of process_updates.
+
+Sources:
+- replay FILE   updates recorded by the webhook with WEBHOOK_RECORD=<file> (monitoring/recording.py)
+- synth         scenario mix: browse (admin menu), customer (/start, my orders),
+                add_product (the whole add-product conversation), status (order status changes)
+
+Synthetic scenarios and replays write to the database (products, order statuses):
+run them against --local or a scratch deployment, never production.
+
+Usage:
+    python benchmarks/webhook_load.py synth --local --rate 10 20 40 80 --duration 20
+    python benchmarks/webhook_load.py synth --local --mix browse=5,customer=3,status=2,add_product=1
+    python benchmarks/webhook_load.py replay updates.jsonl --local --speed 4
+    python benchmarks/webhook_load.py replay updates.jsonl --url http://staging:8000 --token $BOT_TOKEN --rate 50
+
+--local starts start.py in a subprocess on a seeded SQLite database, with the Bot API
+pointed at benchmarks/telegram_stub.py, and stops it afterwards.
+"""
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_TOKEN = '123456:bench'
+
+# Customers of the seeded dataset (benchmarks/dataset.py BENCH_USER_ID), so "My orders" has orders
+CUSTOMER_ID_BASE = 1000
+CUSTOMERS = 200
+
+DEFAULT_MIX = 'browse=5,customer=3,status=2,add_product=1'
+
+
+# ===== UPDATES =====
+
+def _user(user_id: int) -> dict:
+    return {'id': user_id, 'is_bot': False, 'first_name': 'Load'}
+
+
+def _chat(user_id: int) -> dict:
+    return {'id': user_id, 'type': 'private'}
+
+
+def message(user_id: int, text: str) -> dict:
+    body = {'message_id': random.randrange(1, 10 ** 6), 'date': int(time.time()),
+            'chat': _chat(user_id), 'from': _user(user_id), 'text': text}
+    if text.startswith('/'):
+        body['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return {'message': body}
+
+
+def callback(user_id: int, data: str) -> dict:
+    return {'callback_query': {
+        'id': str(random.randrange(10 ** 12)), 'chat_instance': str(user_id), 'data': data,
+        'from': _user(user_id),
+        'message': {'message_id': random.randrange(1, 10 ** 6), 'date': int(time.time()),
+                    'chat': _chat(user_id), 'text': 'menu'},
+    }}
+
+
+# ===== SCENARIOS =====
+# Each scenario is the sequence of updates one user sends in one session
+
+def browse(rng, admin_id: int, order_ids: list) -> list:
+    order_id = rng.choice(order_ids)
+    return [
+        message(admin_id, '/start'),
+        callback(admin_id, rng.choice(['orders_all', 'orders_pending', 'orders_cooking'])),
+        callback(admin_id, f'od:{order_id}'),
+        callback(admin_id, 'menu_manage'),
+        callback(admin_id, 'list_products'),
+        callback(admin_id, 'stats'),
+        callback(admin_id, 'back_to_main'),
+    ]
+
+
+def customer(rng, customer_id: int, order_ids: list) -> list:
+    return [message(customer_id, '/start'), callback(customer_id, 'my_orders')]
+
+
+def add_product(rng, admin_id: int, order_ids: list) -> list:
+    number = rng.randrange(10 ** 6)
+    return [
+        callback(admin_id, 'add_product'),
+        message(admin_id, f'Нагрузочное блюдо {number}'),
+        message(admin_id, 'Описание для нагрузочного теста'),
+        message(admin_id, str(rng.randint(15, 90))),
+        message(admin_id, f'https://example.com/load-{number}.jpg'),
+        callback(admin_id, rng.choice(['cat_burger', 'cat_pizza', 'cat_soup', 'cat_dessert'])),
+        message(admin_id, 'мука, вода, соль'),
+        callback(admin_id, 'saveproduct'),
+    ]
+
+
+def status(rng, admin_id: int, order_ids: list) -> list:
+    # Walks an order through the workflow; on already-advanced orders the transitions are rejected
+    order_id = rng.choice(order_ids)
+    return [callback(admin_id, f'od:{order_id}')] + [
+        callback(admin_id, f'st:{order_id}:{next_status}')
+        for next_status in ('confirmed', 'cooking', 'ready', 'delivered')
+    ]
+
+
+SCENARIOS = {'browse': browse, 'customer': customer, 'add_product': add_product, 'status': status}
+ADMIN_SCENARIOS = ('browse', 'add_product', 'status')
+
+
+def parse_mix(spec: str) -> dict:
+    """"browse=5,status=2" -> {'browse': 5.0, 'status': 2.0}"""
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def synthesize(mix: dict, admin_ids: list, order_ids: list, sessions: int, seed: int):
+    """
+    Endless stream of updates from `sessions` users interleaved; each user's
+    updates stay in order (a conversation must not see its steps swapped)
+    """
+    rng = random.Random(seed)
+    customer_names = [name for name in mix if name not in ADMIN_SCENARIOS]
+    if not admin_ids and not customer_names:
+        raise SystemExit("Admin scenarios need at least one admin id")
+    # Two sessions of one admin step on each other's conversation: an admin id is
+    # taken from the pool for a whole session and returned when it ends
+    free_admins = list(admin_ids)
+
+    def new_session():
+        names = list(mix) if free_admins else customer_names
+        if not names:
+            # Every admin is busy and the mix has no customer scenarios - try again later
+            return None, None
+        name = rng.choices(names, [mix[name] for name in names])[0]
+        if name in ADMIN_SCENARIOS:
+            user_id = free_admins.pop(rng.randrange(len(free_admins)))
+            admin_id = user_id
+        else:
+            user_id = CUSTOMER_ID_BASE + rng.randrange(CUSTOMERS)
+            admin_id = None
+        return iter(SCENARIOS[name](rng, user_id, order_ids)), admin_id
+
+    active = [new_session() for _ in range(sessions)]
+    while True:
+        index = rng.randrange(len(active))
+        session, admin_id = active[index]
+        update = next(session, None) if session is not None else None
+        if update is None:
+            if admin_id is not None:
+                free_admins.append(admin_id)
+            active[index] = new_session()
+            continue
+        yield None, update
+
+
+def replay(path: str, loops: int = 1):
+    """Recorded (t, update) pairs from a WEBHOOK_RECORD file; each loop starts after the previous one"""
+    offset = 0.0
+    for _ in range(loops):
+        last = 0.0
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    last = entry.get('t') or 0.0
+                    yield offset + last, entry['update']
+        # Loops of a short file do not collapse into one burst
+        offset += last + 1.0
+
+
+# ===== METRICS =====
+
+UPDATE_METRIC = 'homefood_update_duration_seconds'
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][\w:]*)(?:\{(.*)\})?\s+(\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text: str) -> dict:
+    """Prometheus text -> {(name, ((label, value), ...)): float}"""
+    samples = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if match:
+            name, labels, value = match.groups()
+            samples[(name, tuple(_LABEL.findall(labels or '')))] = float(value)
+    return samples
+
+
+def handler_latencies(before: dict, after: dict, metric: str = UPDATE_METRIC) -> dict:
+    """Per-handler count / mean / p50 / p95 / p99 of the updates completed between two scrapes"""
+    buckets = {}
+    sums = {}
+    for (name, labels), value in after.items():
+        delta = value - before.get((name, labels), 0.0)
+        labels = dict(labels)
+        if name == f'{metric}_bucket':
+            bound = float(labels.pop('le').replace('+Inf', 'inf'))
+            buckets.setdefault(labels.get('handler', ''), []).append((bound, delta))
+        elif name == f'{metric}_sum':
+            sums[labels.get('handler', '')] = delta
+
+    result = {}
+    for handler, cumulative in buckets.items():
+        cumulative.sort()
+        count = cumulative[-1][1]
+        if count <= 0:
+            continue
+        result[handler] = {
+            'count': int(count),
+            'mean_ms': round(sums.get(handler, 0.0) / count * 1000, 1),
+            'p50_ms': _bucket_quantile(cumulative, 0.50),
+            'p95_ms': _bucket_quantile(cumulative, 0.95),
+            'p99_ms': _bucket_quantile(cumulative, 0.99),
+        }
+    return dict(sorted(result.items(), key=lambda item: -item[1]['count']))
+
+
+def _bucket_quantile(cumulative: list, share: float) -> float:
+    """Quantile from cumulative histogram buckets, linear inside a bucket (like histogram_quantile)"""
+    rank = share * cumulative[-1][1]
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in cumulative:
+        if count >= rank:
+            if bound == float('inf'):
+                return round(lower_bound * 1000, 1)
+            inside = (rank - lower_count) / (count - lower_count) if count > lower_count else 1.0
+            return round((lower_bound + (bound - lower_bound) * inside) * 1000, 1)
+        lower_bound, lower_count = bound, count
+    return round(lower_bound * 1000, 1)
+
+
+def _percentile(samples: list, share: float) -> float:
+    if not samples:
+        return 0.0
+    return round(samples[min(len(samples) - 1, int(round(share * (len(samples) - 1))))] * 1000, 2)
+
+
+# ===== LOAD =====
+
+class Target:
+    def __init__(self, client, token: str):
+        self.client = client
+        self.token = token
+        self.update_ids = itertools.count(random.randrange(10 ** 8, 10 ** 9))
+
+    async def metrics(self) -> dict:
+        response = await self.client.get('/metrics')
+        response.raise_for_status()
+        return parse_metrics(response.text)
+
+    async def queue_depth(self) -> float:
+        samples = await self.metrics()
+        return samples.get(('homefood_update_queue_depth', ()), 0.0)
+
+    async def completed(self) -> float:
+        """Updates whose handlers have finished, over all handlers"""
+        samples = await self.metrics()
+        return sum(value for (name, _), value in samples.items() if name == f'{UPDATE_METRIC}_count')
+
+    async def post(self, update: dict) -> bool:
+        update = dict(update, update_id=next(self.update_ids))
+        response = await self.client.post(f'/webhook/{self.token}', json=update)
+        return response.status_code == 200 and response.json().get('ok') is True
+
+
+async def run_step(target: Target, source, rate: float, duration: float, speed: float,
+                   concurrency: int, drain_timeout: float) -> dict:
+    """
+    Open-loop load: update i is due at i / rate (or at its recorded time / speed)
+    whether or not earlier ones were answered; at most `concurrency` requests in flight
+    """
+    before = await target.metrics()
+    semaphore = asyncio.Semaphore(concurrency)
+    acks = []
+    failed = 0
+    late = 0
+    max_depth = 0.0
+    tasks = set()
+
+    async def send(update):
+        nonlocal failed
+        started = time.perf_counter()
+        try:
+            ok = await target.post(update)
+        except Exception:
+            ok = False
+        finally:
+            semaphore.release()
+        acks.append(time.perf_counter() - started)
+        if not ok:
+            failed += 1
+
+    async def watch_queue():
+        nonlocal max_depth
+        while True:
+            try:
+                max_depth = max(max_depth, await target.queue_depth())
+            except Exception:
+                pass
+            await asyncio.sleep(0.5)
+
+    watcher = asyncio.create_task(watch_queue())
+    started = time.perf_counter()
+    sent = 0
+    recorded_start = None
+    for recorded_at, update in source:
+        if rate:
+            due = sent / rate
+        else:
+            recorded_start = recorded_at if recorded_start is None else recorded_start
+            due = (recorded_at - recorded_start) / speed
+        if due >= duration:
+            break
+        delay = started + due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif delay < -0.1:
+            late += 1
+        await semaphore.acquire()
+        task = asyncio.create_task(send(update))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        sent += 1
+    if tasks:
+        await asyncio.gather(*tasks)
+    sending = time.perf_counter() - started
+
+    # Updates still queued are part of this step: wait until every accepted one has been handled
+    drain_started = time.perf_counter()
+    expected = sum(value for (name, _), value in before.items() if name == f'{UPDATE_METRIC}_count') + sent - failed
+    drained = await target.completed() >= expected
+    while not drained and time.perf_counter() - drain_started < drain_timeout:
+        await asyncio.sleep(0.25)
+        drained = await target.completed() >= expected
+    drain = time.perf_counter() - drain_started
+    watcher.cancel()
+    after = await target.metrics()
+
+    acks.sort()
+    return {
+        'rate': rate or None,
+        'speed': None if rate else speed,
+        'sent': sent,
+        'achieved_rate': round(sent / sending, 1) if sending else 0.0,
+        'failed': failed,
+        'late': late,
+        'ack_p50_ms': _percentile(acks, 0.50),
+        'ack_p95_ms': _percentile(acks, 0.95),
+        'ack_p99_ms': _percentile(acks, 0.99),
+        'max_queue_depth': int(max_depth),
+        'drain_seconds': round(drain, 2),
+        'drained': drained,
+        'handlers': handler_latencies(before, after),
+    }
+
+
+def print_step(step: dict):
+    pace = f"{step['rate']:g}/s" if step['rate'] else f"x{step['speed']:g}"
+    drained = f"{step['drain_seconds']:.1f} s" if step['drained'] else 'NOT DRAINED'
+    print(f"\n=== {pace}: sent {step['sent']} ({step['achieved_rate']}/s), failed {step['failed']}, "
+          f"late {step['late']}, ack p50 {step['ack_p50_ms']} ms p95 {step['ack_p95_ms']} ms, "
+          f"max queue {step['max_queue_depth']}, drain {drained}", file=sys.stderr)
+    print(f"{'handler':<40}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}", file=sys.stderr)
+    for handler, stats in step['handlers'].items():
+        print(f"{handler:<40}{stats['count']:>8}{stats['mean_ms']:>10}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}", file=sys.stderr)
+
+
+# ===== LOCAL SERVER =====
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_local(args, admin_ids: list):
+    """Seeded start.py in a subprocess talking to the Bot API stand-in; returns (process, url, order_ids)"""
+    sys.path.insert(0, ROOT)
+    from benchmarks.telegram_stub import StubConfig, run_in_thread
+
+    workdir = tempfile.mkdtemp(prefix='homefood-load-')
+    os.symlink(os.path.join(ROOT, 'static'), os.path.join(workdir, 'static'))
+    _, api_url = run_in_thread(StubConfig(latency_ms=args.stub_latency_ms, jitter_ms=args.stub_latency_ms / 4, seed=1))
+    port = _free_port()
+
+    env = dict(os.environ, BOT_TOKEN=BENCH_TOKEN, ADMIN_IDS=','.join(map(str, admin_ids)),
+               TELEGRAM_API_URL=api_url, PORT=str(port), PYTHONPATH=ROOT)
+    env.setdefault('LOG_LEVEL', 'WARNING')
+    for name in ('DATABASE_URL', 'RAILWAY_PUBLIC_DOMAIN', 'RAILWAY_STATIC_URL', 'WEBHOOK_RECORD'):
+        env.pop(name, None)
+
+    seed = (
+        "import json; from benchmarks import dataset; from database import db; db.initialize(); "
+        f"dataset.seed(db, products=50, orders={args.orders}, users={CUSTOMERS}); "
+        "rows = db.execute_query(\"SELECT id FROM orders WHERE status = 'pending'\", fetch='all'); "
+        "print(json.dumps([dict(row)['id'] for row in rows]))"
+    )
+    seeded = subprocess.run([sys.executable, '-c', seed], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True)
+    order_ids = json.loads(seeded.stdout.strip().splitlines()[-1]) or ['b0000001']
+
+    log_path = os.path.join(workdir, 'server.log')
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'start.py')], cwd=workdir, env=env,
+                               stdout=open(log_path, 'w'), stderr=subprocess.STDOUT)
+    print(f"Local server on :{port} (log: {log_path}), {len(order_ids)} pending orders", file=sys.stderr)
+    return process, f'http://127.0.0.1:{port}', order_ids
+
+
+async def wait_ready(client, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get('/readyz')).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.5)
+    raise SystemExit("Server did not become ready")
+
+
+# ===== MAIN =====
+
+async def run(args) -> dict:
+    import httpx
+
+    admin_ids = [int(value) for value in args.admin_ids.split(',')]
+    process = None
+    url, token, order_ids = args.url, args.token, args.order_ids.split(',') if args.order_ids else None
+    if args.local:
+        # One admin per concurrent session
+        admin_ids = list(range(1, max(len(admin_ids), getattr(args, 'sessions', 0)) + 1))
+        process, url, seeded_ids = start_local(args, admin_ids)
+        token = BENCH_TOKEN
+        order_ids = order_ids or seeded_ids
+    elif not token:
+        raise SystemExit("--token is required without --local")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    steps = []
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=30, limits=limits) as client:
+            await wait_ready(client)
+            target = Target(client, token)
+            # Seeded order ids of benchmarks/dataset.py when nothing better is known
+            order_ids = order_ids or [f'b{i:07d}' for i in range(1, 101)]
+
+            for rate in args.rate or [None]:
+                if args.command == 'synth':
+                    source = synthesize(parse_mix(args.mix), admin_ids, order_ids, args.sessions, args.seed)
+                    rate = rate or 10.0
+                else:
+                    source = replay(args.file, args.loops)
+                step = await run_step(target, source, rate, args.duration, args.speed,
+                                      args.concurrency, args.drain_timeout)
+                steps.append(step)
+                print_step(step)
+    finally:
+        if process:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'target': 'local' if args.local else url,
+        'source': args.mix if args.command == 'synth' else args.file,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'steps': steps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    synth_parser = commands.add_parser('synth', help='synthetic scenario mix')
+    synth_parser.add_argument('--mix', default=DEFAULT_MIX, help=f'scenario weights (default {DEFAULT_MIX})')
+    synth_parser.add_argument('--sessions', type=int, default=20, help='users active at the same time')
+    synth_parser.add_argument('--seed', type=int, default=1)
+    replay_parser = commands.add_parser('replay', help='updates recorded with WEBHOOK_RECORD')
+    replay_parser.add_argument('file')
+    replay_parser.add_argument('--loops', type=int, default=1, help='replay the file this many times')
+
+    for sub in (synth_parser, replay_parser):
+        sub.add_argument('--url', default='http://127.0.0.1:8000')
+        sub.add_argument('--token', default=os.getenv('BOT_TOKEN'), help='webhook token (default: BOT_TOKEN)')
+        sub.add_argument('--local', action='store_true', help='start a seeded local server with a Bot API stand-in')
+        sub.add_argument('--rate', type=float, nargs='*',
+                         help='updates per second; several values run as successive steps')
+        sub.add_argument('--speed', type=float, default=1.0, help='replay: recorded pace multiplier (without --rate)')
+        sub.add_argument('--duration', type=float, default=30.0, help='seconds per step')
+        sub.add_argument('--concurrency', type=int, default=32, help='webhook requests in flight')
+        sub.add_argument('--drain-timeout', type=float, default=30.0, help='seconds to wait for queued updates to be handled')
+        sub.add_argument('--admin-ids', default='1,2,3', help='admin user ids (recordings map admins to 1..N)')
+        sub.add_argument('--order-ids', help='comma-separated order ids for the status scenario')
+        sub.add_argument('--orders', type=int, default=2000, help='--local: orders to seed')
+        sub.add_argument('--stub-latency-ms', type=float, default=40.0, help='--local: Bot API stand-in latency')
+        sub.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Results: {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,10 @@ Telegram Bot для Home Food Abu Dhabi
 """
 
 # Import from bot modules
-from bot.config import BOT_TOKEN, ADMIN_IDS, USE_POSTGRES
+from bot.config import (
+    BOT_TOKEN, ADMIN_IDS, USE_POSTGRES, PERSISTENCE_UPDATE_INTERVAL, TELEGRAM_API_URL, TELEGRAM_FILE_URL,
+    validate_config,
+)
 from bot.handlers import (
     start,
     help_command,
@@ -16,6 +19,7 @@ from bot.handlers import (
     get_edit_product_conversation_handler,
     button_callback
 )
+from bot.persistence import DatabasePersistence
 
 # Telegram imports
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler
@@ -26,8 +30,7 @@ def create_application():
     Create and configure bot application
     This is imported by start.py for Railway deployment
     """
-    if not BOT_TOKEN:
-        print("❌ BOT_TOKEN not set!")
+    if not validate_config():
         return None
 
     print("=" * 50)
@@ -35,7 +38,16 @@ def create_application():
     print("=" * 50)
 
     # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
+    # Conversation state lives in the DB so redeploys don't drop add/edit flows
+    persistence = DatabasePersistence(update_interval=PERSISTENCE_UPDATE_INTERVAL)
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .base_url(TELEGRAM_API_URL)
+        .base_file_url(TELEGRAM_FILE_URL)
+        .persistence(persistence)
+        .build()
+    )
 
     # Add command handlers
     print("📝 Registering command handlers...")
@@ -70,6 +82,10 @@ def create_application():
 def main():
     """Main function for local development"""
     print("🚀 Starting bot in polling mode (local development)...")
+    from database import db
+    from monitoring.log import setup_logging
+    setup_logging()
+    db.initialize()
     application = create_application()
 
     if application:
@@ -0,0 +1,34 @@
+"""
+Callback Data Codecs
+All structured callback_data formats used by inline buttons
+"""
+
+from .router import CallbackCodec, LegacyCodec
+
+# ===== ORDERS =====
+
+# od:<order_id>
+ORDER_DETAIL = CallbackCodec('od', ('order_id', str))
+
+# st.2:<order_id>:<status>:<order version the admin saw>
+ORDER_STATUS = CallbackCodec('st', ('order_id', str), ('status', str), ('version', int), version=2)
+
+# st:<order_id>:<status> (buttons sent before order versions)
+ORDER_STATUS_V1 = CallbackCodec('st', ('order_id', str), ('status', str))
+
+# op:<filter>:<n|p>:<cursor order_id>
+ORDER_PAGE = CallbackCodec('op', ('filter_key', str), ('direction', str), ('cursor', str))
+
+# ===== PRODUCTS =====
+
+# pp:<del|edit>:<page>
+PRODUCT_PAGE = CallbackCodec('pp', ('action', str), ('page', int))
+
+# dp:<product_id>
+DELETE_PRODUCT = CallbackCodec('dp', ('product_id', str))
+
+# ===== LEGACY (buttons on messages sent before the router) =====
+
+LEGACY_ORDER_DETAIL = LegacyCodec('order_detail_', ('order_id', str))
+LEGACY_ORDER_STATUS = LegacyCodec('status_', ('order_id', str), ('status', str))
+LEGACY_DELETE_PRODUCT = LegacyCodec('delete_prod_', ('product_id', str))
@@ -1,6 +1,6 @@
 """
 Bot Configuration
-Loads environment variables and validates settings
+Loads environment variables; validate_config() checks them before the bot starts
 """
 
 import os
@@ -19,13 +19,33 @@ ADMIN_IDS = [int(id.strip()) for id in ADMIN_IDS_STR.split(",") if id.strip()]
 DATABASE_URL = os.getenv("DATABASE_URL")
 USE_POSTGRES = DATABASE_URL is not None
 
-# Validate configuration
-if not BOT_TOKEN:
-    raise ValueError("❌ BOT_TOKEN is not set in environment variables!")
-
-if not ADMIN_IDS:
-    print("⚠️ Warning: No ADMIN_IDS configured. Admin features will not work.")
-
-print(f"✅ Bot configuration loaded")
-print(f"   Database: {'PostgreSQL' if USE_POSTGRES else 'SQLite'}")
-print(f"   Admins: {len(ADMIN_IDS)} configured")
+# How often (seconds) buffered conversation state is written to the database
+PERSISTENCE_UPDATE_INTERVAL = float(os.getenv("PERSISTENCE_UPDATE_INTERVAL", "10"))
+
+# Bot API endpoint; point it at a local stand-in (benchmarks/telegram_stub.py)
+# to run the bot and notifications with no network, e.g. http://127.0.0.1:8081/bot
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")
+TELEGRAM_FILE_URL = os.getenv(
+    "TELEGRAM_FILE_URL", TELEGRAM_API_URL[:-len("/bot")] + "/file/bot" if TELEGRAM_API_URL.endswith("/bot") else TELEGRAM_API_URL
+)
+
+
+def validate_config() -> bool:
+    """
+    Check settings required to run the bot
+    Called by create_application(), not at import, so scripts and workers
+    that only need constants can import this module without a token
+    """
+    if not BOT_TOKEN:
+        print("❌ BOT_TOKEN is not set in environment variables!")
+        return False
+
+    if not ADMIN_IDS:
+        print("⚠️ Warning: No ADMIN_IDS configured. Admin features will not work.")
+
+    print(f"✅ Bot configuration loaded")
+    print(f"   Database: {'PostgreSQL' if USE_POSTGRES else 'SQLite'}")
+    print(f"   Admins: {len(ADMIN_IDS)} configured")
+    if TELEGRAM_API_URL != "https://api.telegram.org/bot":
+        print(f"   Bot API: {TELEGRAM_API_URL}")
+    return True
@@ -42,6 +42,8 @@ CATEGORIES = [
     ('drinks', '🥤 Напитки')
 ]
 
+CATEGORY_NAMES = dict(CATEGORIES)
+
 # Error messages
 ERROR_MESSAGES = {
     'name_too_short': '❌ Название слишком короткое. Минимум 3 символа.',
@@ -3,19 +3,32 @@ Callback Query Handlers
 Handles button clicks and inline keyboard interactions
 """
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ContextTypes
+import asyncio
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
 from ..config import ADMIN_IDS
 from ..utils import format_order
+from ..rendering import render_stats
+from ..router import CallbackRouter
+from ..callback_data import (
+    ORDER_DETAIL, ORDER_STATUS, ORDER_STATUS_V1, ORDER_PAGE, PRODUCT_PAGE, DELETE_PRODUCT,
+    LEGACY_ORDER_DETAIL, LEGACY_ORDER_STATUS, LEGACY_DELETE_PRODUCT,
+)
+from ..constants import STATUS_NAMES
+from ..keyboards import get_product_picker, get_order_status_keyboard
+from .orders import ORDER_LIST_CALLBACKS, show_orders_page
 
 # Import from root database module (not bot.database)
-from database import db
+from database import db, get_product_by_id, delete_product
+from database.orders import (
+    transition_order_status, get_user_orders, OrderNotFound, InvalidTransition, VersionConflict,
+)
+from api.notifications import send_status_update_notification
 
-try:
-    from psycopg2.extras import RealDictCursor
-except ImportError:
-    RealDictCursor = None
+# The event loop keeps only weak references to tasks: a notification that is not
+# referenced here could be garbage-collected before it is sent
+_notification_tasks = set()
 
 
 def get_db():
@@ -25,7 +38,8 @@ def get_db():
 
 def get_cursor(conn):
     """Get cursor with dict support for both SQLite and PostgreSQL"""
-    if db.use_postgres and RealDictCursor:
+    if db.use_postgres:
+        from psycopg2.extras import RealDictCursor
         return conn.cursor(cursor_factory=RealDictCursor)
     else:
         conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
@@ -47,404 +61,296 @@ def get_agg_func():
         return "GROUP_CONCAT(oi.product_id || ':' || oi.product_name || ':' || oi.quantity || ':' || oi.price || ':')"
 
 
-def get_orders_query(status_filter=None):
-    """Get SQL query for fetching orders (handles PostgreSQL vs SQLite)"""
-    agg_func = get_agg_func()
+async def show_user_greeting(query, context):
+    """Greeting for regular users who pressed an admin-only button"""
+    not_admin_keyboard = [
+        [InlineKeyboardButton("🍱 Открыть меню", url="https://homemade-production.up.railway.app/app")],
+        [InlineKeyboardButton("Мои заказы", callback_data="my_orders")],
+        [InlineKeyboardButton("Связаться с поддержкой", url="https://t.me/sekeww")],
+    ]
 
-    # Handle single status, list of statuses, or no filter
-    if status_filter:
-        if isinstance(status_filter, list):
-            statuses = "', '".join(status_filter)
-            where_clause = f"WHERE o.status IN ('{statuses}')"
-        else:
-            where_clause = f"WHERE o.status = '{status_filter}'"
-    else:
-        where_clause = ""
+    await query.edit_message_text(
+        "👋 Привет!\n\n"
+        "Добро пожаловать в <b>HomeMade</b> — место, где вкус и уют встречаются прямо у тебя дома 🍲\n\n"
+        "📱 Здесь ты можешь заказать домашнюю еду, приготовленную с любовью. Всё просто — выбирай, заказывай и наслаждайся 😋\n\n"
+        "Готов начать?",
+        parse_mode='HTML',
+        reply_markup=InlineKeyboardMarkup(not_admin_keyboard)
+    )
 
-    return f'''
-        SELECT o.*,
-               {agg_func} as items_data
-        FROM orders o
-        LEFT JOIN order_items oi ON o.id = oi.order_id
-        {where_clause}
-        GROUP BY o.id
-        ORDER BY o.created_at DESC
-        LIMIT 5
-    '''
 
+router = CallbackRouter(is_admin=lambda user_id: user_id in ADMIN_IDS, on_forbidden=show_user_greeting)
 
-async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """
-    Main callback handler for all inline keyboard button presses
-    Routes to appropriate action based on callback_data
-    """
-    query = update.callback_query
-    await query.answer()
+# Main callback handler for all inline keyboard button presses
+button_callback = router.dispatch
 
-    not_admin_keyboard = [
-        [InlineKeyboardButton("🍱 Открыть меню", url="https://homemade-production.up.railway.app/app")],
-        [InlineKeyboardButton("Мои заказы", callback_data="my_orders")],
-        [InlineKeyboardButton("Связаться с поддержкой", url="https://t.me/sekeww")],
+
+# === MENU MANAGEMENT ===
+
+@router.action("menu_manage")
+async def menu_manage(query, context):
+    """Product management menu"""
+    keyboard = [
+        [InlineKeyboardButton("➕ Добавить блюдо", callback_data="add_product")],
+        [InlineKeyboardButton("✏️ Редактировать блюдо", callback_data="edit_product")],
+        [InlineKeyboardButton("📋 Список блюд", callback_data="list_products")],
+        [InlineKeyboardButton("🗑️ Удалить блюдо", callback_data="delete_product_list")],
+        [InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")]
     ]
 
-    # Check if user is admin for most operations
-    if query.from_user.id not in ADMIN_IDS:
-        await query.edit_message_text(
-            "👋 Привет!\n\n"
-            "Добро пожаловать в <b>HomeMade</b> — место, где вкус и уют встречаются прямо у тебя дома 🍲\n\n"
-            "📱 Здесь ты можешь заказать домашнюю еду, приготовленную с любовью. Всё просто — выбирай, заказывай и наслаждайся 😋\n\n"
-            "Готов начать?",
-            parse_mode='HTML',
-            reply_markup=InlineKeyboardMarkup(not_admin_keyboard)
-        )
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    await query.edit_message_text(
+        "🍽️ <b>Управление меню</b>\n\nВыберите действие:",
+        reply_markup=reply_markup,
+        parse_mode='HTML'
+    )
+
+
+# === LIST PRODUCTS ===
+
+@router.action("list_products")
+async def list_products(query, context):
+    """Number of dishes in the menu"""
+    with get_db() as conn:
+        cursor = get_cursor(conn)
+        cursor.execute('SELECT COUNT(*) as count FROM products WHERE active')
+        count = cursor.fetchone()['count']
+
+    await query.edit_message_text(
+        f"🍽️ В меню <b>{count}</b> блюд\n\n"
+        "Используйте /products для просмотра",
+        parse_mode='HTML'
+    )
+
+
+# === BACK TO MAIN ===
+
+@router.action("back_to_main")
+async def back_to_main(query, context):
+    """Admin main menu"""
+    keyboard = [
+        [InlineKeyboardButton("📦 Все заказы", callback_data="orders_all")],
+        [InlineKeyboardButton("🕐 Новые заказы", callback_data="orders_pending")],
+        [InlineKeyboardButton("👨‍🍳 В работе", callback_data="orders_cooking")],
+        [InlineKeyboardButton("🍽️ Управление меню", callback_data="menu_manage")],
+        [InlineKeyboardButton("📊 Статистика", callback_data="stats")],
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    await query.edit_message_text(
+        "🍽️ <b>Home Food Admin Panel</b>\n\nВыберите действие:",
+        reply_markup=reply_markup,
+        parse_mode='HTML'
+    )
+
+
+# === ORDER LISTS (all / pending / cooking) ===
+
+@router.action(*ORDER_LIST_CALLBACKS)
+async def order_list(query, context):
+    """First page of an order list"""
+    await show_orders_page(query, ORDER_LIST_CALLBACKS[query.data])
+
+
+@router.codec(ORDER_PAGE)
+async def order_list_page(query, context, filter_key: str, direction: str, cursor: str):
+    """Another page of an order list"""
+    await show_orders_page(query, filter_key, direction, cursor)
+
+
+# === MY ORDERS (for regular users) ===
+
+@router.action("my_orders", admin_only=False)
+async def my_orders(query, context):
+    """Recent orders of the current user"""
+    orders = get_user_orders(query.from_user.id)
+
+    if not orders:
+        await query.edit_message_text("📭 У тебя пока нет заказов.")
         return
 
-    data = query.data
+    await query.edit_message_text(f"📦 <b>Твои последние {len(orders)} заказов</b>", parse_mode='HTML')
 
-    # === MENU MANAGEMENT ===
-    if data == "menu_manage":
+    for order in orders:
         keyboard = [
-            [InlineKeyboardButton("➕ Добавить блюдо", callback_data="add_product")],
-            [InlineKeyboardButton("✏️ Редактировать блюдо", callback_data="edit_product")],
-            [InlineKeyboardButton("📋 Список блюд", callback_data="list_products")],
-            [InlineKeyboardButton("🗑️ Удалить блюдо", callback_data="delete_product_list")],
-            [InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")]
+            [InlineKeyboardButton("📝 Подробнее", callback_data=ORDER_DETAIL.encode(order['id']))]
         ]
-
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(
-            "🍽️ <b>Управление меню</b>\n\nВыберите действие:",
+
+        await query.message.reply_text(
+            format_order(order),
             reply_markup=reply_markup,
             parse_mode='HTML'
         )
+
+
+# === STATISTICS ===
+
+@router.action("stats")
+async def stats(query, context):
+    """Order statistics"""
+    with get_db() as conn:
+        cursor = get_cursor(conn)
+
+        cursor.execute('SELECT COUNT(*) as count FROM orders')
+        total_orders = cursor.fetchone()['count']
+
+        cursor.execute('''
+            SELECT status, COUNT(*) as count, SUM(total_amount) as total
+            FROM orders
+            GROUP BY status
+        ''')
+        status_stats = cursor.fetchall()
+
+        cursor.execute('SELECT SUM(total_amount) as total FROM orders')
+        total_amount = cursor.fetchone()['total'] or 0
+
+        cursor.execute('''
+            SELECT COUNT(*) as count, SUM(total_amount) as total
+            FROM orders
+            WHERE DATE(created_at) = DATE('now')
+        ''')
+        today = cursor.fetchone()
+
+        cursor.execute('SELECT COUNT(*) as count FROM products WHERE active')
+        total_products = cursor.fetchone()['count']
+
+    stats_text = render_stats(total_orders, total_products, total_amount, status_stats, today)
+
+    await query.edit_message_text(stats_text, parse_mode='HTML')
+
+
+# === ORDER DETAILS ===
+
+@router.codec(ORDER_DETAIL, LEGACY_ORDER_DETAIL)
+async def order_detail(query, context, order_id: str):
+    """Order card with status buttons"""
+    with get_db() as conn:
+        cursor = get_cursor(conn)
+        agg_func = get_agg_func()
+        query_sql = f'''
+            SELECT o.*,
+                   {agg_func} as items_data
+            FROM orders o
+            LEFT JOIN order_items oi ON o.id = oi.order_id
+            WHERE o.id = {fix_query('?')}
+            GROUP BY o.id
+        '''
+        cursor.execute(query_sql, (order_id,))
+        order = cursor.fetchone()
+
+    if not order:
+        await query.edit_message_text("❌ Заказ не найден")
         return
 
-    # === LIST PRODUCTS ===
-    if data == "list_products":
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-            cursor.execute('SELECT COUNT(*) as count FROM products')
-            count = cursor.fetchone()['count']
+    order = dict(order)
+    reply_markup = get_order_status_keyboard(
+        order_id, order.get('status'), order.get('version', 1), back="orders_all"
+    )
+
+    await query.edit_message_text(
+        format_order(order),
+        reply_markup=reply_markup,
+        parse_mode='HTML'
+    )
+
 
+# === CHANGE ORDER STATUS ===
+
+@router.codec(ORDER_STATUS, ORDER_STATUS_V1, LEGACY_ORDER_STATUS)
+async def change_order_status(query, context, order_id: str, status: str, version: int = None):
+    """
+    Set a new order status (only allowed transitions are applied)
+    version is the order version shown on the pressed button; if another admin
+    changed the order since, nothing is written and no notification is sent
+    """
+    try:
+        order = transition_order_status(order_id, status, expected_version=version)
+    except OrderNotFound:
+        await query.edit_message_text("❌ Заказ не найден")
+        return
+    except VersionConflict as e:
+        current = e.order
         await query.edit_message_text(
-            f"🍽️ В меню <b>{count}</b> блюд\n\n"
-            "Используйте /products для просмотра",
+            f"⚠️ <b>Заказ уже обновлен</b> другим администратором\n\n{format_order(current)}",
+            reply_markup=get_order_status_keyboard(
+                order_id, current.get('status'), current.get('version', 1), back="orders_all"
+            ),
             parse_mode='HTML'
         )
         return
-
-    # === BACK TO MAIN ===
-    if data == "back_to_main":
-        keyboard = [
-            [InlineKeyboardButton("📦 Все заказы", callback_data="orders_all")],
-            [InlineKeyboardButton("🕐 Новые заказы", callback_data="orders_pending")],
-            [InlineKeyboardButton("👨‍🍳 В работе", callback_data="orders_cooking")],
-            [InlineKeyboardButton("🍽️ Управление меню", callback_data="menu_manage")],
-            [InlineKeyboardButton("📊 Статистика", callback_data="stats")],
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+    except InvalidTransition as e:
         await query.edit_message_text(
-            "🍽️ <b>Home Food Admin Panel</b>\n\nВыберите действие:",
-            reply_markup=reply_markup,
-            parse_mode='HTML'
+            f"⚠️ Заказ #{order_id} нельзя перевести из «{STATUS_NAMES.get(e.current, e.current)}» "
+            f"в «{STATUS_NAMES.get(status, status)}»",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("📝 Подробнее", callback_data=ORDER_DETAIL.encode(order_id))]
+            ])
         )
         return
 
-    # === ALL ORDERS ===
-    if data == "orders_all":
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-            cursor.execute(get_orders_query())
-            orders = cursor.fetchall()
-
-        if not orders:
-            await query.edit_message_text("📭 Заказов пока нет")
-            return
-
-        await query.edit_message_text(f"📦 <b>Последние {len(orders)} заказов</b>", parse_mode='HTML')
-
-        for order in orders:
-            keyboard = [
-                [InlineKeyboardButton("📝 Подробнее", callback_data=f"order_detail_{order['id']}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            await query.message.reply_text(
-                format_order(order),
-                reply_markup=reply_markup,
-                parse_mode='HTML'
-            )
-
-    # === PENDING ORDERS ===
-    elif data == "orders_pending":
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-            cursor.execute(get_orders_query('pending'))
-            orders = cursor.fetchall()
-
-        if not orders:
-            await query.edit_message_text("✅ Новых заказов нет")
-            return
-
-        await query.edit_message_text(f"🕐 <b>Новых заказов: {len(orders)}</b>", parse_mode='HTML')
-
-        for order in orders:
-            keyboard = [
-                [
-                    InlineKeyboardButton("✅ Принять", callback_data=f"status_{order['id']}_confirmed"),
-                    InlineKeyboardButton("❌ Отменить", callback_data=f"status_{order['id']}_cancelled")
-                ],
-                [InlineKeyboardButton("📝 Подробнее", callback_data=f"order_detail_{order['id']}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            await query.message.reply_text(
-                format_order(order),
-                reply_markup=reply_markup,
-                parse_mode='HTML'
-            )
-
-    # === COOKING ORDERS ===
-    elif data == "orders_cooking":
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-            cursor.execute(get_orders_query(['confirmed', 'cooking']))
-            orders = cursor.fetchall()
-
-        if not orders:
-            await query.edit_message_text("📭 Заказов в работе нет")
-            return
-
-        await query.edit_message_text(f"👨‍🍳 <b>Заказов в работе: {len(orders)}</b>", parse_mode='HTML')
-
-        for order in orders:
-            keyboard = [
-                [InlineKeyboardButton("📝 Подробнее", callback_data=f"order_detail_{order['id']}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            await query.message.reply_text(
-                format_order(order),
-                reply_markup=reply_markup,
-                parse_mode='HTML'
-            )
-
-    # === MY ORDERS (for regular users) ===
-    elif data == "my_orders":
-        user_id = query.from_user.id
-
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-            agg_func = get_agg_func()
-            query_sql = f'''
-                SELECT o.*,
-                       {agg_func} as items_data
-                FROM orders o
-                LEFT JOIN order_items oi ON o.id = oi.order_id
-                WHERE o.user_telegram_id = {fix_query('?')}
-                GROUP BY o.id
-                ORDER BY o.created_at DESC
-                LIMIT 5
-            '''
-            cursor.execute(query_sql, (user_id,))
-            orders = cursor.fetchall()
-
-        if not orders:
-            await query.edit_message_text("📭 У тебя пока нет заказов.")
-            return
-
-        await query.edit_message_text(f"📦 <b>Твои последние {len(orders)} заказов</b>", parse_mode='HTML')
-
-        for order in orders:
-            keyboard = [
-                [InlineKeyboardButton("📝 Подробнее", callback_data=f"order_detail_{order['id']}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            await query.message.reply_text(
-                format_order(order),
-                reply_markup=reply_markup,
-                parse_mode='HTML'
-            )
-
-    # === STATISTICS ===
-    elif data == "stats":
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-
-            cursor.execute('SELECT COUNT(*) as count FROM orders')
-            total_orders = cursor.fetchone()['count']
-
-            cursor.execute('''
-                SELECT status, COUNT(*) as count, SUM(total_amount) as total
-                FROM orders
-                GROUP BY status
-            ''')
-            status_stats = cursor.fetchall()
-
-            cursor.execute('SELECT SUM(total_amount) as total FROM orders')
-            total_amount = cursor.fetchone()['total'] or 0
-
-            cursor.execute('''
-                SELECT COUNT(*) as count, SUM(total_amount) as total
-                FROM orders
-                WHERE DATE(created_at) = DATE('now')
-            ''')
-            today = cursor.fetchone()
-
-            cursor.execute('SELECT COUNT(*) as count FROM products')
-            total_products = cursor.fetchone()['count']
-
-        stats_text = f"""
-📊 <b>Статистика</b>
-
-📦 Всего заказов: {total_orders}
-🍽️ Блюд в меню: {total_products}
-💰 Общая сумма: {total_amount:.1f} AED
-
-<b>По статусам:</b>
-"""
+    # Ровно одно уведомление клиенту на успешный переход
+    task = asyncio.create_task(send_status_update_notification(order))
+    _notification_tasks.add(task)
+    task.add_done_callback(_notification_tasks.discard)
 
-        status_emoji = {
-            'pending': '🕐', 'confirmed': '✅', 'cooking': '👨‍🍳',
-            'ready': '🎉', 'delivered': '📦', 'cancelled': '❌'
-        }
+    keyboard = [
+        [InlineKeyboardButton("📝 Подробнее", callback_data=ORDER_DETAIL.encode(order_id))],
+        [InlineKeyboardButton("🔙 Назад", callback_data="orders_all")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
 
-        for stat in status_stats:
-            emoji = status_emoji.get(stat['status'], '❓')
-            stats_text += f"{emoji} {stat['status']}: {stat['count']} ({stat['total']:.1f} AED)\n"
+    await query.edit_message_text(
+        f"✅ <b>Статус обновлен!</b>\n\n{format_order(order)}",
+        reply_markup=reply_markup,
+        parse_mode='HTML'
+    )
 
-        stats_text += f"\n📅 Сегодня: {today['count']} заказов ({today['total'] or 0:.1f} AED)"
 
-        await query.edit_message_text(stats_text, parse_mode='HTML')
+# === DELETE PRODUCT LIST (paged) ===
 
-    # === ORDER DETAILS ===
-    elif data.startswith("order_detail_"):
-        order_id = data.replace("order_detail_", "")
+@router.action("delete_product_list")
+async def delete_product_list(query, context):
+    """First page of the delete picker"""
+    await show_delete_picker(query, 0)
 
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-            agg_func = get_agg_func()
-            query_sql = f'''
-                SELECT o.*,
-                       {agg_func} as items_data
-                FROM orders o
-                LEFT JOIN order_items oi ON o.id = oi.order_id
-                WHERE o.id = {fix_query('?')}
-                GROUP BY o.id
-            '''
-            cursor.execute(query_sql, (order_id,))
-            order = cursor.fetchone()
 
-        if not order:
-            await query.edit_message_text("❌ Заказ не найден")
-            return
+@router.codec(PRODUCT_PAGE)
+async def product_picker_page(query, context, action: str, page: int):
+    """Another page of the delete picker (edit pages belong to the edit conversation)"""
+    if action == 'del':
+        await show_delete_picker(query, page)
 
-        order = dict(order)
 
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Подтвердить", callback_data=f"status_{order_id}_confirmed"),
-                InlineKeyboardButton("👨‍🍳 Готовится", callback_data=f"status_{order_id}_cooking")
-            ],
-            [
-                InlineKeyboardButton("🎉 Готов", callback_data=f"status_{order_id}_ready"),
-                InlineKeyboardButton("📦 Доставлен", callback_data=f"status_{order_id}_delivered")
-            ],
-            [
-                InlineKeyboardButton("❌ Отменить", callback_data=f"status_{order_id}_cancelled")
-            ],
-            [
-                InlineKeyboardButton("🔙 Назад", callback_data="orders_all")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+async def show_delete_picker(query, page: int):
+    """Edit the message with one page of the delete picker"""
+    picker = get_product_picker('del', page)
 
-        await query.edit_message_text(
-            format_order(order),
-            reply_markup=reply_markup,
-            parse_mode='HTML'
-        )
+    if not picker:
+        await query.edit_message_text("🍽️ Меню пустое, нечего удалять")
+        return
 
-    # === CHANGE ORDER STATUS ===
-    elif data.startswith("status_"):
-        parts = data.split("_")
-        order_id = parts[1]
-        new_status = parts[2]
-
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-            cursor.execute(
-                fix_query('UPDATE orders SET status = ?, created_at = CURRENT_TIMESTAMP WHERE id = ?'),
-                (new_status, order_id)
-            )
-            conn.commit()
-
-            agg_func = get_agg_func()
-            query_sql = f'''
-                SELECT o.*,
-                       {agg_func} as items_data
-                FROM orders o
-                LEFT JOIN order_items oi ON o.id = oi.order_id
-                WHERE o.id = {fix_query('?')}
-                GROUP BY o.id
-            '''
-            cursor.execute(query_sql, (order_id,))
-            order = dict(cursor.fetchone())
+    page, page_count, category_name, reply_markup = picker
+    await query.edit_message_text(
+        f"🗑️ <b>Удалить блюдо</b>\n\n"
+        f"📂 {category_name} · страница {page + 1} из {page_count}\n\n"
+        "Выберите блюдо для удаления:",
+        reply_markup=reply_markup,
+        parse_mode='HTML'
+    )
 
-        keyboard = [
-            [InlineKeyboardButton("📝 Подробнее", callback_data=f"order_detail_{order_id}")],
-            [InlineKeyboardButton("🔙 Назад", callback_data="orders_all")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
 
-        await query.edit_message_text(
-            f"✅ <b>Статус обновлен!</b>\n\n{format_order(order)}",
-            reply_markup=reply_markup,
-            parse_mode='HTML'
-        )
+# === CONFIRM DELETE PRODUCT ===
 
-    # === DELETE PRODUCT LIST ===
-    elif data == "delete_product_list":
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-            cursor.execute('SELECT id, name, category, price FROM products ORDER BY category, name LIMIT 20')
-            products = cursor.fetchall()
-
-        if not products:
-            await query.edit_message_text("🍽️ Меню пустое, нечего удалять")
-            return
-
-        keyboard = []
-        for p in products:
-            keyboard.append([InlineKeyboardButton(
-                f"🗑️ {p['name']} ({p['price']} AED)",
-                callback_data=f"delete_prod_{p['id']}"
-            )])
-        keyboard.append([InlineKeyboardButton("🔙 Отмена", callback_data="menu_manage")])
+@router.codec(DELETE_PRODUCT, LEGACY_DELETE_PRODUCT)
+async def delete_product_confirm(query, context, product_id: str):
+    """Delete a dish from the menu"""
+    product = get_product_by_id(product_id)
 
-        reply_markup = InlineKeyboardMarkup(keyboard)
+    if product:
+        delete_product(product_id)
         await query.edit_message_text(
-            "🗑️ <b>Удалить блюдо</b>\n\nВыберите блюдо для удаления:",
-            reply_markup=reply_markup,
+            f"✅ Блюдо <b>{product['name']}</b> удалено из меню",
             parse_mode='HTML'
         )
-
-    # === CONFIRM DELETE PRODUCT ===
-    elif data.startswith("delete_prod_"):
-        product_id = data.replace("delete_prod_", "")
-
-        with get_db() as conn:
-            cursor = get_cursor(conn)
-            cursor.execute(fix_query('SELECT name FROM products WHERE id = ?'), (product_id,))
-            product = cursor.fetchone()
-
-            if product:
-                cursor.execute(fix_query('DELETE FROM products WHERE id = ?'), (product_id,))
-                conn.commit()
-                await query.edit_message_text(
-                    f"✅ Блюдо <b>{product['name']}</b> удалено из меню",
-                    parse_mode='HTML'
-                )
-            else:
-                await query.edit_message_text("❌ Блюдо не найдено")
+    else:
+        await query.edit_message_text("❌ Блюдо не найдено")
@@ -8,15 +8,13 @@ from telegram.ext import ContextTypes
 from datetime import datetime
 
 from ..config import ADMIN_IDS
-from ..utils import is_admin, format_order
+from ..utils import is_admin
+from ..rendering import render_stats, render_products_list, split_message
+from .orders import build_orders_page
 
 # Import from root database module
 from database import db, get_all_orders, get_all_products
-
-try:
-    from psycopg2.extras import RealDictCursor
-except ImportError:
-    RealDictCursor = None
+from database.catalog import get_catalog
 
 
 def get_db():
@@ -26,7 +24,8 @@ def get_db():
 
 def get_cursor(conn):
     """Get cursor with dict support for both SQLite and PostgreSQL"""
-    if db.use_postgres and RealDictCursor:
+    if db.use_postgres:
+        from psycopg2.extras import RealDictCursor
         return conn.cursor(cursor_factory=RealDictCursor)
     else:
         conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
@@ -115,93 +114,25 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def orders_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle /orders command
-    Shows all recent orders (admin only)
+    Shows the first page of all orders in a single message (admin only)
     """
     if update.effective_user.id not in ADMIN_IDS:
         return
 
-    with get_db() as conn:
-        cursor = get_cursor(conn)
-        agg_func = get_agg_func()
-        cursor.execute(f'''
-            SELECT o.*,
-                   {agg_func} as items_data
-            FROM orders o
-            LEFT JOIN order_items oi ON o.id = oi.order_id
-            GROUP BY o.id
-            ORDER BY o.created_at DESC
-            LIMIT 10
-        ''')
-        orders = cursor.fetchall()
-
-    if not orders:
-        await update.message.reply_text("📭 Заказов пока нет")
-        return
-
-    await update.message.reply_text(
-        f"📦 <b>Последние {len(orders)} заказов:</b>",
-        parse_mode='HTML'
-    )
-
-    for order in orders:
-        keyboard = [
-            [InlineKeyboardButton("📝 Подробнее", callback_data=f"order_detail_{order['id']}")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        await update.message.reply_text(
-            format_order(order),
-            reply_markup=reply_markup,
-            parse_mode='HTML'
-        )
+    text, reply_markup = build_orders_page('a')
+    await update.message.reply_text(text, reply_markup=reply_markup, parse_mode='HTML')
 
 
 async def pending_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle /pending command
-    Shows all pending orders (admin only)
+    Shows the first page of pending orders in a single message (admin only)
     """
     if update.effective_user.id not in ADMIN_IDS:
         return
 
-    with get_db() as conn:
-        cursor = get_cursor(conn)
-        agg_func = get_agg_func()
-        cursor.execute(f'''
-            SELECT o.*,
-                   {agg_func} as items_data
-            FROM orders o
-            LEFT JOIN order_items oi ON o.id = oi.order_id
-            WHERE o.status = 'pending'
-            GROUP BY o.id
-            ORDER BY o.created_at DESC
-        ''')
-        orders = cursor.fetchall()
-
-    if not orders:
-        await update.message.reply_text("✅ Новых заказов нет")
-        return
-
-    await update.message.reply_text(
-        f"🕐 <b>Новых заказов: {len(orders)}</b>",
-        parse_mode='HTML'
-    )
-
-    for order in orders:
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Принять", callback_data=f"status_{order['id']}_confirmed"),
-                InlineKeyboardButton("❌ Отменить", callback_data=f"status_{order['id']}_cancelled")
-            ],
-            [InlineKeyboardButton("📝 Подробнее", callback_data=f"order_detail_{order['id']}")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        await update.message.reply_text(
-            format_order(order),
-            reply_markup=reply_markup,
-            parse_mode='HTML'
-        )
+    text, reply_markup = build_orders_page('p')
+    await update.message.reply_text(text, reply_markup=reply_markup, parse_mode='HTML')
 
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -235,33 +166,10 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         ''')
         today = cursor.fetchone()
 
-        cursor.execute('SELECT COUNT(*) as count FROM products')
+        cursor.execute('SELECT COUNT(*) as count FROM products WHERE active')
         total_products = cursor.fetchone()['count']
 
-    stats_text = f"""
-📊 <b>Статистика Home Food</b>
-
-📦 <b>Всего заказов:</b> {total_orders}
-🍽️ <b>Блюд в меню:</b> {total_products}
-💰 <b>Общая сумма:</b> {total_amount:.1f} AED
-
-<b>По статусам:</b>
-"""
-
-    status_emoji = {
-        'pending': '🕐',
-        'confirmed': '✅',
-        'cooking': '👨‍🍳',
-        'ready': '🎉',
-        'delivered': '📦',
-        'cancelled': '❌'
-    }
-
-    for stat in status_stats:
-        emoji = status_emoji.get(stat['status'], '❓')
-        stats_text += f"{emoji} {stat['status']}: {stat['count']} ({stat['total']:.1f} AED)\n"
-
-    stats_text += f"\n📅 <b>Сегодня:</b> {today['count']} заказов ({today['total'] or 0:.1f} AED)"
+    stats_text = render_stats(total_orders, total_products, total_amount, status_stats, today, template='command')
 
     await update.message.reply_text(stats_text, parse_mode='HTML')
 
@@ -274,30 +182,14 @@ async def products_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id not in ADMIN_IDS:
         return
 
-    with get_db() as conn:
-        cursor = get_cursor(conn)
-        cursor.execute('SELECT * FROM products ORDER BY category, name')
-        products = cursor.fetchall()
+    catalog = get_catalog()
 
-    if not products:
+    if not catalog.products:
         await update.message.reply_text("🍽️ Меню пока пустое. Используйте /addproduct для добавления блюд.")
         return
 
-    # Group by categories
-    categories = {}
-    for p in products:
-        cat = p['category'] or 'Без категории'
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(p)
-
-    text = "🍽️ <b>Все блюда в меню:</b>\n\n"
-
-    for cat, items in categories.items():
-        text += f"<b>📂 {cat.upper()}</b>\n"
-        for p in items:
-            text += f"• {p['name']} - {p['price']} AED\n"
-        text += "\n"
+    # Long menus are split into several messages; the buttons go on the last one
+    chunks = split_message(render_products_list(catalog))
 
     keyboard = [
         [InlineKeyboardButton("➕ Добавить блюдо", callback_data="add_product")],
@@ -305,4 +197,6 @@ async def products_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
 
-    await update.message.reply_text(text, parse_mode='HTML', reply_markup=reply_markup)
+    for chunk in chunks[:-1]:
+        await update.message.reply_text(chunk, parse_mode='HTML')
+    await update.message.reply_text(chunks[-1], parse_mode='HTML', reply_markup=reply_markup)
@@ -0,0 +1,122 @@
+"""
+Order Browser
+Paginated order lists rendered into a single message that is edited in place
+"""
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
+
+from ..utils import format_order
+from ..callback_data import ORDER_DETAIL, ORDER_STATUS, ORDER_PAGE
+
+from database import get_orders_page
+from database.cache import TTLCache, MISSING
+from database.events import subscribe, ORDER_EVENTS
+
+PAGE_SIZE = 5
+
+# Short filter keys keep callback_data well under Telegram's 64 byte limit
+ORDER_FILTERS = {
+    'a': (None, "📦 <b>Все заказы</b>", "📭 Заказов пока нет"),
+    'p': (['pending'], "🕐 <b>Новые заказы</b>", "✅ Новых заказов нет"),
+    'c': (['confirmed', 'cooking'], "👨‍🍳 <b>Заказы в работе</b>", "📭 Заказов в работе нет"),
+}
+
+# Entry callbacks of the admin menu -> filter key
+ORDER_LIST_CALLBACKS = {
+    'orders_all': 'a',
+    'all_orders': 'a',
+    'orders_pending': 'p',
+    'pending_orders': 'p',
+    'orders_cooking': 'c',
+}
+
+# Rendered pages: (filter, direction, cursor) -> (text, reply_markup)
+_page_cache = TTLCache(maxsize=128, ttl=30, name='order_pages')
+
+for _event in ORDER_EVENTS:
+    subscribe(_event, _page_cache.clear)
+
+
+def _order_buttons(filter_key: str, order: dict) -> list:
+    """Buttons for a single order in the list"""
+    order_id = order['id']
+    version = order.get('version', 1)
+    detail = InlineKeyboardButton(f"📝 #{order_id}", callback_data=ORDER_DETAIL.encode(order_id))
+
+    if filter_key == 'p':
+        return [
+            InlineKeyboardButton("✅ Принять", callback_data=ORDER_STATUS.encode(order_id, 'confirmed', version)),
+            InlineKeyboardButton("❌ Отменить", callback_data=ORDER_STATUS.encode(order_id, 'cancelled', version)),
+            detail,
+        ]
+    return [detail]
+
+
+def build_orders_page(filter_key: str = 'a', direction: str = '', cursor: str = ''):
+    """
+    Render one page of orders
+    Returns (text, reply_markup); results are cached until orders change
+    """
+    if filter_key not in ORDER_FILTERS:
+        filter_key = 'a'
+
+    cache_key = (filter_key, direction, cursor)
+    cached = _page_cache.get(cache_key)
+    if cached is not MISSING:
+        return cached
+
+    statuses, title, empty_text = ORDER_FILTERS[filter_key]
+    newer = direction == 'p'
+    orders, has_more = get_orders_page(
+        statuses,
+        cursor=cursor or None,
+        direction='newer' if newer else 'older',
+        limit=PAGE_SIZE,
+    )
+
+    if not orders:
+        if cursor:
+            # The boundary order vanished or the page emptied - start over
+            return build_orders_page(filter_key)
+        result = (empty_text, InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")]
+        ]))
+        _page_cache.set(cache_key, result)
+        return result
+
+    has_newer = has_more if newer else bool(cursor)
+    has_older = True if newer else has_more
+
+    cards = "\n\n".join(format_order(order) for order in orders)
+    text = f"{title}\n\n{cards}"
+
+    keyboard = [_order_buttons(filter_key, order) for order in orders]
+
+    nav_row = []
+    if has_newer:
+        nav_row.append(InlineKeyboardButton(
+            "◀️", callback_data=ORDER_PAGE.encode(filter_key, 'p', orders[0]['id'])
+        ))
+    if has_older:
+        nav_row.append(InlineKeyboardButton(
+            "▶️", callback_data=ORDER_PAGE.encode(filter_key, 'n', orders[-1]['id'])
+        ))
+    if nav_row:
+        keyboard.append(nav_row)
+    keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data="back_to_main")])
+
+    result = (text, InlineKeyboardMarkup(keyboard))
+    _page_cache.set(cache_key, result)
+    return result
+
+
+async def show_orders_page(query, filter_key: str = 'a', direction: str = '', cursor: str = ''):
+    """Edit the callback's message in place with the requested page"""
+    text, reply_markup = build_orders_page(filter_key, direction, cursor)
+    try:
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='HTML')
+    except BadRequest as e:
+        # Pressing the same page twice is not an error for the user
+        if 'not modified' not in str(e).lower():
+            raise
@@ -19,7 +19,9 @@ from ..constants import NAME, DESCRIPTION, PRICE, IMAGE, CATEGORY, INGREDIENTS,
 from ..constants import EDIT_SELECT_PRODUCT, EDIT_SELECT_FIELD, EDIT_NEW_VALUE, EDIT_CONFIRM
 
 # Import from root database module
-from database import add_product, get_all_products, edit_product
+from database import add_product, get_product_by_id, edit_product
+from ..keyboards import get_product_picker
+from ..callback_data import PRODUCT_PAGE
 
 
 async def add_product_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -27,26 +29,18 @@ async def add_product_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Start product addition conversation
     Entry point for adding a new product
     """
-    print("🔵 add_product_start CALLED!")
-    print(f"   Update type: {update.update_id}")
-    print(f"   User: {update.effective_user.id if update.effective_user else 'None'}")
-
     query = update.callback_query if update.callback_query else None
 
     if query:
-        print(f"   Callback data: {query.data}")
         await query.answer()
 
         if query.from_user.id not in ADMIN_IDS:
-            print("   ❌ Not admin")
             await query.edit_message_text("❌ Только для администраторов")
             return ConversationHandler.END
 
         message = query.message
     else:
-        print(f"   Command message")
         if update.effective_user.id not in ADMIN_IDS:
-            print("   ❌ Not admin")
             return ConversationHandler.END
         message = update.message
 
@@ -61,8 +55,6 @@ async def add_product_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Или /cancel - для отмены"
     )
 
-    print(f"   ✅ Sending response and returning NAME state")
-
     await message.reply_text(response_text, parse_mode='HTML')
 
     return NAME
@@ -403,7 +395,9 @@ def get_product_conversation_handler():
         fallbacks=[
             CommandHandler('cancel', cancel_product),
             CallbackQueryHandler(cancel_product, pattern='cancelproduct')
-        ]
+        ],
+        name='add_product',
+        persistent=True
     )
 
 
@@ -412,7 +406,7 @@ def get_product_conversation_handler():
 # ============================================================================
 
 async def edit_product_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Start editing a product - show list of all products"""
+    """Start editing a product - show the first page of the product picker"""
     query = update.callback_query if update.callback_query else None
 
     if query:
@@ -427,10 +421,9 @@ async def edit_product_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return ConversationHandler.END
         message = update.message
 
-    # Get all products
-    products = get_all_products()
+    picker = get_product_picker('edit')
 
-    if not products:
+    if not picker:
         text = "❌ Нет продуктов для редактирования"
         if query:
             await query.edit_message_text(text)
@@ -438,22 +431,7 @@ async def edit_product_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await message.reply_text(text)
         return ConversationHandler.END
 
-    # Create buttons for each product (max 3 per row)
-    keyboard = []
-    for i in range(0, len(products), 3):
-        row = []
-        for product in products[i:i+3]:
-            product_id = product['id']
-            product_name = product['name']
-            # Truncate long names
-            display_name = product_name[:20] + '...' if len(product_name) > 20 else product_name
-            row.append(InlineKeyboardButton(display_name, callback_data=f"editprod_{product_id}"))
-        keyboard.append(row)
-
-    keyboard.append([InlineKeyboardButton("❌ Отменить", callback_data="cancel_edit")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
-    text = "📝 <b>Редактирование продукта</b>\n\nВыберите продукт для редактирования:"
+    text, reply_markup = _edit_picker_message(picker)
 
     if query:
         await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='HTML')
@@ -463,6 +441,33 @@ async def edit_product_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     return EDIT_SELECT_PRODUCT
 
 
+def _edit_picker_message(picker):
+    """Text and keyboard for one page of the edit picker"""
+    page, page_count, category_name, reply_markup = picker
+    text = (
+        "📝 <b>Редактирование продукта</b>\n\n"
+        f"📂 {category_name} · страница {page + 1} из {page_count}\n\n"
+        "Выберите продукт для редактирования:"
+    )
+    return text, reply_markup
+
+
+async def edit_product_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Switch the edit picker to another page"""
+    query = update.callback_query
+    await query.answer()
+
+    page = PRODUCT_PAGE.decode(query.data.partition(':')[2])['page']
+    picker = get_product_picker('edit', page)
+    if not picker:
+        await query.edit_message_text("❌ Нет продуктов для редактирования")
+        return ConversationHandler.END
+
+    text, reply_markup = _edit_picker_message(picker)
+    await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='HTML')
+    return EDIT_SELECT_PRODUCT
+
+
 async def edit_select_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """User selected a product, now select which field to edit"""
     query = update.callback_query
@@ -472,8 +477,7 @@ async def edit_select_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data['edit_product_id'] = product_id
 
     # Get product details
-    products = get_all_products()
-    product = next((p for p in products if p['id'] == product_id), None)
+    product = get_product_by_id(product_id)
 
     if not product:
         await query.edit_message_text("❌ Продукт не найден")
@@ -672,6 +676,7 @@ def get_edit_product_conversation_handler():
         states={
             EDIT_SELECT_PRODUCT: [
                 CallbackQueryHandler(edit_select_field, pattern='^editprod_'),
+                CallbackQueryHandler(edit_product_page, pattern=f'^{PRODUCT_PAGE.tag}:edit:'),
                 CallbackQueryHandler(cancel_edit, pattern='^cancel_edit$')
             ],
             EDIT_SELECT_FIELD: [
@@ -689,5 +694,7 @@ def get_edit_product_conversation_handler():
         fallbacks=[
             CommandHandler('cancel', cancel_edit),
             CallbackQueryHandler(cancel_edit, pattern='^cancel_edit$')
-        ]
+        ],
+        name='edit_product',
+        persistent=True
     )
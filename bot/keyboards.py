@@ -3,7 +3,12 @@ Keyboard builders for Telegram Bot
 """
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from .constants import CATEGORIES
+from .constants import CATEGORIES, CATEGORY_NAMES
+from .callback_data import ORDER_STATUS, PRODUCT_PAGE, DELETE_PRODUCT
+
+from database.catalog import get_catalog
+from database.orders import allowed_transitions
+from database.events import subscribe, CATALOG_CHANGED
 
 
 def get_admin_main_keyboard():
@@ -55,16 +60,30 @@ def get_product_confirm_keyboard():
     return InlineKeyboardMarkup(keyboard)
 
 
-def get_order_status_keyboard(order_id: str):
-    """Get order status change keyboard"""
-    keyboard = [
-        [InlineKeyboardButton("✅ Подтвердить", callback_data=f"status_{order_id}_confirmed")],
-        [InlineKeyboardButton("👨‍🍳 Готовится", callback_data=f"status_{order_id}_cooking")],
-        [InlineKeyboardButton("🎉 Готов", callback_data=f"status_{order_id}_ready")],
-        [InlineKeyboardButton("📦 Доставлен", callback_data=f"status_{order_id}_delivered")],
-        [InlineKeyboardButton("❌ Отменить", callback_data=f"status_{order_id}_cancelled")],
-        [InlineKeyboardButton("◀️ Назад", callback_data="all_orders")],
+# Status change buttons, in workflow order
+STATUS_BUTTONS = {
+    'confirmed': "✅ Подтвердить",
+    'cooking': "👨‍🍳 Готовится",
+    'ready': "🎉 Готов",
+    'delivered': "📦 Доставлен",
+    'cancelled': "❌ Отменить",
+}
+
+
+def get_order_status_keyboard(order_id: str, status: str = None, version: int = 1, back: str = "all_orders"):
+    """
+    Get order status change keyboard
+    With the current status given, only allowed transitions are shown;
+    buttons carry the order version so stale presses are rejected
+    """
+    targets = allowed_transitions(status) if status else tuple(STATUS_BUTTONS)
+    buttons = [
+        InlineKeyboardButton(label, callback_data=ORDER_STATUS.encode(order_id, target, version))
+        for target, label in STATUS_BUTTONS.items()
+        if target in targets
     ]
+    keyboard = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+    keyboard.append([InlineKeyboardButton("◀️ Назад", callback_data=back)])
     return InlineKeyboardMarkup(keyboard)
 
 
@@ -88,3 +107,68 @@ def get_products_list_keyboard(products: list):
         ])
     keyboard.append([InlineKeyboardButton("◀️ Назад", callback_data="manage_products")])
     return InlineKeyboardMarkup(keyboard)
+
+
+# ===== PAGED PRODUCT PICKERS =====
+
+PRODUCT_PICKER_PAGE_SIZE = 8
+
+# action -> (button emoji, product callback_data builder, cancel callback)
+PRODUCT_PICKER_ACTIONS = {
+    'del': ("🗑️", DELETE_PRODUCT.encode, "menu_manage"),
+    'edit': ("✏️", lambda product_id: f"editprod_{product_id}", "cancel_edit"),
+}
+
+# (action, page) -> (page_index, page_count, category, reply_markup)
+_picker_cache = {}
+subscribe(CATALOG_CHANGED, lambda **payload: _picker_cache.clear())
+
+
+def _picker_pages(catalog) -> list:
+    """Split the catalog into pages that never mix categories"""
+    pages = []
+    for category, products in catalog.by_category.items():
+        for i in range(0, len(products), PRODUCT_PICKER_PAGE_SIZE):
+            pages.append((category, products[i:i + PRODUCT_PICKER_PAGE_SIZE]))
+    return pages
+
+
+def get_product_picker(action: str, page: int = 0):
+    """
+    Get one page of the product picker for the given action ('del' or 'edit')
+    Returns (page_index, page_count, category, reply_markup) or None if the menu is empty.
+    Keyboards are cached per page until the catalog changes.
+    """
+    cached = _picker_cache.get((action, page))
+    if cached:
+        return cached
+
+    pages = _picker_pages(get_catalog())
+    if not pages:
+        return None
+
+    page = max(0, min(page, len(pages) - 1))
+    category, products = pages[page]
+    emoji, product_data, cancel_data = PRODUCT_PICKER_ACTIONS[action]
+
+    keyboard = []
+    for product in products:
+        name = product['name']
+        display_name = name[:30] + '...' if len(name) > 30 else name
+        keyboard.append([InlineKeyboardButton(
+            f"{emoji} {display_name} ({product['price']} AED)",
+            callback_data=product_data(product['id'])
+        )])
+
+    nav_row = []
+    if page > 0:
+        nav_row.append(InlineKeyboardButton("◀️", callback_data=PRODUCT_PAGE.encode(action, page - 1)))
+    if page < len(pages) - 1:
+        nav_row.append(InlineKeyboardButton("▶️", callback_data=PRODUCT_PAGE.encode(action, page + 1)))
+    if nav_row:
+        keyboard.append(nav_row)
+    keyboard.append([InlineKeyboardButton("🔙 Отмена", callback_data=cancel_data)])
+
+    result = (page, len(pages), CATEGORY_NAMES.get(category, category or 'Без категории'), InlineKeyboardMarkup(keyboard))
+    _picker_cache[(action, page)] = result
+    return result
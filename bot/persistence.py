@@ -0,0 +1,185 @@
+"""
+Bot Persistence
+Keeps user_data and ConversationHandler states in the bot_persistence table,
+so in-progress add/edit product flows survive a redeploy
+
+Writes are buffered: PTB hands over changed data every update_interval seconds,
+unchanged entries are skipped and the rest is written in one transaction.
+user_data is loaded lazily - a user's row is read on their first update.
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+USER_NAMESPACE = 'user'
+CONVERSATION_PREFIX = 'conversation:'
+
+# Abandoned flows older than this are not restored after a restart
+CONVERSATION_MAX_AGE = 24 * 60 * 60
+
+
+def _conversation_namespace(name: str) -> str:
+    return f"{CONVERSATION_PREFIX}{name}"
+
+
+class DatabasePersistence(BasePersistence):
+    """BasePersistence backed by the main database (SQLite / PostgreSQL)"""
+
+    def __init__(self, update_interval: float = 60):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        # (namespace, item_key) -> serialized data, or None to delete
+        self._pending = {}
+        # (namespace, item_key) -> last serialized data known to be in the DB
+        self._written = {}
+        self._loaded_users = set()
+        self._write_task = None
+
+    # ===== STORAGE =====
+
+    def _stage(self, namespace: str, item_key: str, data):
+        """Buffer a write; skipped when the DB already holds the same data"""
+        key = (namespace, item_key)
+        serialized = None if data is None else json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+        if self._written.get(key) == serialized and key not in self._pending:
+            return
+        self._pending[key] = serialized
+
+        # All update_* calls of one PTB persistence run are gathered together,
+        # the task runs after them and writes the whole batch at once
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.get_running_loop().create_task(self._write_pending())
+
+    def _statements(self, pending: dict) -> list:
+        placeholder = db.get_placeholder()
+        now = time.time()
+        statements = []
+        for (namespace, item_key), serialized in pending.items():
+            if serialized is None:
+                statements.append((
+                    f"DELETE FROM bot_persistence WHERE namespace = {placeholder} AND item_key = {placeholder}",
+                    (namespace, item_key),
+                ))
+            else:
+                statements.append((
+                    f"""
+                    INSERT INTO bot_persistence (namespace, item_key, data, updated_at)
+                    VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder})
+                    ON CONFLICT (namespace, item_key)
+                    DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+                    """,
+                    (namespace, item_key, serialized, now),
+                ))
+        return statements
+
+    async def _write_pending(self):
+        while self._pending:
+            pending, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(db.execute_batch, self._statements(pending))
+            except Exception as e:
+                logger.warning("Persistence write failed (%d entries): %s", len(pending), e)
+                # Keep the batch for the next run, newer values win
+                pending.update(self._pending)
+                self._pending = pending
+                return
+            for key, serialized in pending.items():
+                if serialized is None:
+                    self._written.pop(key, None)
+                else:
+                    self._written[key] = serialized
+
+    def _load(self, namespace: str, item_key: str = None, newer_than: float = None) -> list:
+        placeholder = db.get_placeholder()
+        query = f"SELECT item_key, data FROM bot_persistence WHERE namespace = {placeholder}"
+        params = [namespace]
+        if item_key is not None:
+            query += f" AND item_key = {placeholder}"
+            params.append(item_key)
+        if newer_than is not None:
+            query += f" AND updated_at > {placeholder}"
+            params.append(newer_than)
+        rows = db.execute_query(query, tuple(params), fetch='all')
+        for row in rows:
+            self._written[(namespace, row['item_key'])] = row['data']
+        return rows
+
+    # ===== USER DATA =====
+
+    async def get_user_data(self) -> dict:
+        # Loaded per user in refresh_user_data
+        return {}
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        if user_id in self._loaded_users:
+            return
+        self._loaded_users.add(user_id)
+        rows = await asyncio.to_thread(self._load, USER_NAMESPACE, str(user_id))
+        if rows and not user_data:
+            user_data.update(json.loads(rows[0]['data']))
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._loaded_users.add(user_id)
+        self._stage(USER_NAMESPACE, str(user_id), data or None)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._stage(USER_NAMESPACE, str(user_id), None)
+
+    # ===== CONVERSATIONS =====
+
+    async def get_conversations(self, name: str) -> dict:
+        rows = await asyncio.to_thread(
+            self._load, _conversation_namespace(name), newer_than=time.time() - CONVERSATION_MAX_AGE
+        )
+        return {tuple(json.loads(row['item_key'])): json.loads(row['data']) for row in rows}
+
+    async def update_conversation(self, name: str, key: tuple, new_state) -> None:
+        self._stage(_conversation_namespace(name), json.dumps(list(key)), new_state)
+
+    # ===== NOT STORED =====
+
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    # ===== SHUTDOWN =====
+
+    async def flush(self) -> None:
+        """Write everything still buffered (called by Application.shutdown)"""
+        if self._write_task is not None and not self._write_task.done():
+            await self._write_task
+        if self._pending:
+            await self._write_pending()
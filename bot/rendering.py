@@ -0,0 +1,294 @@
+"""
+Message Rendering
+Precompiled Jinja2 templates for bot messages and order notifications
+
+Templates are compiled once at import. Order messages are memoized by
+(template, order id, order version), so rendering the same order for many
+admins or many list pages costs a single render.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+from jinja2 import Environment
+
+from .constants import STATUS_EMOJI, STATUS_NAMES
+
+from database.cache import TTLCache, MISSING
+
+# Telegram rejects messages longer than 4096 characters
+MAX_MESSAGE_LENGTH = 4096
+
+# Status line in customer notifications
+STATUS_TITLES = {
+    'pending': '🕐 Ожидает обработки',
+    'confirmed': '✅ Подтвержден',
+    'cooking': '👨‍🍳 Готовится',
+    'ready': '🎉 Готов к получению',
+    'delivered': '📦 Доставлен',
+    'cancelled': '❌ Отменен'
+}
+
+# Closing line of the status update notification
+STATUS_FOOTERS = {
+    'confirmed': "<b>Ваш заказ принят в работу!</b> Ожидайте начала приготовления.",
+    'cooking': "<b>Ваш заказ готовится!</b> Скоро всё будет готово 👨‍🍳",
+    'ready': "<b>Ваш заказ готов!</b> Ожидайте доставку 🎉",
+    'delivered': "<b>Приятного аппетита!</b> Спасибо за заказ! 😊",
+    'cancelled': "<b>Заказ отменен.</b> Если у вас есть вопросы, свяжитесь с поддержкой.",
+}
+
+
+@lru_cache(maxsize=4096)
+def _format_iso(value: str) -> str:
+    try:
+        return datetime.fromisoformat(value).strftime('%d.%m.%Y %H:%M')
+    except ValueError:
+        return value
+
+
+def format_datetime(value, default: str = 'Неизвестно') -> str:
+    """Format created_at (ISO string or datetime) as dd.mm.yyyy HH:MM"""
+    if not value:
+        return default
+    if isinstance(value, datetime):
+        return value.strftime('%d.%m.%Y %H:%M')
+    return _format_iso(str(value))
+
+
+def parse_items(items_data) -> list:
+    """Parse the aggregated items_data column into dicts"""
+    items = []
+    if not items_data:
+        return items
+    for item_str in items_data.split(','):
+        parts = item_str.split(':')
+        if len(parts) >= 4:
+            items.append({
+                'product_id': parts[0],
+                'product_name': parts[1],
+                'quantity': parts[2],
+                'price': parts[3],
+            })
+    return items
+
+
+_env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True, keep_trailing_newline=True)
+_env.filters['datetime'] = format_datetime
+_env.globals.update(
+    STATUS_EMOJI=STATUS_EMOJI,
+    STATUS_NAMES=STATUS_NAMES,
+    STATUS_TITLES=STATUS_TITLES,
+    STATUS_FOOTERS=STATUS_FOOTERS,
+)
+
+ORDER_CARD = _env.from_string("""\
+{% set status = order.status | default('pending') %}
+{{ STATUS_EMOJI.get(status, '❓') }} <b>Заказ #{{ order.id | default('N/A') }}</b>
+━━━━━━━━━━━━━━━
+👤 Клиент: {{ order.customer_name | default('Не указано') }}
+📞 Телефон: {{ order.customer_phone | default('Не указан') }}
+📍 Адрес: {{ order.customer_address | default('Не указан') }}
+
+💵 Сумма: {{ order.total_amount | default(0) }} AED
+📊 Статус: {{ STATUS_NAMES.get(status, status) }}
+🕐 Создан: {{ order.created_at | default('') | datetime }}""")
+
+ADMIN_NEW_ORDER = _env.from_string("""
+🔔 <b>НОВЫЙ ЗАКАЗ!</b>
+
+📋 <b>Заказ #{{ order.id }}</b>
+{{ STATUS_EMOJI.get(order.status | default('pending'), '🕐') }} <b>Статус:</b> Ожидает обработки
+
+👤 <b>Имя:</b> {{ order.customer_name | default('Не указано') }}
+📱 <b>Telegram:</b> {% if order.customer_telegram %}@{{ order.customer_telegram }}{% elif order.customer_telegram is defined %}{{ order.customer_telegram }}{% else %}Не указан{% endif %}
+
+📍 <b>Адрес:</b> {{ order.customer_address | default('Не указан') }}
+📞 <b>Телефон:</b> {{ order.customer_phone | default('Не указан') }}
+
+🛒 <b>Состав заказа:</b>
+{% for item in items %}
+  • {{ item.product_name }} x{{ item.quantity }} = {{ item.price }} AED
+{% endfor %}
+
+💰 <b>Итого:</b> {{ order.total_amount }} AED
+
+🕐 <b>Создан:</b> {{ order.created_at | datetime }}
+
+<b>Пожалуйста, обработайте заказ через /start</b>
+""")
+
+USER_NEW_ORDER = _env.from_string("""
+✅ <b>Ваш заказ создан!</b>
+
+📋 <b>Заказ #{{ order.id }}</b>
+{{ STATUS_EMOJI.get(order.status | default('pending'), '🕐') }} <b>Статус:</b> Ожидает подтверждения
+
+🛒 <b>Состав заказа:</b>
+{% for item in items %}
+  • {{ item.product_name }} x{{ item.quantity }} = {{ item.price }} AED
+{% endfor %}
+
+💰 <b>Итого:</b> {{ order.total_amount }} AED
+
+📍 <b>Адрес доставки:</b> {{ order.customer_address | default('Не указан') }}
+
+<b>Мы свяжемся с вами в ближайшее время!</b>
+Вы можете отслеживать статус заказа через /start → "Мои заказы"
+""")
+
+STATUS_UPDATE = _env.from_string("""
+📢 <b>Обновление статуса заказа</b>
+
+📋 <b>Заказ #{{ order.id }}</b>
+{% set status = order.status | default('pending') %}
+{{ STATUS_TITLES.get(status, status) }}
+
+🛒 <b>Состав:</b>
+{% for item in items %}
+  • {{ item.product_name }} x{{ item.quantity }}
+{% endfor %}
+
+💰 <b>Итого:</b> {{ order.total_amount }} AED
+
+📍 <b>Адрес:</b> {{ order.customer_address | default('Не указан') }}
+{% if status in STATUS_FOOTERS %}
+
+{{ STATUS_FOOTERS[status] | safe }}
+{% endif %}
+""")
+
+STATS = _env.from_string("""\
+📊 <b>Статистика</b>
+
+📦 Всего заказов: {{ total_orders }}
+🍽️ Блюд в меню: {{ total_products }}
+💰 Общая сумма: {{ '%.1f' | format(total_amount) }} AED
+
+<b>По статусам:</b>
+{% for stat in status_stats %}
+{{ STATUS_EMOJI.get(stat.status, '❓') }} {{ stat.status }}: {{ stat.count }} ({{ '%.1f' | format(stat.total or 0) }} AED)
+{% endfor %}
+
+📅 Сегодня: {{ today.count }} заказов ({{ '%.1f' | format(today.total or 0) }} AED)""")
+
+# /stats: the same numbers with the full title and bold labels
+STATS_COMMAND = _env.from_string("""\
+📊 <b>Статистика Home Food</b>
+
+📦 <b>Всего заказов:</b> {{ total_orders }}
+🍽️ <b>Блюд в меню:</b> {{ total_products }}
+💰 <b>Общая сумма:</b> {{ '%.1f' | format(total_amount) }} AED
+
+<b>По статусам:</b>
+{% for stat in status_stats %}
+{{ STATUS_EMOJI.get(stat.status, '❓') }} {{ stat.status }}: {{ stat.count }} ({{ '%.1f' | format(stat.total or 0) }} AED)
+{% endfor %}
+
+📅 <b>Сегодня:</b> {{ today.count }} заказов ({{ '%.1f' | format(today.total or 0) }} AED)""")
+
+_STATS_TEMPLATES = {'callback': STATS, 'command': STATS_COMMAND}
+
+STATS_SUMMARY = _env.from_string("""\
+📊 <b>Статистика заказов</b>
+━━━━━━━━━━━━━━━
+
+📦 Всего заказов: {{ total_orders }}
+💰 Общая выручка: {{ total_revenue }} AED
+
+<b>По статусам:</b>
+{% for status, count in by_status.items() %}
+{{ STATUS_EMOJI.get(status, '❓') }} {{ STATUS_NAMES.get(status, status) }}: {{ count }}
+{% endfor %}""")
+
+PRODUCTS_LIST = _env.from_string("""\
+🍽️ <b>Все блюда в меню:</b>
+
+{% for category, items in categories %}
+<b>📂 {{ (category or 'Без категории') | upper }}</b>
+{% for p in items %}
+• {{ p.name }} - {{ p.price }} AED
+{% endfor %}
+
+{% endfor %}""")
+
+# (template name, order id, order version) -> rendered text
+_order_renders = TTLCache(maxsize=2048, ttl=3600, name='order_renders')
+
+_ORDER_TEMPLATES = {
+    'card': ORDER_CARD,
+    'admin_new': ADMIN_NEW_ORDER,
+    'user_new': USER_NEW_ORDER,
+    'status_update': STATUS_UPDATE,
+}
+
+
+def order_version(order: dict):
+    """Version used as memoization key; falls back to status for rows without one"""
+    return order.get('version', order.get('status'))
+
+
+def render_order(template: str, order: dict) -> str:
+    """Render an order message, reusing the result for the same order version"""
+    order_id = order.get('id')
+    key = (template, order_id, order_version(order))
+    if order_id is not None:
+        cached = _order_renders.get(key)
+        if cached is not MISSING:
+            return cached
+
+    text = _ORDER_TEMPLATES[template].render(order=order, items=parse_items(order.get('items_data')))
+    if order_id is not None:
+        _order_renders.set(key, text)
+    return text
+
+
+def render_stats(total_orders, total_products, total_amount, status_stats, today,
+                 template: str = 'callback') -> str:
+    """Admin statistics message: 'callback' (stats button) or 'command' (/stats)"""
+    return _STATS_TEMPLATES[template].render(
+        total_orders=total_orders,
+        total_products=total_products,
+        total_amount=total_amount or 0,
+        status_stats=status_stats,
+        today=today,
+    )
+
+
+_products_list = {}
+
+
+def render_products_list(catalog) -> str:
+    """Menu listing grouped by category, rendered once per catalog snapshot"""
+    key = (id(catalog), catalog.loaded_at)
+    text = _products_list.get(key)
+    if text is None:
+        _products_list.clear()
+        text = _products_list[key] = PRODUCTS_LIST.render(categories=catalog.by_category.items()).strip()
+    return text
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> list:
+    """
+    Split text into chunks under Telegram's length limit
+    Splits on line boundaries and only cuts a line when it alone is too long
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks = []
+    current = ''
+    for line in text.split('\n'):
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        while len(line) > limit:
+            chunks.append(line[:limit])
+            line = line[limit:]
+        current = line
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,268 @@
+"""
+Callback Router
+Table-driven dispatch of inline button presses to handlers
+
+callback_data formats:
+- static actions ("stats", "menu_manage") - exact dict lookup
+- tagged payloads ("<tag>:<field>:<field>") - dict lookup by tag
+- legacy prefixes ("order_detail_<id>") - longest-prefix match in a trie,
+  kept so buttons on already-sent messages keep working
+
+Every lookup is O(1) or O(len(callback_data)), independent of the number of routes.
+
+Repeated presses of the same button by the same user are deduplicated: while
+a press is being handled, and for a short debounce window after it, duplicates
+are only answered (to stop the spinner) and then dropped - the message shows
+whatever the first press rendered.
+"""
+
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from database.instrumentation import query_scope
+from monitoring.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects callback_data longer than 64 bytes
+MAX_CALLBACK_DATA = 64
+
+# Seconds after a press completes during which the same press is ignored
+DEFAULT_DEBOUNCE = 1.0
+
+CALLBACK_SECONDS = Histogram('homefood_callback_duration_seconds', 'Callback handler latency', ('route',))
+CALLBACK_ERRORS = Counter('homefood_callback_errors_total', 'Callback handlers that raised', ('route',))
+CALLBACK_DEDUPLICATED = Counter('homefood_callback_deduplicated_total', 'Repeated presses dropped', ('route',))
+
+
+class CallbackCodec:
+    """
+    Typed, versioned callback_data codec
+    Encodes values as "<tag>:<v1>:<v2>"; later versions use "<tag>.<version>"
+    """
+
+    def __init__(self, tag: str, *fields: tuple, version: int = 1):
+        self.tag = tag if version == 1 else f"{tag}.{version}"
+        self.fields = fields
+        self.version = version
+
+    def encode(self, *values) -> str:
+        """Build callback_data from field values (in field order)"""
+        if len(values) != len(self.fields):
+            raise ValueError(f"{self.tag}: expected {len(self.fields)} values, got {len(values)}")
+        data = ':'.join([self.tag] + [str(v) for v in values])
+        if len(data.encode('utf-8')) > MAX_CALLBACK_DATA:
+            raise ValueError(f"callback_data too long: {data}")
+        return data
+
+    def decode(self, payload: str) -> dict:
+        """Parse the part after "<tag>:" into typed kwargs"""
+        if not self.fields:
+            return {}
+        # The last field takes the remainder, so it may contain ':'
+        parts = payload.split(':', len(self.fields) - 1)
+        if len(parts) != len(self.fields):
+            raise ValueError(f"{self.tag}: malformed payload {payload!r}")
+        return {name: type_(value) for (name, type_), value in zip(self.fields, parts)}
+
+
+class LegacyCodec:
+    """
+    Decoder for pre-router "<prefix><v1>_<v2>" callback_data
+    Used only to keep old buttons working; new buttons use CallbackCodec
+    """
+
+    def __init__(self, prefix: str, *fields: tuple, sep: str = '_'):
+        self.prefix = prefix
+        self.fields = fields
+        self.sep = sep
+
+    def decode(self, payload: str) -> dict:
+        if len(self.fields) == 1:
+            parts = [payload]
+        else:
+            parts = payload.split(self.sep, len(self.fields) - 1)
+        if len(parts) != len(self.fields):
+            raise ValueError(f"{self.prefix}: malformed payload {payload!r}")
+        return {name: type_(value) for (name, type_), value in zip(self.fields, parts)}
+
+
+class Route:
+    """A registered handler with its access rule and latency stats"""
+
+    def __init__(self, name: str, handler: Callable[..., Awaitable], admin_only: bool):
+        self.name = name
+        self.handler = handler
+        self.admin_only = admin_only
+        self.calls = 0
+        self.errors = 0
+        self.deduplicated = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float, failed: bool):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        CALLBACK_SECONDS.observe(seconds, route=self.name)
+        if failed:
+            self.errors += 1
+            CALLBACK_ERRORS.inc(route=self.name)
+
+
+class _TrieNode:
+    __slots__ = ('children', 'entry')
+
+    def __init__(self):
+        self.children = {}
+        self.entry = None
+
+
+class CallbackRouter:
+    """Registry of callback routes"""
+
+    def __init__(self, is_admin: Callable[[int], bool], on_forbidden: Optional[Callable[..., Awaitable]] = None,
+                 debounce: float = DEFAULT_DEBOUNCE):
+        self.is_admin = is_admin
+        self.on_forbidden = on_forbidden
+        self.debounce = debounce
+        self.routes = {}
+        # (user_id, callback_data) of presses being handled / when they finished
+        self._in_flight = set()
+        self._finished = {}
+        self._exact = {}
+        self._tagged = {}
+        self._legacy = _TrieNode()
+
+    def _route(self, name, handler, admin_only):
+        route = self.routes.get(name)
+        if route is None:
+            route = self.routes[name] = Route(name, handler, admin_only)
+        return route
+
+    def action(self, *names: str, admin_only: bool = True):
+        """Register a handler for static callback_data values"""
+        def decorator(handler):
+            route = self._route(handler.__name__, handler, admin_only)
+            for name in names:
+                self._exact[name] = route
+            return handler
+        return decorator
+
+    def codec(self, *codecs, admin_only: bool = True):
+        """Register a handler for one or more codecs (several versions / legacy formats)"""
+        def decorator(handler):
+            route = self._route(handler.__name__, handler, admin_only)
+            for codec in codecs:
+                if isinstance(codec, LegacyCodec):
+                    node = self._legacy
+                    for char in codec.prefix:
+                        node = node.children.setdefault(char, _TrieNode())
+                    node.entry = (codec, route)
+                else:
+                    self._tagged[codec.tag] = (codec, route)
+            return handler
+        return decorator
+
+    def resolve(self, data: str):
+        """Find (route, kwargs) for callback_data, or (None, None)"""
+        route = self._exact.get(data)
+        if route:
+            return route, {}
+
+        tag, sep, payload = data.partition(':')
+        if sep and tag in self._tagged:
+            codec, route = self._tagged[tag]
+            return route, codec.decode(payload)
+
+        # Longest legacy prefix match
+        node, match, depth = self._legacy, None, 0
+        for i, char in enumerate(data):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.entry:
+                match, depth = node.entry, i + 1
+        if match:
+            codec, route = match
+            return route, codec.decode(data[depth:])
+
+        return None, None
+
+    def _is_duplicate(self, key: tuple) -> bool:
+        """Same press is running or finished less than debounce seconds ago"""
+        if key in self._in_flight:
+            return True
+        finished_at = self._finished.get(key)
+        return finished_at is not None and time.monotonic() - finished_at < self.debounce
+
+    def _release(self, key: tuple):
+        self._in_flight.discard(key)
+        now = time.monotonic()
+        self._finished[key] = now
+        if len(self._finished) > 1024:
+            self._finished = {k: t for k, t in self._finished.items() if now - t < self.debounce}
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """CallbackQueryHandler entry point"""
+        query = update.callback_query
+        data = query.data or ''
+
+        try:
+            route, kwargs = self.resolve(data)
+        except ValueError as e:
+            await query.answer()
+            logger.warning("Bad callback_data %r: %s", query.data, e)
+            return
+
+        key = (query.from_user.id, data)
+        if self._is_duplicate(key):
+            # The first press is already updating this message
+            if route:
+                route.deduplicated += 1
+                CALLBACK_DEDUPLICATED.inc(route=route.name)
+            await query.answer()
+            return
+
+        # Registered before the first await so concurrent duplicates see it
+        self._in_flight.add(key)
+        try:
+            await query.answer()
+
+            if route is None:
+                return
+
+            if route.admin_only and not self.is_admin(query.from_user.id):
+                if self.on_forbidden:
+                    await self.on_forbidden(query, context)
+                return
+
+            started = time.perf_counter()
+            failed = False
+            try:
+                with query_scope(f"callback {route.name}"):
+                    await route.handler(query, context, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                route.observe(time.perf_counter() - started, failed)
+        finally:
+            self._release(key)
+
+    def stats(self) -> dict:
+        """Per-route call counts and latency"""
+        return {
+            name: {
+                'calls': route.calls,
+                'errors': route.errors,
+                'deduplicated': route.deduplicated,
+                'avg_ms': round(route.total_seconds / route.calls * 1000, 2) if route.calls else 0.0,
+                'max_ms': round(route.max_seconds * 1000, 2),
+            }
+            for name, route in self.routes.items()
+        }
@@ -5,8 +5,7 @@ Permissions, formatters, validators
 
 from telegram import Update
 from .config import ADMIN_IDS
-from .constants import STATUS_EMOJI, STATUS_NAMES
-from datetime import datetime
+from .rendering import render_order, STATS_SUMMARY
 
 
 # ===== PERMISSIONS =====
@@ -24,66 +23,18 @@ def format_order(order: dict) -> str:
     Format order for display
     Returns formatted string with emoji, status, items, total
     """
-    order_id = order.get('id', 'N/A')
-    status = order.get('status', 'pending')
-    emoji = STATUS_EMOJI.get(status, '❓')
-    status_name = STATUS_NAMES.get(status, status)
-
-    customer_name = order.get('customer_name', 'Не указано')
-    customer_phone = order.get('customer_phone', 'Не указан')
-    customer_address = order.get('customer_address', 'Не указан')
-    total = order.get('total_amount', 0)
-
-    # Parse created_at
-    created_str = order.get('created_at', '')
-    try:
-        if created_str:
-            created_dt = datetime.fromisoformat(created_str)
-            created_formatted = created_dt.strftime('%d.%m.%Y %H:%M')
-        else:
-            created_formatted = 'Неизвестно'
-    except:
-        created_formatted = str(created_str)
-
-    text = f"""
-{emoji} <b>Заказ #{order_id}</b>
-━━━━━━━━━━━━━━━
-👤 Клиент: {customer_name}
-📞 Телефон: {customer_phone}
-📍 Адрес: {customer_address}
-
-💵 Сумма: {total} AED
-📊 Статус: {status_name}
-🕐 Создан: {created_formatted}
-"""
-
-    return text.strip()
+    return render_order('card', order)
 
 
 def format_stats(stats: dict) -> str:
     """
     Format statistics for display
     """
-    total_orders = stats.get('total', 0)
-    by_status = stats.get('by_status', {})
-    total_revenue = stats.get('total_revenue', 0)
-
-    text = f"""
-📊 <b>Статистика заказов</b>
-━━━━━━━━━━━━━━━
-
-📦 Всего заказов: {total_orders}
-💰 Общая выручка: {total_revenue} AED
-
-<b>По статусам:</b>
-"""
-
-    for status, count in by_status.items():
-        emoji = STATUS_EMOJI.get(status, '❓')
-        name = STATUS_NAMES.get(status, status)
-        text += f"{emoji} {name}: {count}\n"
-
-    return text.strip()
+    return STATS_SUMMARY.render(
+        total_orders=stats.get('total', 0),
+        by_status=stats.get('by_status', {}),
+        total_revenue=stats.get('total_revenue', 0),
+    ).strip()
 
 
 # ===== VALIDATORS =====
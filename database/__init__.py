@@ -3,21 +3,46 @@ Database adapter for Home Food Abu Dhabi
 Supports SQLite (local development) and PostgreSQL (Railway production)
 """
 
+import logging
 import os
+import re
 import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional, Any
 from contextlib import contextmanager
 
+from monitoring.metrics import Counter, Gauge, Histogram
+
+from .events import publish, CATALOG_CHANGED
+from .instrumentation import InstrumentedConnection, add_hook
+
+logger = logging.getLogger(__name__)
+
 # Определяем тип базы данных
 DATABASE_URL = os.getenv("DATABASE_URL")
 USE_POSTGRES = DATABASE_URL is not None
 
-if USE_POSTGRES:
-    import psycopg2
-    from psycopg2.extras import RealDictCursor
-    print("Using PostgreSQL database")
-else:
-    print("Using SQLite database")
+# psycopg2 импортируется при первом соединении, только для PostgreSQL
+print(f"Using {'PostgreSQL' if USE_POSTGRES else 'SQLite'} database")
+
+QUERY_SECONDS = Histogram(
+    'homefood_db_query_duration_seconds', 'Database query duration by statement', ('statement',)
+)
+
+# Длительность каждого запроса (через InstrumentedCursor) - в /metrics
+add_hook(lambda record: QUERY_SECONDS.observe(record.seconds, statement=record.name))
+
+_STATEMENT_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+(\w+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def statement_name(query: str) -> str:
+    """Имя запроса для метрик: "<команда>_<таблица>" (select_orders, insert_order_items)"""
+    verb = query.split(None, 1)[0].lower() if query.strip() else 'empty'
+    match = _STATEMENT_TABLE.search(query)
+    return f"{verb}_{match.group(1).lower()}" if match else verb
 
 
 class DatabaseAdapter:
@@ -28,32 +53,79 @@ class DatabaseAdapter:
         self.use_postgres = USE_POSTGRES
         self.database_url = DATABASE_URL
 
-        # Инициализируем таблицы при создании
-        self.init_database()
+        # Схема применяется лениво: initialize() из lifespan приложения
+        # или автоматически при первом соединении
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+        # Счетчики соединений (пула нет - каждое соединение открывается на запрос)
+        self.connections_open = 0
+        self.connections_total = 0
+        self.connection_errors = 0
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+
+    def initialize(self):
+        """Применить миграции схемы (один раз за процесс)"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self.init_database()
+                self._initialized = True
 
     @contextmanager
     def get_connection(self):
-        """Получить соединение с базой данных"""
-        if self.use_postgres:
-            # PostgreSQL connection
-            conn = psycopg2.connect(self.database_url)
-            try:
-                yield conn
-            finally:
-                conn.close()
-        else:
-            # SQLite connection
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            try:
-                yield conn
-            finally:
-                conn.close()
+        """
+        Получить соединение с базой данных (схема применяется при первом вызове)
+        Курсоры соединения инструментированы: см. database/instrumentation.py
+        """
+        if not self._initialized:
+            self.initialize()
+        with self.connect() as conn:
+            yield InstrumentedConnection(conn, self.use_postgres)
 
-    def execute_query(self, query: str, params: tuple = (), fetch: str = None):
+    @contextmanager
+    def connect(self):
+        """Соединение без проверки схемы (для миграций)"""
+        try:
+            if self.use_postgres:
+                # PostgreSQL connection
+                import psycopg2
+                conn = psycopg2.connect(self.database_url)
+            else:
+                # SQLite connection
+                conn = sqlite3.connect(self.db_path)
+                conn.row_factory = sqlite3.Row
+        except Exception:
+            self.connection_errors += 1
+            raise
+
+        self.connections_open += 1
+        self.connections_total += 1
+        try:
+            yield conn
+        finally:
+            self.connections_open -= 1
+            conn.close()
+
+    def connection_stats(self) -> dict:
+        """Счетчики соединений: открыто сейчас / всего / ошибок"""
+        return {
+            'open': self.connections_open,
+            'total': self.connections_total,
+            'errors': self.connection_errors,
+        }
+
+    def execute_query(self, query: str, params: tuple = (), fetch: str = None, commit: bool = False,
+                      name: str = None):
         """
         Выполнить SQL запрос
         fetch: None (no fetch), 'one', 'all'
+        commit: зафиксировать транзакцию и при fetch (для INSERT/UPDATE ... RETURNING)
+        name: имя запроса в метриках (по умолчанию - из текста запроса)
         """
         with self.get_connection() as conn:
             if self.use_postgres:
@@ -62,149 +134,53 @@ class DatabaseAdapter:
             else:
                 cursor = conn.cursor()
 
-            cursor.execute(query, params)
+            cursor.execute(query, params, name=name)
 
             if fetch == 'one':
                 result = cursor.fetchone()
-                return dict(result) if result else None
+                result = dict(result) if result else None
             elif fetch == 'all':
-                results = cursor.fetchall()
-                return [dict(row) for row in results]
+                result = [dict(row) for row in cursor.fetchall()]
             else:
                 conn.commit()
-                return cursor.lastrowid if not self.use_postgres else cursor.rowcount
+                result = cursor.lastrowid if not self.use_postgres else cursor.rowcount
 
-    def init_database(self):
-        """Инициализировать таблицы базы данных"""
-        print("Initializing database tables...")
+            if fetch and commit:
+                conn.commit()
+            return result
 
-        # Таблица продуктов (с поддержкой обеих схем: main.py и bot.py)
-        if self.use_postgres:
-            products_table = """
-            CREATE TABLE IF NOT EXISTS products (
-                id VARCHAR(50) PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                description TEXT,
-                price DECIMAL(10, 2) NOT NULL,
-                image VARCHAR(500),
-                category VARCHAR(100),
-                ingredients TEXT
-            )
-            """
-        else:
-            products_table = """
-            CREATE TABLE IF NOT EXISTS products (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                description TEXT,
-                price REAL NOT NULL,
-                image TEXT,
-                category TEXT,
-                ingredients TEXT
-            )
-            """
-
-        # Таблица заказов
-        if self.use_postgres:
-            orders_table = """
-            CREATE TABLE IF NOT EXISTS orders (
-                id VARCHAR(50) PRIMARY KEY,
-                customer_name VARCHAR(255) NOT NULL,
-                customer_phone VARCHAR(50) NOT NULL,
-                customer_address TEXT,
-                customer_telegram VARCHAR(100),
-                user_telegram_id BIGINT,
-                total_amount DECIMAL(10, 2) NOT NULL,
-                status VARCHAR(50) DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-        else:
-            orders_table = """
-            CREATE TABLE IF NOT EXISTS orders (
-                id TEXT PRIMARY KEY,
-                customer_name TEXT NOT NULL,
-                customer_phone TEXT NOT NULL,
-                customer_address TEXT,
-                customer_telegram TEXT,
-                user_telegram_id INTEGER,
-                total_amount REAL NOT NULL,
-                status TEXT DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-
-        # Таблица элементов заказа
-        if self.use_postgres:
-            order_items_table = """
-            CREATE TABLE IF NOT EXISTS order_items (
-                id SERIAL PRIMARY KEY,
-                order_id VARCHAR(50) NOT NULL,
-                product_id VARCHAR(50) NOT NULL,
-                product_name VARCHAR(255),
-                quantity INTEGER NOT NULL,
-                price DECIMAL(10, 2) NOT NULL,
-                FOREIGN KEY (order_id) REFERENCES orders (id),
-                FOREIGN KEY (product_id) REFERENCES products (id)
-            )
-            """
-        else:
-            order_items_table = """
-            CREATE TABLE IF NOT EXISTS order_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id TEXT NOT NULL,
-                product_id TEXT NOT NULL,
-                product_name TEXT,
-                quantity INTEGER NOT NULL,
-                price REAL NOT NULL,
-                FOREIGN KEY (order_id) REFERENCES orders (id),
-                FOREIGN KEY (product_id) REFERENCES products (id)
-            )
-            """
-
-        # Таблица модерации
-        if self.use_postgres:
-            moderation_table = """
-            CREATE TABLE IF NOT EXISTS activity_moderation (
-                id SERIAL PRIMARY KEY,
-                user_id VARCHAR(100) NOT NULL,
-                username VARCHAR(255),
-                first_name VARCHAR(255),
-                last_name VARCHAR(255),
-                action_type VARCHAR(100) NOT NULL,
-                details TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ip_address VARCHAR(50)
-            )
-            """
-        else:
-            moderation_table = """
-            CREATE TABLE IF NOT EXISTS activity_moderation (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                action_type TEXT NOT NULL,
-                details TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ip_address TEXT
-            )
-            """
-
-        # Создаем таблицы
+    def execute_batch(self, statements: list):
+        """
+        Выполнить несколько запросов в одной транзакции
+        statements: список (query, params)
+        """
+        if not statements:
+            return
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(products_table)
-            cursor.execute(orders_table)
-            cursor.execute(order_items_table)
-            cursor.execute(moderation_table)
-            conn.commit()
-
-        print("Database tables initialized successfully")
+            try:
+                for query, params in statements:
+                    cursor.execute(query, params)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
-        # Проверяем, есть ли продукты, если нет - добавляем стартовые
-        self.seed_initial_products()
+    def init_database(self):
+        """Привести схему к актуальной версии (миграции из database/migrations)"""
+        from .migrations import run_migrations
+        applied = run_migrations(self)
+        if applied:
+            print(f"Database schema updated: {applied} migration(s) applied")
+
+    def ensure_column(self, cursor, table: str, column: str, definition: str):
+        """Добавить колонку в существующую таблицу, если ее еще нет"""
+        if self.use_postgres:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}")
+            return
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
 
     def get_placeholder(self, index: int = 1) -> str:
         """Получить placeholder для параметров (? для SQLite, %s для PostgreSQL)"""
@@ -220,89 +196,43 @@ class DatabaseAdapter:
         else:
             return ""
 
-    def seed_initial_products(self):
-        """Заполнить базу начальными продуктами если пусто"""
-        try:
-            # Проверяем количество продуктов
-            count_query = "SELECT COUNT(*) as count FROM products"
-            result = self.execute_query(count_query, fetch='one')
-
-            if result and result['count'] == 0:
-                print("📦 Database is empty, adding initial products...")
-
-                products = [
-                    ("1", "Домашние пельмени", "Сочные пельмени с говядиной и свининой, как в России", 25.0,
-                     "https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=150&q=80&fm=webp&fit=crop",
-                     "pelmeni", '["Мука", "Яйцо", "Говядина", "Свинина", "Лук"]'),
-
-                    ("2", "Узбекский плов", "Настоящий узбекский плов с бараниной и специями", 30.0,
-                     "https://images.unsplash.com/photo-1596040033229-a0b3b7f5c777?w=150&q=80&fm=webp&fit=crop",
-                     "plov", '["Рис", "Баранина", "Морковь", "Лук", "Чеснок"]'),
-
-                    ("3", "Домашний борщ", "Украинский борщ с говядиной и сметаной", 18.0,
-                     "https://images.unsplash.com/photo-1571064247530-4146bc1a081b?w=150&q=80&fm=webp&fit=crop",
-                     "soup", '["Свекла", "Говядина", "Капуста", "Картофель"]'),
-
-                    ("4", "Хачапури по-аджарски", "Грузинский хачапури с сыром и яйцом", 22.0,
-                     "https://images.unsplash.com/photo-1627662235973-4d265e175fc1?w=150&q=80&fm=webp&fit=crop",
-                     "khachapuri", '["Мука", "Сыр", "Яйцо", "Молоко"]'),
-
-                    ("5", "Домашний бургер", "Сочный бургер с говяжьей котлетой и свежими овощами", 35.0,
-                     "https://images.unsplash.com/photo-1568901346375-23c9450c58cd?w=150&q=80&fm=webp&fit=crop",
-                     "burger", '["Булочка", "Говядина", "Сыр", "Салат", "Помидор"]'),
-
-                    ("6", "Пицца Маргарита", "Классическая итальянская пицца с моцареллой и базиликом", 28.0,
-                     "https://images.unsplash.com/photo-1565299624946-b28f40a0ca4b?w=150&q=80&fm=webp&fit=crop",
-                     "pizza", '["Тесто", "Томатный соус", "Моцарелла", "Базилик"]'),
-                ]
-
-                placeholder = self.get_placeholder()
-                insert_query = f"""
-                INSERT INTO products (id, name, description, price, image, category, ingredients)
-                VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
-                """
-
-                for product in products:
-                    self.execute_query(insert_query, product)
-                    print(f"  ✅ Added: {product[1]} ({product[5]})")
-
-                print(f"✅ Added {len(products)} initial products to database")
-            else:
-                try:
-                    print(f"✓ Database already has {result['count']} products")
-                except UnicodeEncodeError:
-                    print(f"Database already has {result['count']} products")
-
-        except Exception as e:
-            try:
-                print(f"⚠️ Error seeding initial products: {e}")
-            except UnicodeEncodeError:
-                print(f"Error seeding initial products: {e}")
-            import traceback
-            traceback.print_exc()
+    def get_items_aggregate(self) -> str:
+        """Агрегация позиций заказа в строку items_data (STRING_AGG / GROUP_CONCAT)"""
+        if self.use_postgres:
+            return "STRING_AGG(oi.product_id || ':' || oi.product_name || ':' || oi.quantity || ':' || oi.price || ':', ',')"
+        else:
+            return "GROUP_CONCAT(oi.product_id || ':' || oi.product_name || ':' || oi.quantity || ':' || oi.price || ':')"
 
 
-# Создаем глобальный экземпляр адаптера
+# Глобальный экземпляр адаптера (без соединения с БД до первого запроса)
 db = DatabaseAdapter()
 
+# Соединения: пула нет, поэтому "утилизация" - сколько соединений открыто сейчас
+Gauge('homefood_db_connections_open', 'Database connections currently open',
+      function=lambda: db.connections_open)
+Counter('homefood_db_connections_total', 'Database connections opened',
+        function=lambda: db.connections_total)
+Counter('homefood_db_connection_errors_total', 'Failed database connection attempts',
+        function=lambda: db.connection_errors)
+
 
 # Удобные функции для работы с базой данных
 def get_all_products():
-    """Получить все продукты"""
-    return db.execute_query("SELECT * FROM products ORDER BY id", fetch='all')
+    """Получить все продукты (кроме удаленных)"""
+    return db.execute_query("SELECT * FROM products WHERE active ORDER BY id", fetch='all')
 
 
 def get_product_by_id(product_id: int):
-    """Получить продукт по ID"""
+    """Получить продукт по ID (None, если удален)"""
     placeholder = db.get_placeholder()
-    query = f"SELECT * FROM products WHERE id = {placeholder}"
+    query = f"SELECT * FROM products WHERE id = {placeholder} AND active"
     return db.execute_query(query, (product_id,), fetch='one')
 
 
 def get_products_by_category(category: str):
     """Получить продукты по категории"""
     placeholder = db.get_placeholder()
-    query = f"SELECT * FROM products WHERE category = {placeholder} ORDER BY id"
+    query = f"SELECT * FROM products WHERE active AND category = {placeholder} ORDER BY id"
     return db.execute_query(query, (category,), fetch='all')
 
 
@@ -335,12 +265,9 @@ def add_product(name: str, description: str, price: float, image: str,
 
     # Выполняем запрос
     db.execute_query(query, params)
+    publish(CATALOG_CHANGED, product_id=product_id)
 
-    # Логирование для отладки
-    try:
-        print(f"Product added to DB: ID={product_id}, Name={name}, Category={category}")
-    except UnicodeEncodeError:
-        print(f"Product added: {product_id}")
+    logger.info("Product added", extra={'product_id': product_id, 'product_name': name, 'category': category})
 
     return product_id
 
@@ -356,20 +283,70 @@ def edit_product(product_id: str, field: str, value):
 
     query = f"UPDATE products SET {field} = {placeholder} WHERE id = {placeholder}"
     db.execute_query(query, (value, product_id))
+    publish(CATALOG_CHANGED, product_id=product_id)
 
-    try:
-        print(f"Product {product_id} updated: {field} = {value}")
-    except UnicodeEncodeError:
-        print(f"Product {product_id} updated: {field}")
+    logger.info("Product updated", extra={'product_id': product_id, 'field': field})
 
     return True
 
 
 def delete_product(product_id: int):
-    """Удалить продукт"""
+    """
+    Удалить продукт из меню
+    Строка остается надгробием (active = false): на нее ссылаются order_items,
+    а дельта каталога сообщает клиентам об удалении
+    """
+    placeholder = db.get_placeholder()
+    query = f"UPDATE products SET active = {placeholder} WHERE id = {placeholder} AND active"
+    result = db.execute_query(query, (False, product_id))
+    publish(CATALOG_CHANGED, product_id=product_id)
+
+    logger.info("Product deleted", extra={'product_id': product_id})
+    return result
+
+
+# Сколько хранится надгробие удаленного продукта, без заказов (дни)
+TOMBSTONE_TTL_DAYS = int(os.getenv("PRODUCT_TOMBSTONE_TTL_DAYS", "30"))
+
+# Как часто удалять старые надгробия (секунды)
+TOMBSTONE_PURGE_INTERVAL = int(os.getenv("PRODUCT_TOMBSTONE_PURGE_INTERVAL", str(6 * 60 * 60)))
+
+
+def purge_product_tombstones() -> int:
+    """
+    Физически удалить надгробия старше TOMBSTONE_TTL_DAYS - и после удаления
+    из бота, и после импорта с delete_missing. Продукты из заказов остаются навсегда.
+    Клиенты с копией каталога старше удаленных надгробий получают каталог
+    целиком (catalog_state.min_version, триггер на products)
+    """
     placeholder = db.get_placeholder()
-    query = f"DELETE FROM products WHERE id = {placeholder}"
-    return db.execute_query(query, (product_id,))
+    # CURRENT_TIMESTAMP в триггерах - UTC
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=TOMBSTONE_TTL_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            DELETE FROM products
+            WHERE NOT active AND updated_at < {placeholder}
+              AND NOT EXISTS (SELECT 1 FROM order_items oi WHERE oi.product_id = products.id)
+        """, (cutoff,))
+        purged = cursor.rowcount
+        conn.commit()
+
+    if purged:
+        logger.info("Product tombstones purged", extra={'purged': purged})
+    return purged
+
+
+async def purge_tombstones_periodically():
+    """Задача lifespan: purge_product_tombstones() раз в TOMBSTONE_PURGE_INTERVAL, вне event loop"""
+    # asyncio импортируется здесь: скриптам, которым нужна только БД, он не нужен
+    import asyncio
+    while True:
+        try:
+            await asyncio.to_thread(purge_product_tombstones)
+        except Exception:
+            logger.exception("Product tombstone purge failed")
+        await asyncio.sleep(TOMBSTONE_PURGE_INTERVAL)
 
 
 def create_order(user_id: str, user_name: str, user_phone: str, items: str,
@@ -409,11 +386,58 @@ def get_order_by_id(order_id: int):
     return db.execute_query(query, (order_id,), fetch='one')
 
 
-def update_order_status(order_id: int, status: str):
-    """Обновить статус заказа"""
+def get_orders_page(statuses: Optional[list] = None, cursor: Optional[str] = None,
+                    direction: str = 'older', limit: int = 5):
+    """
+    Получить страницу заказов (keyset-пагинация по created_at, id)
+    cursor: ID заказа-границы; direction: 'older' - заказы после него, 'newer' - до него
+    Возвращает (orders, has_more) - orders всегда от новых к старым
+    """
     placeholder = db.get_placeholder()
-    query = f"UPDATE orders SET status = {placeholder} WHERE id = {placeholder}"
-    return db.execute_query(query, (status, order_id))
+    conditions = []
+    params = []
+
+    if statuses:
+        conditions.append(f"o.status IN ({', '.join([placeholder] * len(statuses))})")
+        params.extend(statuses)
+
+    newer = direction == 'newer'
+    if cursor:
+        op = '>' if newer else '<'
+        conditions.append(
+            f"(o.created_at, o.id) {op} "
+            f"(SELECT created_at, id FROM orders WHERE id = {placeholder})"
+        )
+        params.append(cursor)
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = 'ASC' if newer else 'DESC'
+
+    query = f"""
+    SELECT o.*, {db.get_items_aggregate()} as items_data
+    FROM orders o
+    LEFT JOIN order_items oi ON o.id = oi.order_id
+    {where_clause}
+    GROUP BY o.id
+    ORDER BY o.created_at {order}, o.id {order}
+    LIMIT {int(limit) + 1}
+    """
+    rows = db.execute_query(query, tuple(params), fetch='all')
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if newer:
+        rows.reverse()
+    return rows, has_more
+
+
+def update_order_status(order_id: int, status: str, version: int = None):
+    """
+    Обновить статус заказа с проверкой допустимого перехода (и версии, если передана)
+    Возвращает обновленный заказ; см. database.orders.transition_order_status
+    """
+    from .orders import transition_order_status
+    return transition_order_status(order_id, status, expected_version=version)
 
 
 def log_activity(user_id: str, username: str, first_name: str, last_name: str,
@@ -0,0 +1,92 @@
+"""
+In-memory кэши с ограничением размера и временем жизни
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from monitoring.metrics import Counter, Gauge
+
+MISSING = object()
+
+# Именованные кэши (name -> TTLCache) - для метрик
+_caches = {}
+
+
+class TTLCache:
+    """
+    LRU-кэш с TTL
+    Хранит не больше maxsize записей, каждая живет ttl секунд
+    Считает попадания и промахи (hits / misses)
+    С именем (name) попадает в метрики /metrics
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0, name: str = None):
+        if name is not None:
+            _caches[name] = self
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Получить значение или default, если записи нет или она устарела"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Сохранить значение, вытеснив самую старую запись при переполнении"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """Удалить запись (если есть)"""
+        self._data.pop(key, None)
+
+    def clear(self, *args, **kwargs):
+        """Очистить кэш (можно подписывать напрямую на события)"""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Размер и доля попаданий"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+
+def named_caches() -> dict:
+    """Все именованные кэши процесса"""
+    return dict(_caches)
+
+
+# Доля попаданий считается в Prometheus: hits / (hits + misses)
+Counter('homefood_cache_hits_total', 'Cache hits', ('cache',),
+        function=lambda: {(name,): cache.hits for name, cache in _caches.items()})
+Counter('homefood_cache_misses_total', 'Cache misses', ('cache',),
+        function=lambda: {(name,): cache.misses for name, cache in _caches.items()})
+Gauge('homefood_cache_entries', 'Cache entries', ('cache',),
+      function=lambda: {(name,): len(cache) for name, cache in _caches.items()})
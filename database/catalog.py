@@ -0,0 +1,235 @@
+"""
+In-memory снимок каталога (меню)
+Загружается лениво и сбрасывается при любом изменении продуктов
+
+Ингредиенты разбираются из JSON один раз при загрузке и получают номера
+(ingredient_key - нормализованное название). Для каждого ингредиента и каждой
+категории хранится битовое множество позиций продуктов, для каждого продукта -
+битовая маска его ингредиентов: фильтры include / exclude и счетчики фасетов
+считаются побитовыми операциями над int, без JSON и без БД.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from .events import publish, subscribe, CATALOG_CHANGED
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Как часто снимок сверяет версию каталога с БД (изменения из других процессов,
+# например import_catalog.py); изменения в этом процессе сбрасывают снимок сразу
+CATALOG_CHECK_SECONDS = float(os.getenv("CATALOG_CHECK_SECONDS", "5"))
+
+
+def ingredient_key(name: str) -> str:
+    """Ингредиент для сравнения: "Лук жарёный " и "лук жареный" - один ингредиент"""
+    return ' '.join(tokenize(name))
+
+
+def _parse_ingredients(product: dict) -> list:
+    value = product.get('ingredients')
+    if not value:
+        return []
+    try:
+        names = json.loads(value)
+    except (TypeError, ValueError) as e:
+        logger.warning("Failed to parse ingredients of product %s: %s", product.get('id'), e)
+        return []
+    return [str(name) for name in names] if isinstance(names, list) else []
+
+
+def _positions(bits: int):
+    """Номера установленных битов по возрастанию"""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+class Catalog:
+    """Неизменяемый снимок всех продуктов"""
+
+    def __init__(self, products: list, version: int = 0):
+        # Порядок как в меню: по категории, затем по названию
+        self.products = sorted(products, key=lambda p: ((p.get('category') or ''), p.get('name') or ''))
+        self.by_id = {p['id']: p for p in self.products}
+        self.by_category = {}
+        for product in self.products:
+            self.by_category.setdefault(product.get('category') or '', []).append(product)
+        self.version = version
+        self.loaded_at = time.time()
+        self.checked_at = time.monotonic()
+
+        self.ingredients = {}           # id продукта -> список ингредиентов (как в меню)
+        self.ingredient_names = []      # номер ингредиента -> название (первое написание)
+        self.ingredient_products = []   # номер ингредиента -> биты позиций продуктов
+        self.ingredient_masks = {}      # id продукта -> биты его ингредиентов
+        self.category_products = {}     # категория (нижний регистр) -> биты позиций продуктов
+        self.all_products = (1 << len(self.products)) - 1
+        self._ingredient_bits = {}      # ingredient_key -> номер ингредиента
+
+        for position, product in enumerate(self.products):
+            names = _parse_ingredients(product)
+            self.ingredients[product['id']] = names
+            product_bit = 1 << position
+            category = (product.get('category') or '').lower()
+            self.category_products[category] = self.category_products.get(category, 0) | product_bit
+            mask = 0
+            for name in names:
+                key = ingredient_key(name)
+                if not key:
+                    continue
+                bit = self._ingredient_bits.get(key)
+                if bit is None:
+                    bit = self._ingredient_bits[key] = len(self.ingredient_names)
+                    self.ingredient_names.append(name.strip())
+                    self.ingredient_products.append(0)
+                self.ingredient_products[bit] |= product_bit
+                mask |= 1 << bit
+            self.ingredient_masks[product['id']] = mask
+
+    def get(self, product_id: str) -> Optional[dict]:
+        """Продукт по ID без обращения к БД"""
+        return self.by_id.get(str(product_id))
+
+    def __len__(self):
+        return len(self.products)
+
+    def ingredient_mask(self, names, strict: bool = True) -> Optional[int]:
+        """
+        Биты ингредиентов по названиям
+        strict: None, если какого-то ингредиента нет в меню (иначе он пропускается)
+        """
+        mask = 0
+        for name in names:
+            bit = self._ingredient_bits.get(ingredient_key(name))
+            if bit is None:
+                if strict:
+                    return None
+                continue
+            mask |= 1 << bit
+        return mask
+
+    def select(self, category: str = None, include=(), exclude=()) -> int:
+        """
+        Биты позиций продуктов под фильтр: категория, все ингредиенты include,
+        ни одного из exclude (неизвестные в меню ингредиенты exclude не мешают)
+        """
+        selected = self.category_products.get(category.lower(), 0) if category else self.all_products
+        for name in include:
+            bit = self._ingredient_bits.get(ingredient_key(name))
+            if bit is None:
+                return 0
+            selected &= self.ingredient_products[bit]
+        for name in exclude:
+            bit = self._ingredient_bits.get(ingredient_key(name))
+            if bit is not None:
+                selected &= ~self.ingredient_products[bit]
+        return selected
+
+    def matches(self, product_id: str, include_mask: int = 0, exclude_mask: int = 0) -> bool:
+        """Подходит ли продукт под маски ингредиентов (см. ingredient_mask)"""
+        mask = self.ingredient_masks.get(str(product_id), 0)
+        return mask & include_mask == include_mask and not mask & exclude_mask
+
+    def products_in(self, selected: int) -> list:
+        """Продукты по битам позиций (порядок меню)"""
+        return [self.products[position] for position in _positions(selected)]
+
+    def facets(self, selected: int) -> list:
+        """Сколько выбранных продуктов содержит каждый ингредиент: [(название, число)], частые первыми"""
+        counts = []
+        for bit, products in enumerate(self.ingredient_products):
+            count = (products & selected).bit_count()
+            if count:
+                counts.append((self.ingredient_names[bit], count))
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts
+
+
+_catalog = None
+
+
+def _current_version(db) -> int:
+    row = db.execute_query("SELECT version FROM catalog_state WHERE id = 1", fetch='one')
+    return row['version'] if row else 0
+
+
+def get_catalog() -> Catalog:
+    """Получить текущий снимок каталога (загружается при первом обращении)"""
+    global _catalog
+    from . import db
+
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - catalog.checked_at >= CATALOG_CHECK_SECONDS:
+        catalog.checked_at = time.monotonic()
+        if _current_version(db) != catalog.version:
+            # Каталог изменил другой процесс - сбрасываем снимок и все кэши каталога
+            publish(CATALOG_CHANGED, product_id=None)
+            catalog = _catalog
+
+    if catalog is None:
+        # Версия читается до продуктов: изменение между запросами даст лишнюю перезагрузку, не потерю
+        version = _current_version(db)
+        catalog = _catalog = Catalog(db.execute_query("SELECT * FROM products WHERE active", fetch='all'), version)
+    return catalog
+
+
+def catalog_age() -> Optional[float]:
+    """Возраст снимка в секундах (None - еще не загружен)"""
+    catalog = _catalog
+    return None if catalog is None else time.time() - catalog.loaded_at
+
+
+def get_catalog_changes(since: int) -> dict:
+    """
+    Изменения каталога после версии since (миграции 0008_catalog_version, 0009_product_soft_delete)
+    {'version': текущая версия, 'reset': клиенту нужен весь каталог,
+     'products': измененные продукты, 'deleted': ID удаленных}
+    """
+    from . import db
+    placeholder = db.get_placeholder()
+
+    with db.get_connection() as conn:
+        if db.use_postgres:
+            from psycopg2.extras import RealDictCursor
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+        else:
+            cursor = conn.cursor()
+
+        # Версия читается первой: изменение, закоммиченное между запросами,
+        # придет еще раз в следующей дельте, но не потеряется
+        cursor.execute("SELECT version, min_version FROM catalog_state WHERE id = 1")
+        row = cursor.fetchone()
+        version, min_version = (row['version'], row['min_version']) if row else (0, 0)
+
+        # since из будущего - база пересоздана; старше min_version - надгробия,
+        # которых клиент не видел, уже удалены. В обоих случаях копия клиента недействительна
+        reset = since <= 0 or since > version or since < min_version
+        deleted = []
+        if reset:
+            cursor.execute("SELECT * FROM products WHERE active")
+            products = [dict(row) for row in cursor.fetchall()]
+        else:
+            cursor.execute(f"SELECT * FROM products WHERE version > {placeholder}", (since,))
+            products = []
+            for row in cursor.fetchall():
+                if row['active']:
+                    products.append(dict(row))
+                else:
+                    deleted.append(row['id'])
+
+    return {'version': version, 'reset': reset, 'products': products, 'deleted': deleted}
+
+
+def invalidate_catalog(**payload):
+    """Сбросить снимок - следующий get_catalog() перечитает БД"""
+    global _catalog
+    _catalog = None
+
+
+subscribe(CATALOG_CHANGED, invalidate_catalog)
@@ -0,0 +1,324 @@
+"""
+Массовый импорт каталога
+Файл меню (CSV / JSON / YAML) сравнивается с таблицей products по естественному
+ключу (по умолчанию - название), и вставки, изменения и удаления применяются
+одной транзакцией пачками: execute_values на PostgreSQL, executemany на SQLite.
+Повторный импорт того же файла ничего не меняет. Удаление - мягкое (active = false),
+продукт из файла с названием удаленного восстанавливается. Сравниваются только
+поля, которые есть в файле: остальные у существующих продуктов не меняются.
+
+    diff = import_catalog(read_catalog('menu.yaml'), dry_run=True)
+    print(diff.report())
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+
+from .events import publish, CATALOG_CHANGED
+
+logger = logging.getLogger(__name__)
+
+# Поля продукта, которые задает файл (id - только если ключ импорта id)
+FIELDS = ('name', 'description', 'price', 'image', 'category', 'ingredients')
+
+KEYS = ('name', 'id')
+
+# Значения полей, которых нет в файле, для новых продуктов; у существующих
+# такие поля не меняются (CSV только с name,price обновляет одни цены)
+DEFAULTS = {'description': '', 'image': '', 'category': '', 'ingredients': '[]'}
+
+# Поля, которые пишет UPDATE: файл + восстановление удаленного продукта
+UPDATE_FIELDS = FIELDS + ('active',)
+
+
+class CatalogImportError(ValueError):
+    """Файл каталога не прошел проверку - в БД ничего не записано"""
+
+
+class CatalogDiff:
+    """Что импорт меняет в каталоге"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.inserts = []       # новые продукты (с id)
+        self.updates = []       # (id, {поле: новое значение}, {поле: старое значение})
+        self.deletes = []       # продукты, которых нет в файле (или дубликаты по ключу) - станут надгробиями
+        self.kept = []          # нет в файле, но удаление не запрошено
+        self.unchanged = 0
+        self.applied = False
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserts or self.updates or self.deletes)
+
+    def summary(self) -> dict:
+        return {
+            'insert': len(self.inserts), 'update': len(self.updates), 'delete': len(self.deletes),
+            'unchanged': self.unchanged, 'not_in_file': len(self.kept),
+        }
+
+    def report(self) -> str:
+        """Отчет построчно (для --dry-run)"""
+        lines = []
+        for product in self.inserts:
+            lines.append(f"+ {product['name']} ({product['category']}, {product['price']})")
+        for product_id, new, old in self.updates:
+            changes = ', '.join(f"{field}: {_short(old[field])} -> {_short(value)}" for field, value in new.items())
+            lines.append(f"~ {old['name']} [{product_id}] {changes}")
+        for product in self.deletes:
+            lines.append(f"- {product['name']} [{product['id']}]")
+        for product in self.kept:
+            lines.append(f"? {product['name']} [{product['id']}] нет в файле (удалить: delete_missing)")
+        summary = self.summary()
+        lines.append(
+            f"{'Применено' if self.applied else 'План'}: +{summary['insert']} ~{summary['update']} "
+            f"-{summary['delete']}, без изменений {summary['unchanged']}"
+        )
+        return '\n'.join(lines)
+
+
+def _short(value, width: int = 40) -> str:
+    text = str(value)
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+
+# ===== ЧТЕНИЕ ФАЙЛА =====
+
+def read_catalog(path: str) -> list:
+    """
+    Продукты из файла: .csv (строка заголовка с полями), .json / .yaml / .yml
+    (список объектов или {"products": [...]})
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if extension == '.csv':
+            return list(csv.DictReader(f))
+        if extension == '.json':
+            data = json.load(f)
+        elif extension in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise CatalogImportError("YAML требует PyYAML: pip install pyyaml")
+            data = yaml.safe_load(f)
+        else:
+            raise CatalogImportError(f"Неизвестный формат файла: {path} (csv, json, yaml)")
+    if isinstance(data, dict):
+        data = data.get('products', [])
+    if not isinstance(data, list):
+        raise CatalogImportError("Ожидается список продуктов")
+    return data
+
+
+def _ingredients(value) -> str:
+    """Ингредиенты в формате БД - JSON-список строк"""
+    if value is None or value == '':
+        return '[]'
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith('['):
+            value = json.loads(value)
+        else:
+            # CSV: "Мясо; Лук; Тесто"
+            value = [part.strip() for part in value.split(';') if part.strip()]
+    return json.dumps([str(item) for item in value], ensure_ascii=False)
+
+
+def normalize(items: list, key: str = 'name') -> list:
+    """
+    Проверить и привести продукты к формату таблицы; ошибки - CatalogImportError со всеми строками
+    Поля, которых нет в файле (колонки CSV, ключи JSON / YAML), в продукт не попадают
+    """
+    products = []
+    errors = []
+    seen = set()
+    for number, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            errors.append(f"#{number}: ожидается объект")
+            continue
+        name = str(item.get('name') or '').strip()
+        product = {
+            'id': str(item.get('id') or '').strip() or None,
+            'name': name,
+        }
+        for field in ('description', 'image', 'category'):
+            if field in item:
+                product[field] = str(item[field] or '').strip()
+        try:
+            product['price'] = round(float(item.get('price')), 2)
+            if product['price'] < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors.append(f"#{number} {name or '?'}: неверная цена {item.get('price')!r}")
+            continue
+        try:
+            if 'ingredients' in item:
+                product['ingredients'] = _ingredients(item['ingredients'])
+        except (TypeError, ValueError):
+            errors.append(f"#{number} {name}: неверные ингредиенты {item.get('ingredients')!r}")
+            continue
+        if not name:
+            errors.append(f"#{number}: нет названия")
+            continue
+        natural_key = product[key]
+        if not natural_key:
+            errors.append(f"#{number} {name}: нет {key}")
+            continue
+        if natural_key in seen:
+            errors.append(f"#{number} {name}: {key} повторяется в файле")
+            continue
+        seen.add(natural_key)
+        products.append(product)
+    if errors:
+        raise CatalogImportError("Каталог не импортирован:\n" + '\n'.join(errors))
+    return products
+
+
+# ===== СРАВНЕНИЕ =====
+
+def _stable_id(name: str, taken: set) -> str:
+    """ID нового продукта из названия: один и тот же во всех окружениях"""
+    digest = hashlib.sha1(name.encode('utf-8')).hexdigest()
+    for start in range(0, len(digest) - 8):
+        product_id = digest[start:start + 8]
+        if product_id not in taken:
+            return product_id
+    raise CatalogImportError(f"Не удалось подобрать ID для {name}")
+
+
+def _same(field: str, current, new) -> bool:
+    if field == 'price':
+        return current is not None and round(float(current), 2) == new
+    if field == 'ingredients':
+        try:
+            return json.loads(current or '[]') == json.loads(new)
+        except ValueError:
+            return False
+    return (current or '') == new
+
+
+def plan_import(current: list, products: list, key: str = 'name', delete_missing: bool = False) -> CatalogDiff:
+    """Сравнить продукты из БД (current) с нормализованными продуктами файла"""
+    diff = CatalogDiff(key)
+    by_key = {}
+    deleted = {}
+    for row in sorted(current, key=lambda r: str(r['id'])):
+        row = dict(row)
+        if not row.get('active', True):
+            # Надгробие: восстанавливается, если продукт снова есть в файле
+            deleted.setdefault(row[key], row)
+        elif row[key] in by_key:
+            # Дубликаты прошлых перезапусков скриптов: остается один
+            (diff.deletes if delete_missing else diff.kept).append(row)
+        else:
+            by_key[row[key]] = row
+
+    taken = {str(row['id']) for row in current}
+    for product in products:
+        row = by_key.pop(product[key], None) or deleted.get(product[key])
+        if row is None:
+            product = {**DEFAULTS, **product}
+            product['id'] = product['id'] or _stable_id(product['name'], taken)
+            taken.add(product['id'])
+            diff.inserts.append(product)
+            continue
+        new = {field: product[field] for field in FIELDS
+               if field in product and not _same(field, row.get(field), product[field])}
+        if not row.get('active', True):
+            new['active'] = True
+        if new:
+            diff.updates.append((row['id'], new, row))
+        else:
+            diff.unchanged += 1
+
+    for row in by_key.values():
+        (diff.deletes if delete_missing else diff.kept).append(row)
+    return diff
+
+
+# ===== ПРИМЕНЕНИЕ =====
+
+def _apply(cursor, db, diff: CatalogDiff):
+    placeholder = db.get_placeholder()
+    columns = ('id',) + FIELDS
+    inserts = [tuple(product[column] for column in columns) for product in diff.inserts]
+
+    if db.use_postgres:
+        from psycopg2.extras import execute_values
+        if inserts:
+            execute_values(cursor, f"INSERT INTO products ({', '.join(columns)}) VALUES %s", inserts)
+        if diff.updates:
+            # Одна команда на все изменения: UPDATE ... FROM (VALUES ...)
+            rows = [(product_id,) + tuple(new.get(field, old.get(field)) for field in FIELDS) + (True,)
+                    for product_id, new, old in diff.updates]
+            execute_values(cursor, f"""
+                UPDATE products SET {', '.join(f'{field} = v.{field}' for field in UPDATE_FIELDS)}
+                FROM (VALUES %s) AS v ({', '.join(('id',) + UPDATE_FIELDS)})
+                WHERE products.id = v.id
+            """, rows, template="(%s, %s, %s, %s::numeric, %s, %s, %s, %s)")
+        if diff.deletes:
+            cursor.execute("UPDATE products SET active = FALSE WHERE id = ANY(%s)",
+                           ([row['id'] for row in diff.deletes],))
+    else:
+        if inserts:
+            cursor.executemany(
+                f"INSERT INTO products ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})",
+                inserts
+            )
+        if diff.updates:
+            cursor.executemany(
+                f"UPDATE products SET {', '.join(f'{field} = {placeholder}' for field in UPDATE_FIELDS)} "
+                f"WHERE id = {placeholder}",
+                [tuple(new.get(field, old.get(field)) for field in FIELDS) + (True, product_id)
+                 for product_id, new, old in diff.updates]
+            )
+        if diff.deletes:
+            cursor.executemany(f"UPDATE products SET active = {placeholder} WHERE id = {placeholder}",
+                               [(False, row['id']) for row in diff.deletes])
+
+
+def import_catalog(items: list, key: str = 'name', delete_missing: bool = False,
+                   dry_run: bool = False) -> CatalogDiff:
+    """
+    Привести таблицу products к списку items (одна транзакция)
+    key: естественный ключ сравнения - 'name' или 'id'
+    delete_missing: удалить (мягко) продукты, которых нет в items, и дубликаты по ключу
+    dry_run: только посчитать изменения
+    """
+    from . import db
+
+    if key not in KEYS:
+        raise CatalogImportError(f"Ключ импорта: {', '.join(KEYS)}")
+    products = normalize(items, key)
+
+    db.initialize()
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        if db.use_postgres:
+            # Два одновременных импорта не должны вставить одно и то же дважды
+            cursor.execute("LOCK TABLE products IN SHARE ROW EXCLUSIVE MODE")
+        else:
+            cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(f"SELECT id, {', '.join(UPDATE_FIELDS)} FROM products")
+        names = [column[0] for column in cursor.description]
+        current = [dict(zip(names, row)) for row in cursor.fetchall()]
+
+        diff = plan_import(current, products, key, delete_missing)
+        if dry_run or not diff.changed:
+            conn.rollback()
+            return diff
+
+        try:
+            _apply(cursor, db, diff)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        diff.applied = True
+
+    publish(CATALOG_CHANGED, product_id=None)
+    logger.info("Catalog imported", extra=diff.summary())
+    return diff
@@ -0,0 +1,41 @@
+"""
+Простая in-process шина событий
+Используется для инвалидации кэшей при изменении заказов и каталога
+"""
+
+import logging
+from collections import defaultdict
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# События заказов
+ORDER_CREATED = 'order_created'
+ORDER_STATUS_CHANGED = 'order_status_changed'
+ORDER_DELETED = 'order_deleted'
+
+ORDER_EVENTS = (ORDER_CREATED, ORDER_STATUS_CHANGED, ORDER_DELETED)
+
+# Любое изменение меню (добавление, редактирование, удаление блюда)
+CATALOG_CHANGED = 'catalog_changed'
+
+_subscribers = defaultdict(list)
+
+
+def subscribe(event: str, handler: Callable):
+    """Подписать handler(**payload) на событие"""
+    if handler not in _subscribers[event]:
+        _subscribers[event].append(handler)
+    return handler
+
+
+def publish(event: str, **payload):
+    """
+    Опубликовать событие всем подписчикам
+    Ошибка одного подписчика не мешает остальным
+    """
+    for handler in list(_subscribers.get(event, ())):
+        try:
+            handler(**payload)
+        except Exception:
+            logger.exception("Event handler error", extra={'event': event})
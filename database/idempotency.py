@@ -0,0 +1,93 @@
+"""
+Ключи идемпотентности
+Повтор запроса с тем же ключом получает сохраненный ответ вместо повторного выполнения
+
+Ключ резервируется до выполнения запроса (INSERT ... ON CONFLICT DO NOTHING),
+поэтому два одновременных повтора не выполнятся оба.
+"""
+
+import time
+from typing import Optional
+
+# Сколько хранится ключ (сутки - с запасом на повторы из плохой сети)
+KEY_TTL = 24 * 60 * 60
+
+# Как часто удалять просроченные ключи
+PURGE_INTERVAL = 10 * 60
+
+_last_purge = 0.0
+
+
+class IdempotencyMismatch(ValueError):
+    """Ключ уже использован для другого запроса"""
+
+
+class IdempotencyInProgress(Exception):
+    """Запрос с этим ключом еще выполняется"""
+
+
+def _purge_expired(db, now: float):
+    global _last_purge
+    if now - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = now
+    db.execute_query(
+        f"DELETE FROM idempotency_keys WHERE expires_at < {db.get_placeholder()}", (now,)
+    )
+
+
+def reserve_key(key: str, request_hash: str) -> Optional[str]:
+    """
+    Зарезервировать ключ под запрос
+    Возвращает None, если ключ новый (запрос нужно выполнить),
+    или сохраненный ответ, если запрос уже выполнен
+    Бросает IdempotencyMismatch / IdempotencyInProgress
+    """
+    from . import db
+    placeholder = db.get_placeholder()
+    now = time.time()
+    _purge_expired(db, now)
+
+    reserved = db.execute_query(
+        f"""
+        INSERT INTO idempotency_keys (idempotency_key, request_hash, created_at, expires_at)
+        VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder})
+        ON CONFLICT (idempotency_key) DO NOTHING
+        RETURNING idempotency_key
+        """,
+        (key, request_hash, now, now + KEY_TTL), fetch='one', commit=True
+    )
+    if reserved:
+        return None
+
+    existing = db.execute_query(
+        f"SELECT request_hash, response, expires_at FROM idempotency_keys WHERE idempotency_key = {placeholder}",
+        (key,), fetch='one'
+    )
+    if existing is None or existing['expires_at'] < now:
+        # Ключ освободился или просрочен - забираем его заново
+        release_key(key)
+        return reserve_key(key, request_hash)
+    if existing['request_hash'] != request_hash:
+        raise IdempotencyMismatch(key)
+    if existing['response'] is None:
+        raise IdempotencyInProgress(key)
+    return existing['response']
+
+
+def complete_key(key: str, response: str):
+    """Сохранить ответ выполненного запроса"""
+    from . import db
+    placeholder = db.get_placeholder()
+    db.execute_query(
+        f"UPDATE idempotency_keys SET response = {placeholder} WHERE idempotency_key = {placeholder}",
+        (response, key)
+    )
+
+
+def release_key(key: str):
+    """Освободить ключ (запрос упал - клиент может повторить его с тем же ключом)"""
+    from . import db
+    db.execute_query(
+        f"DELETE FROM idempotency_keys WHERE idempotency_key = {db.get_placeholder()}", (key,)
+    )
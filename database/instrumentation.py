@@ -0,0 +1,267 @@
+"""
+Инструментирование SQL-запросов
+Каждый execute на соединении из db.get_connection() идет через InstrumentedCursor:
+имя запроса, число параметров, длительность и число строк передаются хукам (add_hook)
+
+Встроено:
+- журнал медленных запросов (дольше SLOW_QUERY_MS) с планом EXPLAIN
+- query_scope() - учет запросов одного HTTP-запроса / нажатия кнопки: предупреждение
+  о N+1 (один и тот же запрос много раз) и бюджет запросов, который можно проверить в тестах
+
+    with query_scope('create order', max_queries=5, strict=True) as queries:
+        ...
+    assert not queries.repeated()
+"""
+
+import contextvars
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Запросы дольше этого попадают в журнал медленных запросов (с EXPLAIN)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+
+# План одного и того же запроса снимается не чаще, чем раз в EXPLAIN_INTERVAL секунд
+EXPLAIN_INTERVAL = 5 * 60
+
+# Одинаковый запрос столько раз за один scope - N+1
+N_PLUS_ONE_THRESHOLD = 3
+
+# Бюджет запросов scope по умолчанию (превышение - предупреждение)
+DEFAULT_MAX_QUERIES = 20
+
+_EXPLAINABLE = ('select', 'insert', 'update', 'delete', 'with')
+
+
+class QueryRecord:
+    """Один выполненный запрос"""
+
+    __slots__ = ('name', 'query', 'params', 'seconds', 'rows')
+
+    def __init__(self, name: str, query: str, params: int, seconds: float, rows: int):
+        self.name = name
+        self.query = query
+        self.params = params
+        self.seconds = seconds
+        # Для SELECT дополняется по мере чтения строк (fetchone / fetchall)
+        self.rows = rows
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """В scope выполнено больше запросов, чем разрешено"""
+
+
+_hooks = []
+
+
+def add_hook(hook: Callable[[QueryRecord], None]) -> Callable:
+    """Вызывать hook(record) после каждого запроса (метрики, трассировка)"""
+    _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook: Callable):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+# ===== SCOPES =====
+
+class QueryScope:
+    """Запросы, выполненные в рамках одного HTTP-запроса или update"""
+
+    def __init__(self, label: str, max_queries: Optional[int] = DEFAULT_MAX_QUERIES, parent=None):
+        self.label = label
+        self.max_queries = max_queries
+        self.parent = parent
+        self.records = []
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def seconds(self) -> float:
+        return sum(record.seconds for record in self.records)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict:
+        """Запросы (по тексту SQL), выполненные threshold и более раз: {name: count}"""
+        counts = Counter(record.query for record in self.records)
+        names = {record.query: record.name for record in self.records}
+        return {names[query]: count for query, count in counts.items() if count >= threshold}
+
+    def over_budget(self) -> bool:
+        return self.max_queries is not None and self.count > self.max_queries
+
+    def report(self):
+        """Предупредить о N+1 и превышении бюджета"""
+        for name, count in self.repeated().items():
+            logger.warning("N+1 in %s: %s x%d", self.label, name, count,
+                           extra={'scope': self.label, 'statement': name, 'count': count})
+        if self.over_budget():
+            logger.warning("Query budget exceeded in %s: %d queries (max %d)", self.label, self.count,
+                           self.max_queries, extra={'scope': self.label, 'queries': self.count,
+                                                    'ms': round(self.seconds * 1000)})
+
+
+_current_scope = contextvars.ContextVar('query_scope', default=None)
+
+
+@contextmanager
+def query_scope(label: str, max_queries: Optional[int] = DEFAULT_MAX_QUERIES, strict: bool = False):
+    """
+    Учитывать запросы внутри блока (вложенные scope учитываются и во внешних)
+    strict: бросить QueryBudgetExceeded при превышении max_queries (для тестов)
+    """
+    scope = QueryScope(label, max_queries, parent=_current_scope.get())
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        scope.report()
+    if strict and scope.over_budget():
+        raise QueryBudgetExceeded(f"{label}: {scope.count} queries, max {max_queries}")
+
+
+def current_scope() -> Optional[QueryScope]:
+    return _current_scope.get()
+
+
+# ===== CURSOR =====
+
+_explained_at = {}
+
+
+def _statement_name(query: str) -> str:
+    from . import statement_name
+    return statement_name(query)
+
+
+class InstrumentedCursor:
+    """Обертка курсора DB-API: замеряет execute и считает строки"""
+
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._connection = connection
+        self._record = None
+
+    def execute(self, query: str, params=None, name: str = None):
+        started = time.perf_counter()
+        if params is None:
+            # Без параметров драйвер не трогает '%' в тексте запроса (psycopg2)
+            self._cursor.execute(query)
+        else:
+            self._cursor.execute(query, params)
+        self._finish(query, len(params or ()), name, time.perf_counter() - started, params or ())
+        return self
+
+    def executemany(self, query: str, seq_of_params, name: str = None):
+        seq_of_params = list(seq_of_params)
+        started = time.perf_counter()
+        self._cursor.executemany(query, seq_of_params)
+        params = len(seq_of_params[0]) * len(seq_of_params) if seq_of_params else 0
+        self._finish(query, params, name, time.perf_counter() - started, None)
+        return self
+
+    def _finish(self, query: str, params: int, name: Optional[str], seconds: float, explain_params):
+        # У SELECT rowcount неизвестен (SQLite) - строки считаются при чтении
+        rows = 0 if self._cursor.description is not None else max(self._cursor.rowcount, 0)
+        record = self._record = QueryRecord(name or _statement_name(query), query, params, seconds, rows)
+
+        scope = _current_scope.get()
+        while scope is not None:
+            scope.records.append(record)
+            scope = scope.parent
+
+        for hook in _hooks:
+            try:
+                hook(record)
+            except Exception:
+                logger.exception("Query hook %r failed", hook)
+
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            self._log_slow(record, explain_params)
+
+    def _log_slow(self, record: QueryRecord, params):
+        fields = {'statement': record.name, 'ms': round(record.seconds * 1000, 1), 'params': record.params}
+        now = time.monotonic()
+        if (params is not None and now - _explained_at.get(record.name, -EXPLAIN_INTERVAL) >= EXPLAIN_INTERVAL
+                and record.query.split(None, 1)[0].lower() in _EXPLAINABLE):
+            _explained_at[record.name] = now
+            try:
+                fields['plan'] = self._connection.explain(record.query, params)
+            except Exception as e:
+                fields['plan_error'] = str(e)
+        logger.warning("Slow query %s: %.0f ms", record.name, record.seconds * 1000, extra=fields)
+
+    def _count(self, rows: int):
+        if self._record is not None:
+            self._record.rows += rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._count(1)
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Обертка соединения: cursor() возвращает InstrumentedCursor, остальное - как есть"""
+
+    def __init__(self, connection, use_postgres: bool):
+        object.__setattr__(self, '_connection', connection)
+        object.__setattr__(self, '_use_postgres', use_postgres)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self)
+
+    def explain(self, query: str, params) -> list:
+        """План запроса (EXPLAIN / EXPLAIN QUERY PLAN) строками"""
+        cursor = self._connection.cursor()
+        try:
+            if self._use_postgres:
+                # Ошибка EXPLAIN не должна ломать текущую транзакцию
+                cursor.execute("SAVEPOINT explain_plan")
+                try:
+                    cursor.execute("EXPLAIN " + query, params or None)
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.execute("ROLLBACK TO SAVEPOINT explain_plan")
+            else:
+                cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+                rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        # Текст плана - последняя колонка (PostgreSQL: QUERY PLAN, SQLite: detail)
+        return [str(list(row.values())[-1] if isinstance(row, dict) else tuple(row)[-1]) for row in rows]
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        # row_factory, isolation_level и т.п. - на само соединение
+        setattr(self._connection, name, value)
@@ -0,0 +1,124 @@
+"""
+Исходная схема: продукты, заказы, позиции заказов, модерация
+"""
+
+
+def upgrade(cursor, db):
+    # Таблица продуктов (с поддержкой обеих схем: main.py и bot.py)
+    if db.use_postgres:
+        products_table = """
+        CREATE TABLE IF NOT EXISTS products (
+            id VARCHAR(50) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            price DECIMAL(10, 2) NOT NULL,
+            image VARCHAR(500),
+            category VARCHAR(100),
+            ingredients TEXT
+        )
+        """
+    else:
+        products_table = """
+        CREATE TABLE IF NOT EXISTS products (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT,
+            price REAL NOT NULL,
+            image TEXT,
+            category TEXT,
+            ingredients TEXT
+        )
+        """
+
+    # Таблица заказов
+    if db.use_postgres:
+        orders_table = """
+        CREATE TABLE IF NOT EXISTS orders (
+            id VARCHAR(50) PRIMARY KEY,
+            customer_name VARCHAR(255) NOT NULL,
+            customer_phone VARCHAR(50) NOT NULL,
+            customer_address TEXT,
+            customer_telegram VARCHAR(100),
+            user_telegram_id BIGINT,
+            total_amount DECIMAL(10, 2) NOT NULL,
+            status VARCHAR(50) DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    else:
+        orders_table = """
+        CREATE TABLE IF NOT EXISTS orders (
+            id TEXT PRIMARY KEY,
+            customer_name TEXT NOT NULL,
+            customer_phone TEXT NOT NULL,
+            customer_address TEXT,
+            customer_telegram TEXT,
+            user_telegram_id INTEGER,
+            total_amount REAL NOT NULL,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+
+    # Таблица элементов заказа
+    if db.use_postgres:
+        order_items_table = """
+        CREATE TABLE IF NOT EXISTS order_items (
+            id SERIAL PRIMARY KEY,
+            order_id VARCHAR(50) NOT NULL,
+            product_id VARCHAR(50) NOT NULL,
+            product_name VARCHAR(255),
+            quantity INTEGER NOT NULL,
+            price DECIMAL(10, 2) NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders (id),
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+        """
+    else:
+        order_items_table = """
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id TEXT NOT NULL,
+            product_id TEXT NOT NULL,
+            product_name TEXT,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders (id),
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+        """
+
+    # Таблица модерации
+    if db.use_postgres:
+        moderation_table = """
+        CREATE TABLE IF NOT EXISTS activity_moderation (
+            id SERIAL PRIMARY KEY,
+            user_id VARCHAR(100) NOT NULL,
+            username VARCHAR(255),
+            first_name VARCHAR(255),
+            last_name VARCHAR(255),
+            action_type VARCHAR(100) NOT NULL,
+            details TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ip_address VARCHAR(50)
+        )
+        """
+    else:
+        moderation_table = """
+        CREATE TABLE IF NOT EXISTS activity_moderation (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            action_type TEXT NOT NULL,
+            details TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ip_address TEXT
+        )
+        """
+
+    cursor.execute(products_table)
+    cursor.execute(orders_table)
+    cursor.execute(order_items_table)
+    cursor.execute(moderation_table)
@@ -0,0 +1,42 @@
+"""
+Стартовые продукты для пустой базы
+"""
+
+PRODUCTS = [
+    ("1", "Домашние пельмени", "Сочные пельмени с говядиной и свининой, как в России", 25.0,
+     "https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=150&q=80&fm=webp&fit=crop",
+     "pelmeni", '["Мука", "Яйцо", "Говядина", "Свинина", "Лук"]'),
+
+    ("2", "Узбекский плов", "Настоящий узбекский плов с бараниной и специями", 30.0,
+     "https://images.unsplash.com/photo-1596040033229-a0b3b7f5c777?w=150&q=80&fm=webp&fit=crop",
+     "plov", '["Рис", "Баранина", "Морковь", "Лук", "Чеснок"]'),
+
+    ("3", "Домашний борщ", "Украинский борщ с говядиной и сметаной", 18.0,
+     "https://images.unsplash.com/photo-1571064247530-4146bc1a081b?w=150&q=80&fm=webp&fit=crop",
+     "soup", '["Свекла", "Говядина", "Капуста", "Картофель"]'),
+
+    ("4", "Хачапури по-аджарски", "Грузинский хачапури с сыром и яйцом", 22.0,
+     "https://images.unsplash.com/photo-1627662235973-4d265e175fc1?w=150&q=80&fm=webp&fit=crop",
+     "khachapuri", '["Мука", "Сыр", "Яйцо", "Молоко"]'),
+
+    ("5", "Домашний бургер", "Сочный бургер с говяжьей котлетой и свежими овощами", 35.0,
+     "https://images.unsplash.com/photo-1568901346375-23c9450c58cd?w=150&q=80&fm=webp&fit=crop",
+     "burger", '["Булочка", "Говядина", "Сыр", "Салат", "Помидор"]'),
+
+    ("6", "Пицца Маргарита", "Классическая итальянская пицца с моцареллой и базиликом", 28.0,
+     "https://images.unsplash.com/photo-1565299624946-b28f40a0ca4b?w=150&q=80&fm=webp&fit=crop",
+     "pizza", '["Тесто", "Томатный соус", "Моцарелла", "Базилик"]'),
+]
+
+
+def upgrade(cursor, db):
+    cursor.execute("SELECT COUNT(*) FROM products")
+    if cursor.fetchone()[0] > 0:
+        return
+
+    placeholder = db.get_placeholder()
+    cursor.executemany(f"""
+    INSERT INTO products (id, name, description, price, image, category, ingredients)
+    VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+    """, PRODUCTS)
+    print(f"📦 Added {len(PRODUCTS)} initial products to database")
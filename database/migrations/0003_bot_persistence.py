@@ -0,0 +1,28 @@
+"""
+Состояние бота (user_data и диалоги ConversationHandler)
+"""
+
+
+def upgrade(cursor, db):
+    if db.use_postgres:
+        persistence_table = """
+        CREATE TABLE IF NOT EXISTS bot_persistence (
+            namespace VARCHAR(100) NOT NULL,
+            item_key VARCHAR(100) NOT NULL,
+            data TEXT NOT NULL,
+            updated_at DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (namespace, item_key)
+        )
+        """
+    else:
+        persistence_table = """
+        CREATE TABLE IF NOT EXISTS bot_persistence (
+            namespace TEXT NOT NULL,
+            item_key TEXT NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (namespace, item_key)
+        )
+        """
+
+    cursor.execute(persistence_table)
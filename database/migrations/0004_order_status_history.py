@@ -0,0 +1,70 @@
+"""
+История статусов заказа (заполняется триггерами на orders)
+"""
+
+
+def upgrade(cursor, db):
+    if db.use_postgres:
+        status_history_table = """
+        CREATE TABLE IF NOT EXISTS order_status_history (
+            id SERIAL PRIMARY KEY,
+            order_id VARCHAR(50) NOT NULL,
+            from_status VARCHAR(50),
+            to_status VARCHAR(50) NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        status_history_triggers = ["""
+        CREATE OR REPLACE FUNCTION log_order_status() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO order_status_history (order_id, from_status, to_status, changed_at)
+                VALUES (NEW.id, NULL, NEW.status, COALESCE(NEW.created_at, CURRENT_TIMESTAMP));
+            ELSIF NEW.status IS DISTINCT FROM OLD.status THEN
+                INSERT INTO order_status_history (order_id, from_status, to_status)
+                VALUES (NEW.id, OLD.status, NEW.status);
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """, """
+        DROP TRIGGER IF EXISTS orders_status_history ON orders
+        """, """
+        CREATE TRIGGER orders_status_history
+        AFTER INSERT OR UPDATE OF status ON orders
+        FOR EACH ROW EXECUTE FUNCTION log_order_status()
+        """]
+    else:
+        status_history_table = """
+        CREATE TABLE IF NOT EXISTS order_status_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id TEXT NOT NULL,
+            from_status TEXT,
+            to_status TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        status_history_triggers = ["""
+        CREATE TRIGGER IF NOT EXISTS orders_status_created
+        AFTER INSERT ON orders
+        BEGIN
+            INSERT INTO order_status_history (order_id, from_status, to_status, changed_at)
+            VALUES (NEW.id, NULL, NEW.status, COALESCE(NEW.created_at, CURRENT_TIMESTAMP));
+        END
+        """, """
+        CREATE TRIGGER IF NOT EXISTS orders_status_changed
+        AFTER UPDATE OF status ON orders
+        WHEN NEW.status IS NOT OLD.status
+        BEGIN
+            INSERT INTO order_status_history (order_id, from_status, to_status)
+            VALUES (NEW.id, OLD.status, NEW.status);
+        END
+        """]
+
+    cursor.execute(status_history_table)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_order_status_history_order "
+        "ON order_status_history (order_id, changed_at)"
+    )
+    for trigger in status_history_triggers:
+        cursor.execute(trigger)
@@ -0,0 +1,8 @@
+"""
+Версия заказа для оптимистичной конкурентности
+"""
+
+
+def upgrade(cursor, db):
+    # Базы, созданные до появления версии заказа, получают колонку здесь
+    db.ensure_column(cursor, 'orders', 'version', 'INTEGER NOT NULL DEFAULT 1')
@@ -0,0 +1,31 @@
+"""
+Ключи идемпотентности POST /api/orders
+"""
+
+
+def upgrade(cursor, db):
+    if db.use_postgres:
+        idempotency_table = """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idempotency_key VARCHAR(100) PRIMARY KEY,
+            request_hash VARCHAR(64) NOT NULL,
+            response TEXT,
+            created_at DOUBLE PRECISION NOT NULL,
+            expires_at DOUBLE PRECISION NOT NULL
+        )
+        """
+    else:
+        idempotency_table = """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idempotency_key TEXT PRIMARY KEY,
+            request_hash TEXT NOT NULL,
+            response TEXT,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """
+
+    cursor.execute(idempotency_table)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys (expires_at)"
+    )
@@ -0,0 +1,105 @@
+"""
+Версия каталога для инкрементальной синхронизации (GET /api/products/changes)
+catalog_state.version (начинается с 1; since=0 - полная загрузка) растет на каждое
+изменение продукта; продукт хранит версию своего последнего изменения, удаленный -
+надгробие в catalog_tombstones.
+Заполняется триггерами на products, поэтому покрывает и импорт, и миграции.
+"""
+
+
+def upgrade(cursor, db):
+    db.ensure_column(cursor, 'products', 'version', 'BIGINT NOT NULL DEFAULT 0' if db.use_postgres
+                     else 'INTEGER NOT NULL DEFAULT 0')
+
+    if db.use_postgres:
+        tables = ["""
+        CREATE TABLE IF NOT EXISTS catalog_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version BIGINT NOT NULL
+        )
+        """, """
+        CREATE TABLE IF NOT EXISTS catalog_tombstones (
+            product_id VARCHAR(50) PRIMARY KEY,
+            version BIGINT NOT NULL
+        )
+        """, """
+        INSERT INTO catalog_state (id, version) VALUES (1, 1) ON CONFLICT (id) DO NOTHING
+        """]
+        # Строка catalog_state блокируется до конца транзакции: версии выдаются
+        # в порядке коммитов, и клиент с since=N не пропустит изменение
+        triggers = ["""
+        CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+        DECLARE
+            next_version BIGINT;
+        BEGIN
+            IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+                RETURN NEW;
+            END IF;
+            UPDATE catalog_state SET version = version + 1 WHERE id = 1 RETURNING version INTO next_version;
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO catalog_tombstones (product_id, version) VALUES (OLD.id, next_version)
+                ON CONFLICT (product_id) DO UPDATE SET version = EXCLUDED.version;
+                RETURN OLD;
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                DELETE FROM catalog_tombstones WHERE product_id = NEW.id;
+            END IF;
+            NEW.version := next_version;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """, """
+        DROP TRIGGER IF EXISTS products_catalog_version ON products
+        """, """
+        CREATE TRIGGER products_catalog_version
+        BEFORE INSERT OR UPDATE OR DELETE ON products
+        FOR EACH ROW EXECUTE FUNCTION bump_catalog_version()
+        """]
+    else:
+        tables = ["""
+        CREATE TABLE IF NOT EXISTS catalog_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """, """
+        CREATE TABLE IF NOT EXISTS catalog_tombstones (
+            product_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+        """, """
+        INSERT OR IGNORE INTO catalog_state (id, version) VALUES (1, 1)
+        """]
+        triggers = ["""
+        CREATE TRIGGER IF NOT EXISTS products_version_created
+        AFTER INSERT ON products
+        BEGIN
+            UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+            UPDATE products SET version = (SELECT version FROM catalog_state WHERE id = 1) WHERE id = NEW.id;
+            DELETE FROM catalog_tombstones WHERE product_id = NEW.id;
+        END
+        """, """
+        CREATE TRIGGER IF NOT EXISTS products_version_changed
+        AFTER UPDATE OF id, name, description, price, image, category, ingredients ON products
+        WHEN NEW.id IS NOT OLD.id OR NEW.name IS NOT OLD.name OR NEW.description IS NOT OLD.description
+            OR NEW.price IS NOT OLD.price OR NEW.image IS NOT OLD.image OR NEW.category IS NOT OLD.category
+            OR NEW.ingredients IS NOT OLD.ingredients
+        BEGIN
+            UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+            UPDATE products SET version = (SELECT version FROM catalog_state WHERE id = 1) WHERE id = NEW.id;
+        END
+        """, """
+        CREATE TRIGGER IF NOT EXISTS products_version_deleted
+        AFTER DELETE ON products
+        BEGIN
+            UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+            INSERT OR REPLACE INTO catalog_tombstones (product_id, version)
+            SELECT OLD.id, version FROM catalog_state WHERE id = 1;
+        END
+        """]
+
+    for table in tables:
+        cursor.execute(table)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_version ON products (version)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_catalog_tombstones_version ON catalog_tombstones (version)")
+    for trigger in triggers:
+        cursor.execute(trigger)
@@ -0,0 +1,92 @@
+"""
+Мягкое удаление продуктов: active и updated_at
+Удаленный продукт остается строкой с active = false (надгробие): order_items и
+LEFT JOIN products в заказах продолжают работать, а дельта каталога отдает его
+в deleted. Физически надгробия удаляет purge_product_tombstones(); версия
+последнего удаленного надгробия - catalog_state.min_version: клиент с более
+старой копией получает каталог целиком. Таблица catalog_tombstones больше не нужна.
+"""
+
+
+def upgrade(cursor, db):
+    if db.use_postgres:
+        db.ensure_column(cursor, 'products', 'active', 'BOOLEAN NOT NULL DEFAULT TRUE')
+        db.ensure_column(cursor, 'products', 'updated_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
+    else:
+        db.ensure_column(cursor, 'products', 'active', 'INTEGER NOT NULL DEFAULT 1')
+        # SQLite не добавляет колонку с DEFAULT CURRENT_TIMESTAMP - заполняется здесь и триггерами
+        db.ensure_column(cursor, 'products', 'updated_at', 'TIMESTAMP')
+        cursor.execute("UPDATE products SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL")
+    db.ensure_column(cursor, 'catalog_state', 'min_version', 'BIGINT NOT NULL DEFAULT 0' if db.use_postgres
+                     else 'INTEGER NOT NULL DEFAULT 0')
+
+    # Удаления до этой миграции были физическими - клиенты старше них загружают всё заново
+    cursor.execute("""
+        UPDATE catalog_state
+        SET min_version = (SELECT COALESCE(MAX(version), 0) FROM catalog_tombstones)
+        WHERE id = 1
+    """)
+    cursor.execute("DROP TABLE IF EXISTS catalog_tombstones")
+
+    if db.use_postgres:
+        triggers = ["""
+        CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+        DECLARE
+            next_version BIGINT;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                UPDATE catalog_state SET min_version = GREATEST(min_version, OLD.version) WHERE id = 1;
+                RETURN OLD;
+            END IF;
+            IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+                RETURN NEW;
+            END IF;
+            UPDATE catalog_state SET version = version + 1 WHERE id = 1 RETURNING version INTO next_version;
+            NEW.version := next_version;
+            NEW.updated_at := CURRENT_TIMESTAMP;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """]
+    else:
+        triggers = ["""
+        DROP TRIGGER IF EXISTS products_version_created
+        """, """
+        DROP TRIGGER IF EXISTS products_version_changed
+        """, """
+        DROP TRIGGER IF EXISTS products_version_deleted
+        """, """
+        CREATE TRIGGER products_version_created
+        AFTER INSERT ON products
+        BEGIN
+            UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+            UPDATE products
+            SET version = (SELECT version FROM catalog_state WHERE id = 1), updated_at = CURRENT_TIMESTAMP
+            WHERE id = NEW.id;
+        END
+        """, """
+        CREATE TRIGGER products_version_changed
+        AFTER UPDATE OF id, name, description, price, image, category, ingredients, active ON products
+        WHEN NEW.id IS NOT OLD.id OR NEW.name IS NOT OLD.name OR NEW.description IS NOT OLD.description
+            OR NEW.price IS NOT OLD.price OR NEW.image IS NOT OLD.image OR NEW.category IS NOT OLD.category
+            OR NEW.ingredients IS NOT OLD.ingredients OR NEW.active IS NOT OLD.active
+        BEGIN
+            UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+            UPDATE products
+            SET version = (SELECT version FROM catalog_state WHERE id = 1), updated_at = CURRENT_TIMESTAMP
+            WHERE id = NEW.id;
+        END
+        """, """
+        CREATE TRIGGER products_version_deleted
+        AFTER DELETE ON products
+        BEGIN
+            UPDATE catalog_state SET min_version = MAX(min_version, OLD.version) WHERE id = 1;
+        END
+        """]
+
+    for trigger in triggers:
+        cursor.execute(trigger)
+
+    # Меню читает только активные продукты; условие индекса совпадает с WHERE active в запросах
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_active ON products (category, name) WHERE active")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_tombstones ON products (updated_at) WHERE NOT active")
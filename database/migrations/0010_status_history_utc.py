@@ -0,0 +1,43 @@
+"""
+Первая строка истории статусов - время вставки в БД (CURRENT_TIMESTAMP)
+Раньше она копировала orders.created_at, который API пишет локальным временем в
+формате ISO ('2026-10-19T01:50:31'), а переходы - UTC CURRENT_TIMESTAMP
+('2026-10-19 01:50:38'): длительности статусов считались со сдвигом часового
+пояса. Существующие строки SQLite приводятся к UTC в формате CURRENT_TIMESTAMP.
+"""
+
+
+def upgrade(cursor, db):
+    if db.use_postgres:
+        triggers = ["""
+        CREATE OR REPLACE FUNCTION log_order_status() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO order_status_history (order_id, from_status, to_status)
+                VALUES (NEW.id, NULL, NEW.status);
+            ELSIF NEW.status IS DISTINCT FROM OLD.status THEN
+                INSERT INTO order_status_history (order_id, from_status, to_status)
+                VALUES (NEW.id, OLD.status, NEW.status);
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """]
+    else:
+        triggers = ["""
+        DROP TRIGGER IF EXISTS orders_status_created
+        """, """
+        CREATE TRIGGER orders_status_created
+        AFTER INSERT ON orders
+        BEGIN
+            INSERT INTO order_status_history (order_id, from_status, to_status)
+            VALUES (NEW.id, NULL, NEW.status);
+        END
+        """, """
+        UPDATE order_status_history
+        SET changed_at = datetime(changed_at, 'utc')
+        WHERE from_status IS NULL AND changed_at LIKE '%T%'
+        """]
+
+    for trigger in triggers:
+        cursor.execute(trigger)
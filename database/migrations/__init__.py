@@ -0,0 +1,165 @@
+"""
+Версионные миграции схемы
+Файлы NNNN_<name>.py в этом пакете применяются по порядку номеров, каждый один раз
+
+Примененные миграции записываются в schema_migrations вместе с контрольной суммой
+файла. Если всё уже применено, запуск - один SELECT. Применяет миграции только
+один процесс: PostgreSQL - advisory lock, SQLite - BEGIN IMMEDIATE.
+
+Миграция - модуль с функцией upgrade(cursor, db); docstring модуля - описание.
+"""
+
+import hashlib
+import importlib
+import os
+import re
+import time
+
+# Ключ pg_advisory_lock для миграций (произвольная константа)
+MIGRATION_LOCK_ID = 7_242_036
+
+_FILENAME = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+
+class Migration:
+    """Файл миграции: номер, имя, контрольная сумма, upgrade()"""
+
+    def __init__(self, version: int, name: str, path: str):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, 'rb') as f:
+            self.checksum = hashlib.sha256(f.read()).hexdigest()
+
+    def upgrade(self, cursor, db):
+        module = importlib.import_module(f"{__name__}.{self.version:04d}_{self.name}")
+        module.upgrade(cursor, db)
+
+
+def discover_migrations() -> list:
+    """Все миграции пакета, по возрастанию номера"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort(key=lambda m: m.version)
+    return migrations
+
+
+def _applied(cursor) -> dict:
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def _check_checksums(migrations: list, applied: dict):
+    for migration in migrations:
+        checksum = applied.get(migration.version)
+        if checksum is not None and checksum != migration.checksum:
+            print(f"⚠️ Migration {migration.version:04d}_{migration.name} was modified after it was applied")
+
+
+def _create_table(cursor, db):
+    if db.use_postgres:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum VARCHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+    else:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+
+def _record(cursor, db, migration: Migration):
+    placeholder = db.get_placeholder()
+    cursor.execute(
+        f"INSERT INTO schema_migrations (version, name, checksum) VALUES ({placeholder}, {placeholder}, {placeholder})",
+        (migration.version, migration.name, migration.checksum)
+    )
+
+
+def run_migrations(db) -> int:
+    """
+    Применить недостающие миграции
+    Возвращает число примененных миграций
+    """
+    migrations = discover_migrations()
+
+    with db.connect() as conn:
+        cursor = conn.cursor()
+
+        # Быстрый путь: схема актуальна - без блокировок и DDL
+        try:
+            applied = _applied(cursor)
+        except Exception:
+            conn.rollback()
+            applied = None
+        if applied is not None and all(m.version in applied for m in migrations):
+            _check_checksums(migrations, applied)
+            return 0
+
+        if db.use_postgres:
+            return _migrate_postgres(conn, cursor, db, migrations)
+        return _migrate_sqlite(conn, cursor, db, migrations)
+
+
+def _pending(cursor, migrations: list) -> list:
+    applied = _applied(cursor)
+    _check_checksums(migrations, applied)
+    return [m for m in migrations if m.version not in applied]
+
+
+def _migrate_postgres(conn, cursor, db, migrations: list) -> int:
+    # Другие инстансы ждут здесь, пока первый не закончит
+    cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        _create_table(cursor, db)
+        conn.commit()
+
+        pending = _pending(cursor, migrations)
+        for migration in pending:
+            started = time.perf_counter()
+            try:
+                migration.upgrade(cursor, db)
+                _record(cursor, db, migration)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            print(f"✅ Migration {migration.version:04d}_{migration.name} "
+                  f"applied in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return len(pending)
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+
+
+def _migrate_sqlite(conn, cursor, db, migrations: list) -> int:
+    # Управляем транзакцией сами: BEGIN IMMEDIATE сразу берет блокировку записи
+    conn.isolation_level = None
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        _create_table(cursor, db)
+        pending = _pending(cursor, migrations)
+        for migration in pending:
+            started = time.perf_counter()
+            migration.upgrade(cursor, db)
+            _record(cursor, db, migration)
+            print(f"✅ Migration {migration.version:04d}_{migration.name} "
+                  f"applied in {(time.perf_counter() - started) * 1000:.0f} ms")
+        cursor.execute("COMMIT")
+        return len(pending)
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
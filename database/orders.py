@@ -0,0 +1,190 @@
+"""
+Переходы статусов заказа
+Смена статуса - один UPDATE ... RETURNING, история пишется триггером в order_status_history
+
+Конкурентные изменения (несколько админов жмут кнопки одного заказа) разруливаются
+оптимистично: каждое изменение увеличивает orders.version, а UPDATE с ожидаемой
+версией не применяется, если заказ уже успели изменить. Блокировок строк нет.
+"""
+
+from .cache import TTLCache, MISSING
+from .events import subscribe, publish, ORDER_CREATED, ORDER_STATUS_CHANGED, ORDER_DELETED
+
+ORDER_STATUSES = ('pending', 'confirmed', 'cooking', 'ready', 'delivered', 'cancelled')
+
+# Допустимые переходы: текущий статус -> куда можно перевести
+ORDER_TRANSITIONS = {
+    'pending': ('confirmed', 'cooking', 'cancelled'),
+    'confirmed': ('cooking', 'ready', 'cancelled'),
+    'cooking': ('ready', 'cancelled'),
+    'ready': ('delivered', 'cancelled'),
+    'delivered': (),
+    'cancelled': (),
+}
+
+# Обратная таблица: новый статус -> из каких статусов в него можно попасть
+_PREDECESSORS = {
+    status: tuple(src for src, targets in ORDER_TRANSITIONS.items() if status in targets)
+    for status in ORDER_STATUSES
+}
+
+
+class OrderNotFound(LookupError):
+    """Заказа с таким ID нет"""
+
+
+class InvalidTransition(ValueError):
+    """Переход из текущего статуса в запрошенный запрещен"""
+
+    def __init__(self, order_id: str, current: str, status: str):
+        super().__init__(f"Order {order_id}: {current} -> {status} is not allowed")
+        self.order_id = order_id
+        self.current = current
+        self.status = status
+
+
+class VersionConflict(Exception):
+    """Заказ уже изменен другим запросом - ожидаемая версия устарела"""
+
+    def __init__(self, order: dict, expected_version: int):
+        super().__init__(
+            f"Order {order['id']}: expected version {expected_version}, current {order.get('version')}"
+        )
+        self.order = order
+        self.expected_version = expected_version
+
+
+# Состав заказа не меняется после создания - кэшируем items_data по ID заказа
+_items_cache = TTLCache(maxsize=1024, ttl=3600, name='order_items')
+
+
+def _forget_items(order_id=None, **payload):
+    if order_id is not None:
+        _items_cache.pop(order_id)
+
+
+subscribe(ORDER_DELETED, _forget_items)
+
+
+def get_order_items_data(order_id: str) -> str:
+    """Позиции заказа в формате items_data ("pid:name:qty:price:,...")"""
+    items_data = _items_cache.get(order_id)
+    if items_data is MISSING:
+        from . import db
+        placeholder = db.get_placeholder()
+        rows = db.execute_query(
+            f"SELECT product_id, product_name, quantity, price FROM order_items "
+            f"WHERE order_id = {placeholder} ORDER BY id",
+            (order_id,), fetch='all'
+        )
+        items_data = ','.join(
+            f"{row['product_id']}:{row['product_name']}:{row['quantity']}:{row['price']}:" for row in rows
+        ) or None
+        _items_cache.set(order_id, items_data)
+    return items_data
+
+
+def allowed_transitions(status: str) -> tuple:
+    """Статусы, в которые можно перевести заказ из status"""
+    return ORDER_TRANSITIONS.get(status, ())
+
+
+def transition_order_status(order_id: str, status: str, expected_version: int = None) -> dict:
+    """
+    Перевести заказ в новый статус
+    expected_version: версия заказа, которую видел инициатор (кнопка / клиент API);
+    без нее проверяется только допустимость перехода
+    Возвращает заказ (с items_data) после изменения
+    Бросает OrderNotFound / VersionConflict / InvalidTransition
+    """
+    from . import db
+
+    if status not in _PREDECESSORS:
+        raise ValueError(f"Unknown status: {status}")
+
+    predecessors = _PREDECESSORS[status]
+    placeholder = db.get_placeholder()
+    order = None
+    if predecessors:
+        query = f"""
+            UPDATE orders SET status = {placeholder}, version = version + 1
+            WHERE id = {placeholder} AND status IN ({', '.join([placeholder] * len(predecessors))})
+        """
+        params = [status, order_id, *predecessors]
+        if expected_version is not None:
+            query += f" AND version = {placeholder}"
+            params.append(expected_version)
+        order = db.execute_query(query + " RETURNING *", tuple(params), fetch='one', commit=True)
+
+    if order is None:
+        # Медленный путь только для отказов: выясняем причину
+        current = db.execute_query(
+            f"SELECT * FROM orders WHERE id = {placeholder}", (order_id,), fetch='one'
+        )
+        if current is None:
+            raise OrderNotFound(order_id)
+        if expected_version is not None and current.get('version') != expected_version:
+            current['items_data'] = get_order_items_data(order_id)
+            raise VersionConflict(current, expected_version)
+        raise InvalidTransition(order_id, current['status'], status)
+
+    order['items_data'] = get_order_items_data(order_id)
+    publish(ORDER_STATUS_CHANGED, order_id=order_id, status=status, user_id=order.get('user_telegram_id'))
+    return order
+
+
+# Последние заказы клиента ("Мои заказы"): user_id -> список заказов
+USER_ORDERS_LIMIT = 5
+_user_orders_cache = TTLCache(maxsize=1024, ttl=300, name='user_orders')
+
+
+def _forget_user_orders(user_id=None, **payload):
+    if user_id is None:
+        # Событие без владельца (удаление заказа) - сбрасываем всё
+        _user_orders_cache.clear()
+    else:
+        _user_orders_cache.pop(user_id)
+
+
+for _event in (ORDER_CREATED, ORDER_STATUS_CHANGED, ORDER_DELETED):
+    subscribe(_event, _forget_user_orders)
+
+
+def get_user_orders(user_id: int) -> list:
+    """
+    Последние заказы клиента (с items_data), новые первыми
+    Кэшируются до создания / смены статуса заказа клиента, TTL - страховка
+    """
+    orders = _user_orders_cache.get(user_id)
+    if orders is MISSING:
+        from . import db
+        orders = db.execute_query(
+            f"""
+            SELECT o.*, {db.get_items_aggregate()} as items_data
+            FROM orders o
+            LEFT JOIN order_items oi ON o.id = oi.order_id
+            WHERE o.user_telegram_id = {db.get_placeholder()}
+            GROUP BY o.id
+            ORDER BY o.created_at DESC
+            LIMIT {USER_ORDERS_LIMIT}
+            """,
+            (user_id,), fetch='all'
+        )
+        _user_orders_cache.set(user_id, orders)
+    return orders
+
+
+def user_orders_cache_stats() -> dict:
+    """Счетчики кэша "Мои заказы" (hits / misses)"""
+    return _user_orders_cache.stats()
+
+
+def get_status_history(order_id: str) -> list:
+    """История статусов заказа (в порядке записи)"""
+    from . import db
+    placeholder = db.get_placeholder()
+    return db.execute_query(
+        f"SELECT from_status, to_status, changed_at FROM order_status_history "
+        f"WHERE order_id = {placeholder} ORDER BY id",
+        (order_id,), fetch='all'
+    )
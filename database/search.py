@@ -0,0 +1,263 @@
+"""
+Поиск по меню в памяти
+Инвертированный индекс по названию, описанию и ингредиентам активных продуктов:
+слово -> {product_id: вес поля}. Запрос сопоставляется с индексом точно, по
+префиксу ("пельм" -> "пельмени") и по триграммам для опечаток ("плав" -> "плов").
+Кириллица нормализуется (регистр, ё -> е, й -> и), запрос, набранный в латинской
+раскладке ("gkjd"), повторяется в русской.
+
+Индекс строится из снимка каталога и обновляется по событию CATALOG_CHANGED:
+изменение одного продукта переиндексирует только его, импорт - весь индекс.
+"""
+
+import heapq
+import json
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+
+from .events import subscribe, CATALOG_CHANGED
+
+# Вес совпадения по полю продукта
+FIELD_WEIGHTS = (('name', 3.0), ('ingredients', 2.0), ('description', 1.0))
+
+# Вес вида совпадения слова запроса со словом индекса
+EXACT, PREFIX, FUZZY = 1.0, 0.8, 0.6
+
+# Минимальное сходство по триграммам (коэффициент Жаккара) для опечаток;
+# в коротких словах одна опечатка портит почти все триграммы - там считается
+# расстояние редактирования (одна правка)
+FUZZY_THRESHOLD = 0.4
+SHORT_WORD = 6
+
+# Сколько последних запросов хранится готовыми (сбрасывается при изменении индекса)
+QUERY_CACHE_SIZE = 256
+
+_WORD = re.compile(r'[0-9a-zа-я]+')
+
+# Латинская раскладка -> русская (та же клавиша)
+_LAYOUT = str.maketrans("qwertyuiop[]asdfghjkl;'zxcvbnm,.`", "йцукенгшщзхъфывапролджэячсмитьбюё")
+
+
+def tokenize(text: str) -> list:
+    """Слова текста: нижний регистр, без диакритики (ё -> е, й -> и)"""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _WORD.findall(text)
+
+
+def _trigrams(token: str) -> set:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """Слова отличаются одной заменой, вставкой, удалением или перестановкой соседних букв"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    if len(a) == len(b):
+        return (a[start + 1:] == b[start + 1:]
+                or (a[start + 2:] == b[start + 2:] and a[start:start + 2] == b[start:start + 2][::-1]))
+    return a[start:] == b[start + 1:]
+
+
+def _ingredients_text(value) -> str:
+    if not value:
+        return ''
+    try:
+        return ' '.join(str(item) for item in json.loads(value))
+    except (TypeError, ValueError):
+        return str(value)
+
+
+class SearchIndex:
+    """Инвертированный индекс продуктов с префиксным и нечетким поиском"""
+
+    def __init__(self, products=()):
+        self.products = {}          # id -> строка продукта
+        self._doc_tokens = {}       # id -> {слово: вес}
+        self._postings = {}         # слово -> {id: вес}
+        self._tokens = []           # все слова по алфавиту (для префиксов)
+        self._trigrams = {}         # триграмма -> слова
+        self._trigram_counts = {}   # слово -> число его триграмм
+        self._cache = {}
+        for product in products:
+            self.add(product)
+
+    def __len__(self):
+        return len(self.products)
+
+    def add(self, product: dict):
+        """Добавить или переиндексировать продукт"""
+        product_id = str(product['id'])
+        self.remove(product_id)
+
+        weights = {}
+        for field, weight in FIELD_WEIGHTS:
+            value = product.get(field) or ''
+            text = _ingredients_text(value) if field == 'ingredients' else str(value)
+            for token in tokenize(text):
+                if weight > weights.get(token, 0):
+                    weights[token] = weight
+
+        self.products[product_id] = product
+        self._doc_tokens[product_id] = weights
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._tokens, token)
+                trigrams = _trigrams(token)
+                self._trigram_counts[token] = len(trigrams)
+                for trigram in trigrams:
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            postings[product_id] = weight
+        self._cache.clear()
+
+    def remove(self, product_id: str):
+        """Убрать продукт из индекса (если он там есть)"""
+        product_id = str(product_id)
+        weights = self._doc_tokens.pop(product_id, None)
+        if weights is None:
+            return
+        del self.products[product_id]
+        for token in weights:
+            postings = self._postings[token]
+            del postings[product_id]
+            if postings:
+                continue
+            # Слово больше не встречается - убираем его отовсюду
+            del self._postings[token]
+            del self._tokens[bisect_left(self._tokens, token)]
+            del self._trigram_counts[token]
+            for trigram in _trigrams(token):
+                tokens = self._trigrams[trigram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[trigram]
+        self._cache.clear()
+
+    def _matches(self, term: str) -> dict:
+        """Слова индекса, подходящие под слово запроса: {слово: вес совпадения}"""
+        matches = {}
+        if term in self._postings:
+            matches[term] = EXACT
+        if len(term) >= 2:
+            position = bisect_left(self._tokens, term)
+            while position < len(self._tokens) and self._tokens[position].startswith(term):
+                matches.setdefault(self._tokens[position], PREFIX)
+                position += 1
+        if len(term) >= 3:
+            term_trigrams = _trigrams(term)
+            shared = Counter()
+            for trigram in term_trigrams:
+                shared.update(self._trigrams.get(trigram, ()))
+            for token, count in shared.items():
+                if token in matches:
+                    continue
+                similarity = count / (len(term_trigrams) + self._trigram_counts[token] - count)
+                if similarity >= FUZZY_THRESHOLD:
+                    matches[token] = FUZZY * similarity
+                elif len(term) <= SHORT_WORD and _one_edit_apart(term, token):
+                    matches[token] = FUZZY * FUZZY_THRESHOLD
+        return matches
+
+    def _rank(self, terms: list, limit: int) -> list:
+        # Продукт должен подходить под каждое слово запроса
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for token, match in self._matches(term).items():
+                for product_id, weight in self._postings[token].items():
+                    score = match * weight
+                    if score > term_scores.get(product_id, 0):
+                        term_scores[product_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {product_id: scores[product_id] + score
+                          for product_id, score in term_scores.items() if product_id in scores}
+            if not scores:
+                return []
+        return heapq.nsmallest(limit, scores, key=lambda product_id: (-scores[product_id],
+                                                                      self.products[product_id].get('name') or ''))
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """Продукты по запросу, лучшие первыми"""
+        key = (query, limit)
+        ids = self._cache.get(key)
+        if ids is None:
+            terms = tokenize(query)
+            ids = self._rank(terms, limit) if terms else []
+            if not ids and terms and re.search(r'[a-z]', query, re.IGNORECASE):
+                # "gkjd" - набрано в английской раскладке
+                switched = tokenize(query.lower().translate(_LAYOUT))
+                if switched != terms:
+                    ids = self._rank(switched, limit)
+            ids = tuple(ids)
+            if len(self._cache) >= QUERY_CACHE_SIZE:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = ids
+        return [self.products[product_id] for product_id in ids]
+
+    def stats(self) -> dict:
+        return {'products': len(self.products), 'tokens': len(self._tokens), 'trigrams': len(self._trigrams)}
+
+
+_index = None
+_pending = set()
+
+
+def get_search_index() -> SearchIndex:
+    """Индекс текущего каталога: строится при первом обращении, дальше обновляется по изменениям"""
+    global _index
+    from .catalog import get_catalog
+    # Снимок сверяет версию каталога с БД: изменение из другого процесса сбросит и индекс
+    catalog = get_catalog()
+    if _index is None:
+        _pending.clear()
+        _index = SearchIndex(catalog.products)
+    elif _pending:
+        _refresh(_index)
+    return _index
+
+
+def _refresh(index: SearchIndex):
+    """Переиндексировать измененные продукты (один запрос на все)"""
+    from . import db
+    product_ids = list(_pending)
+    _pending.clear()
+    placeholder = db.get_placeholder()
+    rows = db.execute_query(
+        f"SELECT * FROM products WHERE active AND id IN ({', '.join([placeholder] * len(product_ids))})",
+        tuple(product_ids), fetch='all'
+    )
+    found = {str(row['id']): row for row in rows}
+    for product_id in product_ids:
+        if product_id in found:
+            index.add(found[product_id])
+        else:
+            index.remove(product_id)
+
+
+def search_products(query: str, limit: int = 20) -> list:
+    """Поиск по меню без обращения к БД"""
+    return get_search_index().search(query, limit)
+
+
+def _on_catalog_changed(product_id=None, **payload):
+    global _index
+    if product_id is None:
+        # Массовое изменение (импорт) - индекс строится заново
+        _index = None
+    else:
+        _pending.add(str(product_id))
+
+
+subscribe(CATALOG_CHANGED, _on_catalog_changed)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Импорт каталога из файла (CSV / JSON / YAML) одной транзакцией
+Продукты сравниваются с БД по названию (или по id): новые добавляются,
+измененные обновляются, остальные не трогаются - повторный запуск безопасен.
+
+    python import_catalog.py menu.csv --dry-run
+    python import_catalog.py menu.json --delete-missing
+"""
+
+import argparse
+import sys
+import time
+
+from database.catalog_import import import_catalog, read_catalog, CatalogImportError, KEYS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', help='menu file: .csv, .json, .yaml')
+    parser.add_argument('--dry-run', action='store_true', help='show the changes, write nothing')
+    parser.add_argument('--delete-missing', action='store_true',
+                        help='soft-delete products that are not in the file (and duplicates by key)')
+    parser.add_argument('--key', choices=KEYS, default='name', help='natural key to match products by')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        diff = import_catalog(read_catalog(args.file), key=args.key,
+                              delete_missing=args.delete_missing, dry_run=args.dry_run)
+    except CatalogImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(diff.report())
+    print(f"⏱ {time.perf_counter() - started:.3f}s" + (" (dry run)" if args.dry_run else ""))
+
+
+if __name__ == '__main__':
+    main()
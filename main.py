@@ -3,17 +3,34 @@ FastAPI Application для Home Food Abu Dhabi
 Модульная версия - использует api/ модули
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 # Import from api modules
 from api.config import configure_app
-from api.routes import products_router, orders_router, frontend_router
+from api.routes import products_router, orders_router, frontend_router, health_router, metrics_router
 
 # Import database
-from database import db
+from database import db, purge_tombstones_periodically
+from monitoring.log import setup_logging
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the log writer, connect to the database and apply migrations on startup, not at import;
+    purge old product tombstones in the background while the app runs
+    """
+    setup_logging()
+    db.initialize()
+    purge_task = asyncio.create_task(purge_tombstones_periodically())
+    yield
+    purge_task.cancel()
+
 
 # Create FastAPI app
-app = FastAPI(title="Home Food Abu Dhabi")
+app = FastAPI(title="Home Food Abu Dhabi", lifespan=lifespan)
 
 # Configure app (CORS, static files, middleware)
 configure_app(app)
@@ -22,6 +39,8 @@ configure_app(app)
 app.include_router(frontend_router)  # HTML routes (/, /app, /app/{category})
 app.include_router(products_router)  # /api/products
 app.include_router(orders_router)    # /api/orders/*
+app.include_router(health_router)    # /healthz, /readyz
+app.include_router(metrics_router)   # /metrics
 
 # Print startup info
 print("=" * 50)
@@ -32,6 +51,8 @@ print(f"   Routes registered:")
 print(f"     - Frontend: /, /app, /app/{{category}}")
 print(f"     - API Products: /api/products")
 print(f"     - API Orders: /api/orders/*")
+print(f"     - Health: /healthz, /readyz")
+print(f"     - Metrics: /metrics")
 print("=" * 50)
 
 
@@ -1,108 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Migration script to populate database with products
-Runs automatically on Railway startup
+Apply pending database migrations (database/migrations)
+start.py runs them in-process on boot; this script is for manual runs.
+The product menu that used to be inserted here is migration 0007_railway_menu.
 """
 
-import os
-import sys
-
-# Only run on Railway (PostgreSQL)
-if not os.getenv('DATABASE_URL'):
-    print("⏭️ Skipping migration - not on Railway")
-    sys.exit(0)
-
-from database import db, add_product
+from database import db
+from database.migrations import run_migrations
 
 print("=" * 60)
-print("🔄 Running product migration...")
+print("🔄 Running database migrations...")
 print("=" * 60)
 
-# Check if products already exist
-with db.get_connection() as conn:
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM products WHERE category IN ('pelmeni', 'khachapuri', 'plov', 'soup', 'dessert', 'salad')")
-    count = cursor.fetchone()[0]
-
-    if count > 10:
-        print(f"✓ Database already has {count} products, skipping migration")
-        sys.exit(0)
-
-print(f"📦 Found {count} products, adding new ones...")
-
-# Products to add
-products = [
-    # ПЕЛЬМЕНИ (pelmeni)
-    ("Манты замороженные", "Сочные манты с мясной начинкой, готовятся на пару. 15 штук", 120.0, "https://images.unsplash.com/photo-1496116218417-1a781b1c416c?w=400", "pelmeni", '["Мясо", "Лук", "Тесто", "Специи"]'),
-    ("Вареники с грибами и картошкой", "Домашние вареники с грибами и картофелем. 1 кг", 100.0, "https://images.unsplash.com/photo-1534422298391-e4f8c172dddb?w=400", "pelmeni", '["Картофель", "Грибы", "Лук", "Тесто"]'),
-    ("Вареники с картошкой", "Классические вареники с картофельной начинкой. 1 кг", 90.0, "https://images.unsplash.com/photo-1534422298391-e4f8c172dddb?w=400", "pelmeni", '["Картофель", "Лук", "Тесто"]'),
-    ("Вареники с жареным луком и картошкой", "Вареники с картошкой и ароматным жареным луком. 1 кг", 100.0, "https://images.unsplash.com/photo-1534422298391-e4f8c172dddb?w=400", "pelmeni", '["Картофель", "Лук жареный", "Тесто"]'),
-    ("Вареники с творогом и вишней", "Сладкие вареники с творогом и вишней. 1 кг", 100.0, "https://images.unsplash.com/photo-1484723091739-30a097e8f929?w=400", "pelmeni", '["Творог", "Вишня", "Тесто", "Сахар"]'),
-    ("Вареники с творогом", "Классические вареники с творожной начинкой. 1 кг", 90.0, "https://images.unsplash.com/photo-1484723091739-30a097e8f929?w=400", "pelmeni", '["Творог", "Тесто", "Сахар"]'),
-    ("Пельмени г/к микс", "Пельмени с мясной начинкой из говядины и курицы. 1 кг", 85.0, "https://images.unsplash.com/photo-1496116218417-1a781b1c416c?w=400", "pelmeni", '["Говядина", "Курица", "Лук", "Тесто"]'),
-    ("Пельмени с говядиной", "Классические пельмени с говяжьей начинкой. 1 кг", 85.0, "https://images.unsplash.com/photo-1496116218417-1a781b1c416c?w=400", "pelmeni", '["Говядина", "Лук", "Тесто", "Специи"]'),
-    ("Пельмени с курицей", "Пельмени с куриной начинкой. 1 кг", 80.0, "https://images.unsplash.com/photo-1496116218417-1a781b1c416c?w=400", "pelmeni", '["Курица", "Лук", "Тесто", "Специи"]'),
-    ("Манты с тыквой и мясом", "Манты с мясом стейк, луком и тыквой. 16 штук", 120.0, "https://images.unsplash.com/photo-1496116218417-1a781b1c416c?w=400", "pelmeni", '["Мясо стейк", "Тыква", "Лук", "Тесто"]'),
-    ("Пельмени из шпината", "Пельмени с тестом из шпината. 1 кг", 100.0, "https://images.unsplash.com/photo-1496116218417-1a781b1c416c?w=400", "pelmeni", '["Шпинат", "Мясо", "Лук", "Тесто"]'),
-    ("Манты с тыквой", "Манты с тыквенной начинкой. 15 штук", 80.0, "https://images.unsplash.com/photo-1496116218417-1a781b1c416c?w=400", "pelmeni", '["Тыква", "Лук", "Тесто", "Специи"]'),
-    ("Кюрзе", "Традиционные дагестанские кюрзе. 1 кг", 80.0, "https://images.unsplash.com/photo-1496116218417-1a781b1c416c?w=400", "pelmeni", '["Мясо", "Лук", "Тесто", "Специи"]'),
-    ("Голубцы замороженные", "Голубцы с мясной начинкой в капустных листьях. 1 кг", 120.0, "https://images.unsplash.com/photo-1544025162-d76694265947?w=400", "pelmeni", '["Капуста", "Мясо", "Рис", "Томатный соус"]'),
-
-    # ХАЧАПУРИ И ВЫПЕЧКА (khachapuri)
-    ("Самса", "Узбекская самса с мясной начинкой. 10 штук", 120.0, "https://images.unsplash.com/photo-1601050690597-df0568f70950?w=400", "khachapuri", '["Мясо", "Лук", "Слоеное тесто", "Специи"]'),
-    ("Мясной пирог с картошкой", "Домашний пирог с мясом и картофелем. 1 шт (700г)", 90.0, "https://images.unsplash.com/photo-1619040484735-e7730e09d0b5?w=400", "khachapuri", '["Мясо", "Картофель", "Тесто", "Лук"]'),
-    ("Пирожки с мясом замороженные", "Пирожки с мясной начинкой для духовки. 10 штук", 85.0, "https://images.unsplash.com/photo-1608198399988-ff7eaf3a07b3?w=400", "khachapuri", '["Мясо", "Лук", "Тесто"]'),
-    ("Сосиски в тесте мини", "Мини сосиски в тесте. 20 штук", 80.0, "https://images.unsplash.com/photo-1621939514649-280e2ee25f60?w=400", "khachapuri", '["Сосиски", "Тесто"]'),
-    ("Сосиски в тесте замороженные", "Сосиски в тесте. 10 штук", 80.0, "https://images.unsplash.com/photo-1621939514649-280e2ee25f60?w=400", "khachapuri", '["Сосиски", "Тесто"]'),
-    ("Блинчики с мясом жареные", "Жареные блинчики с мясной начинкой. 10 штук", 85.0, "https://images.unsplash.com/photo-1567620905732-2d1ec7ab7445?w=400", "khachapuri", '["Мясо", "Блины", "Лук"]'),
-    ("Блинчики с творогом жареные", "Жареные блинчики с творожной начинкой. 10 штук", 85.0, "https://images.unsplash.com/photo-1567620905732-2d1ec7ab7445?w=400", "khachapuri", '["Творог", "Блины", "Сахар"]'),
-    ("Мини пиццы", "Мини пиццы ассорти. 10 штук", 80.0, "https://images.unsplash.com/photo-1513104890138-7c749659a591?w=400", "khachapuri", '["Тесто", "Сыр", "Томатный соус"]'),
-    ("Блинчики с яйцом и луком", "Блинчики с яично-луковой начинкой. 10 штук", 70.0, "https://images.unsplash.com/photo-1567620905732-2d1ec7ab7445?w=400", "khachapuri", '["Яйцо", "Лук", "Блины"]'),
-    ("Блинчики с ветчиной и сыром", "Блинчики с ветчиной и сыром. 10 штук", 80.0, "https://images.unsplash.com/photo-1567620905732-2d1ec7ab7445?w=400", "khachapuri", '["Ветчина", "Сыр", "Блины"]'),
-    ("Блины", "Обычные блины. 15 штук", 50.0, "https://images.unsplash.com/photo-1567620905732-2d1ec7ab7445?w=400", "khachapuri", '["Мука", "Яйцо", "Молоко", "Сахар"]'),
-
-    # ПЛОВ И ОСНОВНЫЕ БЛЮДА (plov)
-    ("Курица под рисом", "Курица под рисом. 1.5-1.8 кг", 200.0, "https://images.unsplash.com/photo-1455619452474-d2be8b1e70cd?w=400", "plov", '["Курица", "Рис", "Морковь", "Лук", "Специи"]'),
-    ("Куриные котлеты", "Куриные котлеты. 10 штук (1 кг)", 100.0, "https://images.unsplash.com/photo-1588347818036-b6682e8e4c9b?w=400", "plov", '["Курица", "Лук", "Специи", "Хлеб"]'),
-    ("Котлеты из мяса", "Котлеты из говядины с луком и специями. 10 штук (1 кг)", 120.0, "https://images.unsplash.com/photo-1588347818036-b6682e8e4c9b?w=400", "plov", '["Мясо", "Лук", "Соль", "Черный перец"]'),
-    ("Люля из говядины", "Люля-кебаб из говядины. 12 штук (1 кг)", 120.0, "https://images.unsplash.com/photo-1529042410759-befb1204b468?w=400", "plov", '["Говядина", "Лук", "Специи"]'),
-    ("Узбекский плов", "Настоящий узбекский плов с мясом. 2 кг", 250.0, "https://images.unsplash.com/photo-1516684732162-798a0062be99?w=400", "plov", '["Рис", "Баранина", "Морковь", "Лук", "Специи"]'),
+applied = run_migrations(db)
 
-    # СУПЫ (soup)
-    ("Фрикадельки для супа", "Фрикадельки из говядины для приготовления супа. 500г", 60.0, "https://images.unsplash.com/photo-1547592166-23ac45744acd?w=400", "soup", '["Говядина", "Лук", "Специи"]'),
-
-    # ДЕСЕРТЫ (dessert)
-    ("Булочки сладкие сдобные", "Сладкие сдобные булочки. 10 штук", 80.0, "https://images.unsplash.com/photo-1509440159596-0249088772ff?w=400", "dessert", '["Мука", "Сахар", "Яйцо", "Молоко", "Дрожжи"]'),
-    ("Сырное печенье", "Сырное печенье. 30 штук", 80.0, "https://images.unsplash.com/photo-1558961363-fa8fdf82db35?w=400", "dessert", '["Сыр", "Мука", "Масло", "Яйцо"]'),
-    ("Сырники", "Сырники из творога. 10 штук", 60.0, "https://images.unsplash.com/photo-1625938145043-21545e3d639f?w=400", "dessert", '["Творог", "Мука", "Яйцо", "Сахар"]'),
-
-    # ЗАКУСКИ И САЛАТЫ (salad)
-    ("Мимоза с тунцом", "Салат Мимоза с тунцом. 1 кг", 100.0, "https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=400", "salad", '["Тунец", "Картофель", "Морковь", "Яйцо", "Майонез"]'),
-    ("Паштет из куриной печени", "Домашний паштет из куриной печени. 400г", 60.0, "https://images.unsplash.com/photo-1535473895227-bdecb20fb157?w=400", "salad", '["Куриная печень", "Лук", "Морковь", "Масло"]'),
-    ("Капуста квашеная 500г", "Квашеная капуста домашнего приготовления. 500г", 30.0, "https://images.unsplash.com/photo-1623428187969-5da2dcea5ebf?w=400", "salad", '["Капуста", "Морковь", "Соль"]'),
-    ("Капуста квашеная 1кг", "Квашеная капуста домашнего приготовления. 1 кг", 60.0, "https://images.unsplash.com/photo-1623428187969-5da2dcea5ebf?w=400", "salad", '["Капуста", "Морковь", "Соль"]'),
-]
-
-success = 0
-errors = 0
-
-for name, desc, price, img, cat, ingr in products:
-    try:
-        product_id = add_product(
-            name=name,
-            description=desc,
-            price=price,
-            image=img,
-            category=cat,
-            ingredients=ingr
-        )
-        print(f"✅ {name}")
-        success += 1
-    except Exception as e:
-        print(f"❌ {name}: {e}")
-        errors += 1
-
-print("=" * 60)
-print(f"✅ Migration complete! Added {success} products, {errors} errors")
-print("=" * 60)
+print(f"✅ Done, {applied} migration(s) applied" if applied else "✓ Schema is up to date")
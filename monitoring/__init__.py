@@ -0,0 +1,3 @@
+"""
+Monitoring: in-process metrics
+"""
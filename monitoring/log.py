@@ -0,0 +1,194 @@
+"""
+Structured Logging
+Log calls put the record on a queue; a background thread formats and writes it,
+so logging on the event loop costs a queue put instead of a stdout write.
+
+Environment:
+- LOG_LEVEL   - INFO by default
+- LOG_FORMAT  - json (default, one object per line) or text
+- LOG_SAMPLE  - share of DEBUG/INFO records kept per logger prefix,
+                e.g. "api.routes.products=0.1,start=0.5"; warnings and errors are always kept
+
+uvicorn's own loggers (uvicorn.error, uvicorn.access) are routed through the same
+queue; LOG_SAMPLE="uvicorn.access=0.1" keeps a tenth of the access lines.
+
+Every record carries the correlation id of the HTTP request / Telegram update
+it was logged in (bind_correlation_id), and extra={...} fields as structured keys.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from typing import Optional
+
+# Records waiting for the writer thread; when full, new records are dropped instead of blocking
+QUEUE_SIZE = 10_000
+
+_correlation_id = contextvars.ContextVar('correlation_id', default=None)
+
+_listener = None
+_handler = None
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'correlation_id', 'taskName',
+}
+
+
+def bind_correlation_id(value: Optional[str] = None) -> str:
+    """Set the correlation id for the current request / update (generated if not given)"""
+    value = value or uuid.uuid4().hex[:12]
+    _correlation_id.set(value)
+    return value
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+def _extras(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in record.__dict__.items() if key not in _STANDARD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, cid, extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if record.correlation_id:
+            entry['cid'] = record.correlation_id
+        entry.update(_extras(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable line for local development; extra fields as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s%(cid)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.cid = f" [{record.correlation_id}]" if record.correlation_id else ''
+        line = super().format(record)
+        extras = {key: value for key, value in _extras(record).items() if key != 'cid'}
+        if extras:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in extras.items())
+        return line
+
+
+class CorrelationFilter(logging.Filter):
+    """Copies the correlation id onto the record (runs in the caller's context)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a share of DEBUG/INFO records of noisy loggers"""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+        self._by_logger = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._by_logger.get(name)
+        if rate is None:
+            # Longest matching prefix wins: "api.routes.products" over "api"
+            matches = [prefix for prefix in self.rates if name == prefix or name.startswith(prefix + '.')]
+            rate = self.rates[max(matches, key=len)] if matches else 1.0
+            self._by_logger[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that neither formats in the caller nor blocks when the queue is full"""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process - no need to make the record picklable; formatting happens in the writer thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+def parse_sample_rates(spec: str) -> dict:
+    """"api.routes.products=0.1,start=0.5" -> {'api.routes.products': 0.1, 'start': 0.5}"""
+    rates = {}
+    for part in spec.split(','):
+        name, sep, rate = part.partition('=')
+        if sep and name.strip():
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, sample: Optional[str] = None):
+    """Route the root logger through the background writer (idempotent)"""
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'json')).lower()
+    sample = sample if sample is not None else os.getenv('LOG_SAMPLE', '')
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if fmt == 'text' else JsonFormatter())
+
+    _handler = _NonBlockingQueueHandler(queue.Queue(QUEUE_SIZE))
+    _handler.addFilter(CorrelationFilter())
+    rates = parse_sample_rates(sample)
+    if rates:
+        _handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(level)
+    # uvicorn configures its loggers with their own stdout handlers and propagate=False:
+    # the access line of every request would be a synchronous write on the event loop
+    for name in ('uvicorn', 'uvicorn.error', 'uvicorn.access'):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+    # Every Bot API call is an INFO line from httpx
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write out everything still queued and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        if _NonBlockingQueueHandler.dropped:
+            print(f"⚠️ {_NonBlockingQueueHandler.dropped} log records dropped (queue full)")
@@ -0,0 +1,110 @@
+"""
+Webhook Update Recording
+With WEBHOOK_RECORD=<path> the webhook appends every update it accepts to a JSONL
+file, for replay by benchmarks/webhook_load.py:
+
+    {"t": 12.345, "update": {...}}        # t - seconds since the first recorded update
+
+Updates are anonymized on the way in: admins become users 1..N (their position in
+ADMIN_IDS, so a replay with ADMIN_IDS=1,2,... keeps admin access), every other
+user / chat id is replaced by a salted hash, names, usernames, phone numbers,
+contacts and locations are removed. Message text is kept (conversations need it);
+set WEBHOOK_RECORD_TEXT=0 to blank it too.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Pseudonymous ids start here, well away from the 1..N admin range
+ANONYMOUS_ID_BASE = 10 ** 9
+
+_PERSONAL_KEYS = ('first_name', 'last_name', 'username', 'phone_number', 'title')
+_DROPPED_KEYS = ('contact', 'location', 'venue', 'invoice', 'successful_payment')
+_ID_OBJECTS = ('from', 'chat', 'user', 'sender_chat', 'forward_from')
+
+
+class UpdateRecorder:
+    """Appends anonymized updates to a JSONL file"""
+
+    def __init__(self, path: str, admin_ids: list = (), keep_text: bool = True):
+        self.path = path
+        self.keep_text = keep_text
+        self._admins = {admin_id: position + 1 for position, admin_id in enumerate(admin_ids)}
+        # Per recording: pseudonyms cannot be matched across files or brute-forced back
+        self._salt = uuid.uuid4().bytes
+        self._ids = {}
+        self._started = None
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        self.recorded = 0
+
+    def anonymous_id(self, value: int) -> int:
+        if value in self._admins:
+            return self._admins[value]
+        mapped = self._ids.get(value)
+        if mapped is None:
+            digest = hashlib.sha256(self._salt + str(value).encode()).digest()
+            mapped = self._ids[value] = ANONYMOUS_ID_BASE + int.from_bytes(digest[:4], 'big')
+        return mapped
+
+    def anonymize(self, data):
+        """Copy of an update (or a part of it) without personal data"""
+        if isinstance(data, list):
+            return [self.anonymize(item) for item in data]
+        if not isinstance(data, dict):
+            return data
+        result = {}
+        for key, value in data.items():
+            if key in _DROPPED_KEYS:
+                continue
+            if key in _PERSONAL_KEYS and isinstance(value, str):
+                result[key] = 'anon'
+            elif key in _ID_OBJECTS and isinstance(value, dict):
+                result[key] = self.anonymize(value)
+                if isinstance(value.get('id'), int):
+                    result[key]['id'] = self.anonymous_id(value['id'])
+            elif key == 'chat_instance':
+                # Derived from the chat id by Telegram - stable pseudonym too
+                result[key] = str(self.anonymous_id(value))
+            elif key in ('text', 'caption') and not self.keep_text and isinstance(value, str):
+                result[key] = 'x' * len(value)
+            else:
+                result[key] = self.anonymize(value)
+        return result
+
+    def record(self, data: dict):
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+        try:
+            entry = {'t': round(now - self._started, 3), 'update': self.anonymize(data)}
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.recorded += 1
+        except Exception:
+            logger.exception("Cannot record update", extra={'path': self.path})
+
+    def close(self):
+        self._file.close()
+
+
+_recorder = None
+
+
+def get_recorder() -> Optional[UpdateRecorder]:
+    """The recorder configured by WEBHOOK_RECORD, or None when recording is off"""
+    global _recorder
+    if _recorder is None:
+        path = os.getenv('WEBHOOK_RECORD')
+        if not path:
+            _recorder = False
+            return None
+        from bot.config import ADMIN_IDS
+        _recorder = UpdateRecorder(path, ADMIN_IDS, keep_text=os.getenv('WEBHOOK_RECORD_TEXT', '1') != '0')
+        logger.warning("Recording webhook updates", extra={'path': path})
+    return _recorder or None
@@ -3,6 +3,7 @@
 """
 Скрипт для добавления продуктов в PostgreSQL на Railway
 Использует DATABASE_URL из переменных окружения
+Повторный запуск не создает дубликатов: продукты сверяются по названию
 """
 
 import os
@@ -15,7 +16,8 @@ if not os.getenv('DATABASE_URL'):
     sys.exit(1)
 
 # Импортируем после проверки DATABASE_URL
-from database import db, add_product
+from database import db
+from database.catalog_import import import_catalog
 
 print(f"🔗 Database: {'PostgreSQL' if db.use_postgres else 'SQLite'}")
 print(f"📍 Database URL: {os.getenv('DATABASE_URL', 'Not set')[:50]}...")
@@ -73,29 +75,15 @@ products = [
     ("Капуста квашеная 1кг", "Квашеная капуста домашнего приготовления, 1 кг", 60.0, "https://images.unsplash.com/photo-1623428187969-5da2dcea5ebf?w=300&q=80", "salad", '["Капуста", "Морковь", "Соль"]'),
 ]
 
+FIELDS = ('name', 'description', 'price', 'image', 'category', 'ingredients')
+
 print("=" * 60)
 print("Добавление продуктов в PostgreSQL на Railway...")
 print("=" * 60)
 
-success_count = 0
-error_count = 0
-
-for i, (name, description, price, image, category, ingredients) in enumerate(products, 1):
-    try:
-        product_id = add_product(
-            name=name,
-            description=description,
-            price=price,
-            image=image,
-            category=category,
-            ingredients=ingredients
-        )
-        print(f"✅ [{i}/{len(products)}] {name}")
-        success_count += 1
-    except Exception as e:
-        print(f"❌ [{i}/{len(products)}] {name} - Error: {e}")
-        error_count += 1
+diff = import_catalog([dict(zip(FIELDS, product)) for product in products])
+print(diff.report())
 
 print("=" * 60)
-print(f"Done! Success: {success_count}, Errors: {error_count}")
+print(f"Done! Inserted: {len(diff.inserts)}, updated: {len(diff.updates)}, unchanged: {diff.unchanged}")
 print("=" * 60)
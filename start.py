@@ -4,9 +4,17 @@ Home Food Abu Dhabi - Webhook для Railway с поддержкой Conversatio
 """
 
 import os
+import time
 import asyncio
+import logging
 from contextlib import asynccontextmanager
 
+from monitoring.log import setup_logging, bind_correlation_id
+from monitoring.metrics import Counter, Gauge, Histogram
+from monitoring.recording import get_recorder
+
+logger = logging.getLogger('start')
+
 print("=" * 50)
 print("Home Food Abu Dhabi - Starting...")
 print("=" * 50)
@@ -22,16 +30,43 @@ print("=" * 50)
 
 bot_application = None
 
+# Больше updates в очереди - обработчик не успевает, инстанс не готов
+MAX_UPDATE_QUEUE_DEPTH = 100
+
+# update_id -> когда webhook его принял (для задержки обработки)
+_received_at = {}
+# update_id -> (когда принят, какой handler его обрабатывает) - пока идет обработка
+_in_handlers = {}
+
+# Группа handler, который замеряет завершение обработки (после всех остальных)
+DONE_GROUP = 100
+
+WEBHOOK_UPDATES = Counter('homefood_webhook_updates_total', 'Updates received by the webhook', ('type',))
+UPDATE_LAG = Histogram('homefood_update_lag_seconds', 'Time from webhook receipt to handler start')
+UPDATE_SECONDS = Histogram('homefood_update_duration_seconds', 'Time from webhook receipt to handler completion',
+                           ('handler',))
+Gauge('homefood_update_queue_depth', 'Updates waiting in the bot queue',
+      function=lambda: bot_application.update_queue.qsize() if bot_application else 0)
+
 @asynccontextmanager
 async def lifespan(app):
     """Lifespan для FastAPI"""
     global bot_application
     
     print("FastAPI starting up...")
-    
+    setup_logging()
+
+    # Схема БД применяется здесь, а не при импорте database
+    from database import db, purge_tombstones_periodically
+    db.initialize()
+    print(f"Database: {'PostgreSQL' if db.use_postgres else 'SQLite'}")
+    # Старые надгробия удаленных продуктов (из бота и из импорта) удаляются по расписанию
+    purge_task = asyncio.create_task(purge_tombstones_periodically())
+
     if not BOT_TOKEN:
         print("⚠️ BOT_TOKEN not set")
         yield
+        purge_task.cancel()
         return
     
     try:
@@ -41,31 +76,23 @@ async def lifespan(app):
 
         # Import bot.py as a module
         import importlib.util
-        spec = importlib.util.spec_from_file_location("bot_app", "bot.py")
+        spec = importlib.util.spec_from_file_location(
+            "bot_app", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+        )
         bot_module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(bot_module)
 
-        from database import db
-        print(f"Database: {'PostgreSQL' if db.use_postgres else 'SQLite'}")
-
-        # Run migration if on Railway
-        if RAILWAY_URL:
-            print("🔄 Running database migration...")
-            try:
-                import subprocess
-                result = subprocess.run(['python', 'migrate_products.py'],
-                                      capture_output=True, text=True, timeout=30)
-                if result.stdout:
-                    print(result.stdout)
-                if result.returncode != 0 and result.stderr:
-                    print(f"Migration warning: {result.stderr}")
-            except Exception as e:
-                print(f"Migration skipped: {e}")
-
         # Создаем приложение
         application = bot_module.create_application()
         
         if application:
+            # Первым (group -1) - correlation id и задержка между webhook и обработкой,
+            # последним - время до завершения handlers
+            from telegram import Update
+            from telegram.ext import TypeHandler
+            application.add_handler(TypeHandler(Update, track_update), group=-1)
+            application.add_handler(TypeHandler(Update, track_update_done), group=DONE_GROUP)
+
             # КРИТИЧЕСКИ ВАЖНО: инициализируем приложение полностью
             await application.initialize()
             
@@ -84,6 +111,10 @@ async def lifespan(app):
             
             print("✅ Webhook configured")
             bot_application = application
+
+            # Глубина очереди updates - в /readyz
+            from api.routes.health import register_check
+            register_check('update_queue', update_queue_status)
             
             # ВАЖНО: Запускаем обработчик очереди в фоне
             asyncio.create_task(process_updates())
@@ -96,6 +127,7 @@ async def lifespan(app):
     yield
     
     # Shutdown
+    purge_task.cancel()
     if bot_application:
         try:
             await bot_application.stop()
@@ -104,6 +136,67 @@ async def lifespan(app):
             print(f"Shutdown error: {e}")
 
 
+def update_queue_status() -> dict:
+    """Состояние очереди updates для /readyz"""
+    depth = bot_application.update_queue.qsize()
+    return {'ok': depth <= MAX_UPDATE_QUEUE_DEPTH, 'depth': depth}
+
+
+async def track_update(update, context):
+    """
+    Correlation id для логов обработки и сколько update ждал в очереди
+    (TypeHandler в group -1, не мешает остальным handlers)
+    """
+    bind_correlation_id(f"upd-{update.update_id}")
+    received = _received_at.pop(update.update_id, None)
+    if received is not None:
+        UPDATE_LAG.observe(time.monotonic() - received)
+        if len(_in_handlers) > 10_000:
+            _in_handlers.clear()
+        _in_handlers[update.update_id] = (received, handler_name(update))
+
+
+async def track_update_done(update, context):
+    """
+    Время от приема webhook до завершения handler
+    (TypeHandler в последней группе: группы обрабатываются по порядку, после group 0)
+    """
+    entry = _in_handlers.pop(update.update_id, None)
+    if entry is not None:
+        received, handler = entry
+        UPDATE_SECONDS.observe(time.monotonic() - received, handler=handler)
+
+
+def handler_name(update) -> str:
+    """
+    Какой handler обработает update (метка homefood_update_duration_seconds):
+    имя callback, "<conversation>/<callback>" для шагов диалога, маршрут router для кнопок.
+    Вызывается из track_update, пока диалог еще в том состоянии, в котором пришел update
+    """
+    from telegram.ext import CallbackQueryHandler, ConversationHandler
+
+    try:
+        for group in sorted(bot_application.handlers):
+            if group < 0 or group >= DONE_GROUP:
+                continue
+            for handler in bot_application.handlers[group]:
+                check = handler.check_update(update)
+                if check is None or check is False:
+                    continue
+                if isinstance(handler, ConversationHandler):
+                    return f"{handler.name}/{check[2].callback.__name__}"
+                if isinstance(handler, CallbackQueryHandler) and update.callback_query.data is not None:
+                    from bot.handlers.callbacks import router
+                    route, _ = router.resolve(update.callback_query.data)
+                    return route.name if route else 'unrouted_callback'
+                return handler.callback.__name__
+        return 'unhandled'
+    except Exception:
+        # Метка не должна мешать обработке update
+        logger.exception("Cannot resolve handler of update %s", update.update_id)
+        return 'unknown'
+
+
 async def process_updates():
     """Обработчик очереди updates - необходим для ConversationHandler"""
     global bot_application
@@ -129,10 +222,8 @@ async def process_updates():
             except asyncio.TimeoutError:
                 # Таймаут - это нормально, продолжаем ждать
                 continue
-            except Exception as e:
-                print(f"❌ Error processing update: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error processing update")
     except asyncio.CancelledError:
         print("Update processor cancelled")
 
@@ -157,27 +248,37 @@ async def webhook(token: str, request: Request):
         
         data = await request.json()
         update_id = data.get('update_id', 'unknown')
-        
-        # Логируем детали
-        if 'message' in data:
-            msg = data['message']
-            print(f"📨 Message [{update_id}]: {msg.get('text', 'no text')[:50]}")
-        elif 'callback_query' in data:
-            cb = data['callback_query']
-            print(f"📨 Callback [{update_id}]: {cb.get('data', 'no data')}")
+        bind_correlation_id(f"upd-{update_id}")
+
+        recorder = get_recorder()
+        if recorder:
+            recorder.record(data)
+
+        kind = 'callback_query' if 'callback_query' in data else 'message' if 'message' in data else 'other'
+        WEBHOOK_UPDATES.inc(type=kind)
+
+        # Логируем детали (DEBUG - по строке на каждый update)
+        if kind == 'message':
+            logger.debug("Message received", extra={'update_id': update_id,
+                                                    'text': (data['message'].get('text') or '')[:50]})
+        elif kind == 'callback_query':
+            logger.debug("Callback received", extra={'update_id': update_id,
+                                                     'data': data['callback_query'].get('data')})
         
         # Создаём Update
         update = Update.de_json(data, bot_application.bot)
         
         # Кладём в очередь для обработки
+        if len(_received_at) > 10_000:
+            # Updates, которые так и не дошли до handlers, не должны копиться
+            _received_at.clear()
+        _received_at[update.update_id] = time.monotonic()
         await bot_application.update_queue.put(update)
         
         return {"ok": True}
     
-    except Exception as e:
-        print(f"❌ Webhook error: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Webhook error")
         return {"ok": False}
 
 
@@ -0,0 +1,56 @@
+"""
+GET /api/products/changes with rows that have NULL text fields
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routes import products
+from database import db
+from database.catalog import invalidate_catalog
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    if db.use_postgres:
+        pytest.skip("runs against a scratch SQLite database")
+    monkeypatch.setattr(db, 'db_path', str(tmp_path / 'homefood.db'))
+    monkeypatch.setattr(db, '_initialized', False)
+    db.initialize()
+    invalidate_catalog()
+    app = FastAPI()
+    app.include_router(products.router)
+    yield TestClient(app)
+    invalidate_catalog()
+
+
+def _null_description():
+    db.execute_query("UPDATE products SET description = NULL, image = NULL WHERE id = '1'")
+    invalidate_catalog()
+    return db.execute_query("SELECT version FROM catalog_state WHERE id = 1", fetch='one')['version']
+
+
+def test_reset_with_null_description(client):
+    _null_description()
+
+    response = client.get('/api/products/changes', params={'since': 0})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['reset'] is True
+    product = next(product for product in body['products'] if product['id'] == '1')
+    assert product['description'] == '' and product['image'] == ''
+    assert client.get('/api/products').status_code == 200
+
+
+def test_delta_with_null_description(client):
+    version = _null_description()
+
+    response = client.get('/api/products/changes', params={'since': version - 1})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['reset'] is False
+    assert [product['id'] for product in body['products']] == ['1']
+    assert body['products'][0]['description'] == ''